@@ -1,14 +1,18 @@
 from __future__ import annotations
 
 import json
-from collections import deque
 from pathlib import Path
 
 import joblib
 import numpy as np
 import pandas as pd
 
-from backend.ml.feature_extraction import SlidingWindowFeatureExtractor
+from backend.ml.datasets import read_mit
+from backend.ml.feature_extraction import FEATURE_VARIABLES, extract_features_grouped
+from backend.ml.feature_store import default_store
+from backend.ml.model_loader import ModelLoader
+from backend.ml.threshold_sweep import all_k_of_n, k_of_n, sweep_policies, sweep_thresholds, threshold_grid
+from backend.simulation.persistence import DEFAULT_POLICY
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -27,10 +31,18 @@ CANDIDATES = [
     ("0.15", 0.15),
 ]
 
+DEPLOYED_THRESHOLD = ModelLoader.ANOMALY_THRESHOLD
+# Edge and central raise is_anomaly while any raw flag is set in the last 20 steps
+DEPLOYED_POLICY = DEFAULT_POLICY
+# Dense sweep: every k-of-n with n <= 10, plus the deployed policy
+SWEEP_POLICIES = all_k_of_n(10) + [DEPLOYED_POLICY]
+SWEEP_POINTS = 2001
+
 
 def load_streams():
-    raw = pd.read_csv(MIT_PATH)
-    validation = pd.read_csv(VALIDATION_PATH)
+    # Same loader (and dtypes) for both, so the merge on SCHEMA matches rows exactly
+    raw = read_mit(str(MIT_PATH))
+    validation = read_mit(str(VALIDATION_PATH))
 
     raw_no_null = raw[raw["Humidity"].notna()].copy()
     out_of_range = (raw_no_null["Humidity"] < 0) | (raw_no_null["Humidity"] > 100)
@@ -44,9 +56,6 @@ def load_streams():
     overlap_rows_removed = int(len(train_excluded) - normal_pool["_is_validation_row"].isna().sum())
     normal_pool = normal_pool[normal_pool["_is_validation_row"].isna()].copy().drop(columns=["_is_validation_row"])
 
-    for df in (normal_pool, validation):
-        df["Datetime"] = pd.to_datetime(df["Date"] + " " + df["Timestamp"], errors="coerce")
-
     return normal_pool, validation, overlap_rows_removed
 
 
@@ -60,39 +69,27 @@ def build_windows_with_meta(df: pd.DataFrame):
     d["humidity"] = d["Humidity"]
 
     d = d.sort_values(["Moteid", "Datetime", "Epoch"]).copy()
-    d[["temperature", "humidity", "airflow", "cpu_load"]] = (
-        d.groupby("Moteid")[["temperature", "humidity", "airflow", "cpu_load"]]
-        .transform(lambda g: g.ffill().bfill())
-    )
+    # Per-mote forward then backward fill, vectorized across all motes
+    channels = ["temperature", "humidity", "airflow", "cpu_load"]
+    filled = d.groupby("Moteid", observed=True)[channels].ffill()
+    d[channels] = filled.groupby(d["Moteid"], observed=True).bfill()
     d[["temperature", "humidity", "airflow", "cpu_load"]] = (
         d[["temperature", "humidity", "airflow", "cpu_load"]].fillna(0)
     )
 
-    features = []
-    meta = []
-    for mote_id, group in d.groupby("Moteid", sort=False):
-        group = group.sort_values(["Datetime", "Epoch"])
-        extractor = SlidingWindowFeatureExtractor(window_size=10)
-        for _, row in group.iterrows():
-            extractor.add_point(
-                {
-                    "temperature": float(row["temperature"]),
-                    "airflow": float(row["airflow"]),
-                    "humidity": float(row["humidity"]),
-                    "cpu_load": float(row["cpu_load"]),
-                }
-            )
-            if extractor.is_window_ready():
-                features.append(extractor.extract_features())
-                meta.append(
-                    {
-                        "moteid": int(row["Moteid"]),
-                        "end_datetime": row["Datetime"],
-                        "end_epoch": int(row["Epoch"]) if not pd.isna(row["Epoch"]) else None,
-                    }
-                )
-
-    features = np.asarray(features, dtype=float)
+    # Rows are already ordered by (Moteid, Datetime, Epoch); groupby drops missing mote ids
+    d = d[d["Moteid"].notna()]
+    moteid = d["Moteid"].to_numpy(dtype=int)
+    features, end_index = extract_features_grouped(
+        d[FEATURE_VARIABLES].to_numpy(dtype=float), moteid, window_size=10
+    )
+    end_epoch = pd.Series(d["Epoch"].to_numpy(dtype=float, na_value=np.nan)[end_index])
+    meta = {
+        "moteid": moteid[end_index],
+        "end_datetime": d["Datetime"].to_numpy()[end_index],
+        "end_epoch": end_epoch if end_epoch.isna().any() else end_epoch.astype(int),
+    }
+
     meta_df = pd.DataFrame(meta)
     if len(meta_df):
         meta_df["_orig_idx"] = np.arange(len(meta_df))
@@ -105,6 +102,45 @@ def build_windows_with_meta(df: pd.DataFrame):
     return features, meta_df
 
 
+META_COLUMNS = ("moteid", "end_datetime", "end_epoch")
+
+
+def load_windows():
+    """
+    Normal and anomaly windows with their metadata, cached in the feature store
+    by the content of both CSVs. Returns (normal_features, normal_meta,
+    anomaly_features, anomaly_meta, overlap_rows_removed).
+    """
+    def compute():
+        normal_pool, validation, overlap_rows_removed = load_streams()
+        arrays = {"overlap_rows_removed": np.array(overlap_rows_removed)}
+        for prefix, df in (("normal", normal_pool), ("anomaly", validation)):
+            features, meta = build_windows_with_meta(df)
+            arrays[f"{prefix}_features"] = features
+            for col in META_COLUMNS:
+                arrays[f"{prefix}_{col}"] = meta[col].to_numpy()
+        return arrays
+
+    params = {
+        "version": 2,
+        "window_size": 10,
+        "train_excluded_from_row": 20000,
+        "airflow": {"source": "Light", "offset": 2.0, "scale": 1.0},
+        "cpu_load": {"source": "Voltage", "offset": 0.1, "scale": 0.8},
+        "imputation": "per-mote ffill, bfill, 0",
+    }
+    arrays = default_store().get("threshold_windows", [MIT_PATH, VALIDATION_PATH], params, compute)
+
+    def meta(prefix):
+        return pd.DataFrame({col: np.asarray(arrays[f"{prefix}_{col}"]) for col in META_COLUMNS})
+
+    return (
+        arrays["normal_features"], meta("normal"),
+        arrays["anomaly_features"], meta("anomaly"),
+        int(arrays["overlap_rows_removed"]),
+    )
+
+
 def compute_metrics(normal_pos: np.ndarray, anomaly_pos: np.ndarray):
     tp = int(anomaly_pos.sum())
     fn = int((~anomaly_pos).sum())
@@ -146,44 +182,108 @@ def onset_indices(alerts: np.ndarray) -> np.ndarray:
     return np.flatnonzero(alerts & ~prev)
 
 
-def policy_single(flags: np.ndarray):
-    return flags.copy()
+# (k, n): alert when at least k of the last n windows are flagged
+TEMPORAL_POLICIES = {
+    "A_single_window": (1, 1),
+    "B_2_consecutive": (2, 2),
+    "C_3_consecutive": (3, 3),
+    "D_2_of_last_3": (2, 3),
+    "E_3_of_last_5": (3, 5),
+}
 
 
-def policy_two_consecutive(flags: np.ndarray):
-    out = np.zeros(len(flags), dtype=bool)
-    if len(flags) >= 2:
-        out[1:] = flags[1:] & flags[:-1]
-    return out
+def sweep_point(metrics: dict, index, thresholds: np.ndarray):
+    """One threshold's entry of a sweep, as JSON-ready scalars."""
+    row = {"threshold": float(thresholds[index[-1]])}
+    for key, values in metrics.items():
+        if np.ndim(values) == len(index):
+            value = values[index]
+            row[key] = int(value) if np.issubdtype(np.asarray(value).dtype, np.integer) else float(value)
+    return row
 
 
-def policy_three_consecutive(flags: np.ndarray):
-    out = np.zeros(len(flags), dtype=bool)
-    if len(flags) >= 3:
-        out[2:] = flags[2:] & flags[1:-1] & flags[:-2]
-    return out
+def best_f1_index(metrics: dict) -> int:
+    """Highest F1, then highest recall, then lowest FPR."""
+    return int(np.lexsort((metrics["false_positive_rate"], -metrics["recall"], -metrics["F1"]))[0])
 
 
-def rolling_count_policy(flags: np.ndarray, window: int, needed: int):
-    out = np.zeros(len(flags), dtype=bool)
-    q: deque[int] = deque()
-    s = 0
-    for i, flag in enumerate(flags):
-        q.append(int(flag))
-        s += int(flag)
-        if len(q) > window:
-            s -= q.popleft()
-        out[i] = s >= needed
-    return out
+def lowest_fpr_index(metrics: dict, min_recall: float):
+    """Lowest FPR among thresholds reaching min_recall (then highest recall), or None."""
+    eligible = np.flatnonzero(metrics["recall"] >= min_recall)
+    if not len(eligible):
+        return None
+    order = np.lexsort((-metrics["recall"][eligible], metrics["false_positive_rate"][eligible]))
+    return int(eligible[order[0]])
 
 
-TEMPORAL_POLICIES = {
-    "A_single_window": policy_single,
-    "B_2_consecutive": policy_two_consecutive,
-    "C_3_consecutive": policy_three_consecutive,
-    "D_2_of_last_3": lambda flags: rolling_count_policy(flags, 3, 2),
-    "E_3_of_last_5": lambda flags: rolling_count_policy(flags, 5, 3),
-}
+def dense_sweep(normal_scores: np.ndarray, anomaly_scores: np.ndarray):
+    """
+    Window- and alert-level metrics for every threshold in a dense grid and
+    every policy in SWEEP_POLICIES. Returns (surfaces for the .npz, summary).
+    """
+    thresholds = threshold_grid(
+        normal_scores, anomaly_scores, n_points=SWEEP_POINTS,
+        include=[t for _, t in CANDIDATES if t is not None] + [DEPLOYED_THRESHOLD],
+    )
+    window = sweep_thresholds(normal_scores, anomaly_scores, thresholds)
+    policy = sweep_policies(normal_scores, anomaly_scores, thresholds, SWEEP_POLICIES)
+
+    deployed = int(np.searchsorted(thresholds, DEPLOYED_THRESHOLD))
+    deployed_policy = SWEEP_POLICIES.index(DEPLOYED_POLICY)
+    policy_metrics = {key: v for key, v in policy.items() if key not in ("k", "n")}
+
+    per_policy = []
+    for i, (k, n) in enumerate(SWEEP_POLICIES):
+        row_metrics = {key: v[i] for key, v in policy_metrics.items()}
+        recall95 = lowest_fpr_index(row_metrics, 0.95)
+        per_policy.append({
+            "policy": f"{k}_of_{n}",
+            "k": k,
+            "n": n,
+            "at_deployed_threshold": sweep_point(row_metrics, (deployed,), thresholds),
+            "best_by_alert_F1": sweep_point(row_metrics, (best_f1_index(row_metrics),), thresholds),
+            "lowest_alert_fpr_with_recall_>=_0.95": (
+                None if recall95 is None else sweep_point(row_metrics, (recall95,), thresholds)
+            ),
+        })
+
+    window_recall95 = lowest_fpr_index(window, 0.95)
+    # Thresholds at least as good as the deployed one on both recall and FPR
+    no_worse = np.flatnonzero(
+        (window["recall"] >= window["recall"][deployed])
+        & (window["false_positive_rate"] <= window["false_positive_rate"][deployed])
+    )
+    summary = {
+        "inputs": {
+            "normal_window_count": int(len(normal_scores)),
+            "anomaly_window_count": int(len(anomaly_scores)),
+            "threshold_count": int(len(thresholds)),
+            "threshold_range": [float(thresholds[0]), float(thresholds[-1])],
+            "policies_tested": [f"{k}_of_{n}" for k, n in SWEEP_POLICIES],
+            "flag_rule": "decision_function score < threshold",
+        },
+        "deployed": {
+            "threshold": DEPLOYED_THRESHOLD,
+            "policy": f"{DEPLOYED_POLICY[0]}_of_{DEPLOYED_POLICY[1]}",
+            "window_level": sweep_point(window, (deployed,), thresholds),
+            "alert_level": sweep_point(policy_metrics, (deployed_policy, deployed), thresholds),
+            "span_of_thresholds_with_same_or_better_recall_and_fpr": [
+                float(thresholds[no_worse[0]]), float(thresholds[no_worse[-1]]),
+            ] if len(no_worse) else None,
+        },
+        "window_level_optima": {
+            "best_by_F1": sweep_point(window, (best_f1_index(window),), thresholds),
+            "lowest_fpr_with_recall_>=_0.95": (
+                None if window_recall95 is None else sweep_point(window, (window_recall95,), thresholds)
+            ),
+        },
+        "policies": per_policy,
+    }
+
+    surfaces = {"thresholds": thresholds}
+    surfaces.update({f"window_{key}": v for key, v in window.items()})
+    surfaces.update({f"policy_{key}": v for key, v in policy.items()})
+    return surfaces, summary
 
 
 def percentile_dict(values: np.ndarray, labels):
@@ -194,9 +294,7 @@ def percentile_dict(values: np.ndarray, labels):
 def main():
     ANALYSIS_DIR.mkdir(parents=True, exist_ok=True)
 
-    normal_pool, validation, overlap_rows_removed = load_streams()
-    normal_features, normal_meta = build_windows_with_meta(normal_pool)
-    anomaly_features, anomaly_meta = build_windows_with_meta(validation)
+    normal_features, normal_meta, anomaly_features, anomaly_meta, overlap_rows_removed = load_windows()
 
     model = joblib.load(MODEL_PATH)
     scaler = joblib.load(SCALER_PATH)
@@ -277,9 +375,9 @@ def main():
             "anomaly": int(a_raw.sum()),
             "total": int(n_raw.sum() + a_raw.sum()),
         }
-        for policy_name, policy_fn in TEMPORAL_POLICIES.items():
-            n_alert = policy_fn(n_raw)
-            a_alert = policy_fn(a_raw)
+        for policy_name, (k, n) in TEMPORAL_POLICIES.items():
+            n_alert = k_of_n(n_raw, k, n)
+            a_alert = k_of_n(a_raw, k, n)
             n_onsets = onset_count(n_alert)
             a_onsets = onset_count(a_alert)
             n_onset_idx = onset_indices(n_alert)
@@ -560,11 +658,38 @@ def main():
         ]
     )
 
+    sweep_surfaces, sweep_summary = dense_sweep(normal_scores, anomaly_scores)
+    deployed_window = sweep_summary["deployed"]["window_level"]
+    deployed_alert = sweep_summary["deployed"]["alert_level"]
+    sweep_best_f1 = sweep_summary["window_level_optima"]["best_by_F1"]
+    sweep_recall95 = sweep_summary["window_level_optima"]["lowest_fpr_with_recall_>=_0.95"]
+    summary_lines.extend(
+        [
+            "## Dense Threshold Sweep",
+            f"- `{sweep_summary['inputs']['threshold_count']}` thresholds from "
+            f"`{sweep_summary['inputs']['threshold_range'][0]:.6f}` to `{sweep_summary['inputs']['threshold_range'][1]:.6f}`, "
+            f"`{len(SWEEP_POLICIES)}` k-of-n policies (full surfaces in `threshold_sweep.npz`)",
+            f"- Deployed `{DEPLOYED_THRESHOLD}` (window level): `recall={deployed_window['recall']:.12f}`, "
+            f"`false_positive_rate={deployed_window['false_positive_rate']:.12f}`, `F1={deployed_window['F1']:.12f}`",
+            f"- Deployed `{DEPLOYED_THRESHOLD}` + `{sweep_summary['deployed']['policy']}`: "
+            f"`alert_recall={deployed_alert['recall']:.12f}`, `alert_false_positive_rate={deployed_alert['false_positive_rate']:.12f}`",
+            f"- Best window-level F1: threshold `{sweep_best_f1['threshold']:.6f}` with `F1={sweep_best_f1['F1']:.12f}`",
+            (
+                f"- Lowest FPR with recall >= 0.95: threshold `{sweep_recall95['threshold']:.6f}` with "
+                f"`recall={sweep_recall95['recall']:.12f}` and `false_positive_rate={sweep_recall95['false_positive_rate']:.12f}`"
+                if sweep_recall95 else "- Lowest FPR with recall >= 0.95: none in the grid"
+            ),
+            "",
+        ]
+    )
+
     (ANALYSIS_DIR / "threshold_comparison.json").write_text(json.dumps(threshold_comparison, indent=2) + "\n")
     (ANALYSIS_DIR / "temporal_policy_results.json").write_text(json.dumps(temporal_output, indent=2) + "\n")
     (ANALYSIS_DIR / "sklearn_threshold_role_assessment.json").write_text(json.dumps(role_assessment, indent=2) + "\n")
     (ANALYSIS_DIR / "deployment_threshold_evidence.json").write_text(json.dumps(deployment_evidence, indent=2) + "\n")
     (ANALYSIS_DIR / "threshold_analysis_summary.md").write_text("\n".join(summary_lines))
+    (ANALYSIS_DIR / "threshold_sweep.json").write_text(json.dumps(sweep_summary, indent=2) + "\n")
+    np.savez_compressed(ANALYSIS_DIR / "threshold_sweep.npz", **sweep_surfaces)
 
 
 if __name__ == "__main__":
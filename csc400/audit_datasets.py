@@ -3,6 +3,8 @@ import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
+from backend.ml.datasets import parse_mit_datetime
+
 def audit_mit():
     print("--- DATASET 1: MIT Intel Lab ---")
     try:
@@ -14,7 +16,7 @@ def audit_mit():
         
         # Time interval (Timestamp is formatted like 12:59:16 AM)
         # Date is 2/28/2004
-        dt = pd.to_datetime(df_normal['Date'] + ' ' + df_normal['Timestamp'])
+        dt = parse_mit_datetime(df_normal['Date'], df_normal['Timestamp'])
         diffs = dt.diff().dt.total_seconds().dropna()
         print("3. Time Interval (mode):", diffs.mode()[0], "seconds")
         
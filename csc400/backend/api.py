@@ -1,33 +1,85 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from typing import Dict, Optional
 import asyncio
+import functools
 import json
+import os
 import time
 import sqlite3
+import threading
 
 from backend.simulation.thermal_model import ThermalModel
-from backend.simulation.node import VirtualNode
+from backend.simulation.node import VirtualNode, step_nodes
 from backend.simulation.airflow import AirflowModel
 from backend.simulation.humidity import HumidityModel
 from backend.simulation.central_server import CentralServer
-from backend.ml.model_loader import ModelLoader
+from backend.simulation.clock import make_clock
+from backend.simulation.persistence import parse_policy
+from backend.simulation.broadcast import BroadcastHub
+from backend.simulation.frame_codec import EncodedFrame, FrameEncoder
+from backend.simulation.subscriptions import SubscriptionFilter
+from backend.ml.model_registry import get_model, registry
 from backend.simulation.database import (
     DB_PATH,
+    TelemetryWriter,
     create_profile,
-    get_anomaly_events,
+    anomaly_event_key,
     get_profiles,
-    get_telemetry_range,
+    get_telemetry_history,
     init_db,
-    insert_anomaly_event,
-    insert_telemetry,
+    iter_anomaly_events,
+    iter_telemetry_range,
+    telemetry_key,
 )
 
 init_db()
 
-app = FastAPI(title="E-Habitat API")
+# Simulation rows are written behind the websocket loop in batches
+telemetry_writer = TelemetryWriter()
+
+# One simulation task serves every viewer through the hub. TICK_SECONDS is
+# the simulated length of a step; EHAB_SIM_SPEED ("max" or a multiplier)
+# switches to a simulated clock so runs can go faster than real time
+TICK_SECONDS = float(os.environ.get("EHAB_TICK_SECONDS", "1.0"))
+clock = make_clock(os.environ.get("EHAB_SIM_SPEED"))
+hub = BroadcastHub(queue_size=int(os.environ.get("EHAB_VIEWER_QUEUE", "8")))
+# Anomaly persistence policy "k/n", shared by the nodes and the central server
+PERSISTENCE = parse_policy(os.environ.get("EHAB_PERSISTENCE"))
+frame_encoder = FrameEncoder()
+simulation_task: Optional[asyncio.Task] = None
+active_profile_id: Optional[int] = None
+
+# Ticks run on one dedicated thread so the event loop only awaits them and
+# keeps serving REST requests. sim_lock serialises a tick with the endpoints
+# that read or mutate nodes / central_server (sync endpoints run in FastAPI's
+# threadpool, so waiting on the lock never blocks the event loop).
+sim_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="simulation")
+sim_lock = threading.RLock()
+
+
+def with_sim_lock(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with sim_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if simulation_task is not None:
+        simulation_task.cancel()
+    # Commit whatever is still queued before the process exits
+    telemetry_writer.close()
+
+
+app = FastAPI(title="E-Habitat API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -42,7 +94,8 @@ def make_node(node_id: str, seed: int, initial_temp: float):
     thermal = ThermalModel(50.0, 1005.0, 500.0, 300.0, initial_temp, 20.0)
     airflow = AirflowModel(nominal_flow=2.5, random_seed=seed + 1000)
     humidity = HumidityModel(45.0, 0.01, 0.2, seed + 2000, reference_temp=21.0)
-    return VirtualNode(node_id, thermal, airflow, humidity, random_seed=seed + 3000)
+    return VirtualNode(node_id, thermal, airflow, humidity, random_seed=seed + 3000, clock=clock,
+                       persistence=PERSISTENCE)
 
 def reset_runtime_state():
     global nodes, central_server, _prev_edge_anomaly, _prev_central_detection, _step_seq
@@ -53,8 +106,7 @@ def reset_runtime_state():
     }
 
     try:
-        _central_model = ModelLoader()
-        central_server = CentralServer(_central_model)
+        central_server = CentralServer(get_model(), clock, PERSISTENCE)
     except Exception as e:
         print(f"[CentralServer] Failed to reload model during reset: {e}")
         central_server = None
@@ -71,10 +123,9 @@ nodes: Dict[str, VirtualNode] = {
     for node_id in NODE_SEEDS
 }
 
-# CentralServer — shared ModelLoader, separate from the per-node instances
+# CentralServer — same shared ModelLoader instance as the VirtualNodes
 try:
-    _central_model = ModelLoader()
-    central_server = CentralServer(_central_model)
+    central_server = CentralServer(get_model(), clock, PERSISTENCE)
 except Exception as e:
     print(f"[CentralServer] Failed to load model, central detection disabled: {e}")
     central_server = None
@@ -103,12 +154,18 @@ class ProfileCreateRequest(BaseModel):
 
 def reload_models() -> tuple[bool, str | None]:
     try:
-        for node in nodes.values():
-            node.anomaly_model = ModelLoader()
+        # Load once, then hot swap the shared instance into every consumer
+        model = registry.reload()
+        with sim_lock:
+            for node in nodes.values():
+                node.anomaly_model = model
+            if central_server is not None:
+                central_server.model = model
         return True, None
     except Exception as e:
-        for node in nodes.values():
-            node.anomaly_model = None
+        with sim_lock:
+            for node in nodes.values():
+                node.anomaly_model = None
         return False, str(e)
 
 
@@ -128,7 +185,7 @@ def ml_status():
         "model_load_error": None if model is not None else "Model not loaded",
         "window_size": extractor.window_size,
         "window_ready": extractor.is_window_ready(),
-        "points_in_window": len(extractor.window),
+        "points_in_window": len(extractor),
     }
 
 
@@ -139,6 +196,7 @@ def ml_reload():
 
 
 @app.post("/api/controls/airflow_obstruction")
+@with_sim_lock
 def set_airflow_obstruction(body: AirflowObstructionRequest):
     if body.node_id not in nodes:
         return {"ok": False, "error": f"Unknown node: {body.node_id}"}
@@ -150,6 +208,7 @@ def set_airflow_obstruction(body: AirflowObstructionRequest):
 
 
 @app.post("/api/controls/fan_failure")
+@with_sim_lock
 def fan_failure(body: NodeTargetRequest):
     if body.node_id not in nodes:
         return {"ok": False, "error": f"Unknown node: {body.node_id}"}
@@ -158,7 +217,7 @@ def fan_failure(body: NodeTargetRequest):
     node.inject_hvac_failure(duration_seconds=40)
 
     if central_server is not None:
-        central_server.record_injection(body.node_id, time.time())
+        central_server.record_injection(body.node_id, clock.now())
 
     _prev_edge_anomaly[body.node_id] = False
     _prev_central_detection[body.node_id] = False
@@ -167,6 +226,7 @@ def fan_failure(body: NodeTargetRequest):
 
 
 @app.post("/api/controls/reset_airflow")
+@with_sim_lock
 def reset_airflow(body: NodeTargetRequest):
     if body.node_id not in nodes:
         return {"ok": False, "error": f"Unknown node: {body.node_id}"}
@@ -178,6 +238,7 @@ def reset_airflow(body: NodeTargetRequest):
 
 
 @app.post("/api/controls/set_humidity")
+@with_sim_lock
 def set_humidity(body: HumiditySetRequest):
     if body.node_id not in nodes:
         return {"ok": False, "error": f"Unknown node: {body.node_id}"}
@@ -207,6 +268,7 @@ def add_profile(body: ProfileCreateRequest):
 
 
 @app.get("/central/status")
+@with_sim_lock
 def central_status():
     if central_server is None:
         return {"ok": False, "error": "Central server not available"}
@@ -251,10 +313,64 @@ def get_anomaly_summary(profile_id: Optional[int] = None):
         return {"ok": False, "error": str(e)}
 
 
+@app.get("/db/writer/status")
+def writer_status():
+    return {"ok": True, "writer": telemetry_writer.metrics()}
+
+
+def parse_cursor(raw: Optional[str]) -> Optional[tuple[float, int]]:
+    """Decodes a "<sort value>,<row id>" page cursor; raises ValueError if malformed."""
+    if raw is None:
+        return None
+    value, _, row_id = raw.partition(",")
+    return float(value), int(row_id)
+
+
+def format_cursor(key: tuple[float, int]) -> str:
+    return f"{key[0]!r},{key[1]}"
+
+
+def ndjson_response(rows) -> StreamingResponse:
+    """Streams rows as newline-delimited JSON while the DB cursor produces them."""
+    return StreamingResponse(
+        (json.dumps(row) + "\n" for row in rows),
+        media_type="application/x-ndjson",
+    )
+
+
+def bad_request(error: str) -> JSONResponse:
+    return JSONResponse(status_code=400, content={"ok": False, "error": error})
+
+
+def page_response(key: str, rows: list, limit: Optional[int], row_key) -> dict:
+    """JSON page; next_cursor is set when the page is full and more rows may follow."""
+    next_cursor = None
+    if limit is not None and len(rows) == limit:
+        next_cursor = format_cursor(row_key(rows[-1]))
+    return {"ok": True, key: rows, "next_cursor": next_cursor}
+
+
 @app.get("/db/history/events")
-def history_events(profile_id: Optional[int] = None):
-    events = get_anomaly_events(profile_id=profile_id)
-    return {"ok": True, "events": events}
+def history_events(
+    profile_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    format: str = "json",
+):
+    try:
+        after = parse_cursor(cursor)
+    except ValueError:
+        return bad_request("Invalid cursor")
+    if limit is not None and limit < 1:
+        return bad_request("limit must be positive")
+
+    events = iter_anomaly_events(profile_id=profile_id, after=after, limit=limit)
+    if format == "ndjson":
+        return ndjson_response(events)
+    try:
+        return page_response("events", list(events), limit, anomaly_event_key)
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
 
 
 @app.get("/db/history/telemetry")
@@ -263,106 +379,279 @@ def history_telemetry(
     start: Optional[float] = None,
     end: Optional[float] = None,
     profile_id: Optional[int] = None,
+    max_points: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    format: str = "json",
 ):
     if node_id is None or start is None or end is None:
         return JSONResponse(
             status_code=400,
             content={"ok": False, "error": "node_id, start, and end are required"},
         )
-    rows = get_telemetry_range(node_id, start, end, profile_id=profile_id)
-    return {"ok": True, "rows": rows}
+    try:
+        after = parse_cursor(cursor)
+    except ValueError:
+        return bad_request("Invalid cursor")
+    if limit is not None and limit < 1:
+        return bad_request("limit must be positive")
+    if max_points is not None and max_points < 1:
+        return bad_request("max_points must be positive")
+
+    # Raw rows stream (format=ndjson) or page (cursor/limit) in (timestamp, id)
+    # order. With max_points, long ranges are served from the 10s/1m/1h rollups,
+    # merged further when even hourly buckets would exceed max_points.
+    if format == "ndjson":
+        return ndjson_response(
+            iter_telemetry_range(node_id, start, end, profile_id=profile_id, after=after, limit=limit)
+        )
+    if after is not None or limit is not None:
+        try:
+            rows = list(iter_telemetry_range(
+                node_id, start, end, profile_id=profile_id, after=after, limit=limit
+            ))
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+        return {**page_response("rows", rows, limit, telemetry_key), "resolution": 0}
+
+    resolution, rows = get_telemetry_history(
+        node_id, start, end, profile_id=profile_id, max_points=max_points
+    )
+    return {"ok": True, "rows": rows, "resolution": resolution}
+
+
+def run_tick(profile_id: Optional[int]) -> tuple[dict, str]:
+    """
+    Advances the simulation by one step and records it. Callers hold sim_lock.
+
+    Steps every node, queues telemetry and central anomaly events for the DB
+    writer and feeds the central server. Returns the frame sent to viewers and
+    its JSON text, built from the per-node JSON that also sizes bytes_edge.
+    """
+    frame = {}
+    node_texts = []
+    central_batch = []
+    now = clock.advance(TICK_SECONDS)
+
+    # Step every node; all ready edge windows are scored in one call
+    node_items = list(nodes.items())
+    stepped = step_nodes(node_inst for _, node_inst in node_items)
+
+    for (node_id, node_inst), telemetry in zip(node_items, stepped):
+        telemetry["node_id"] = node_id
+        telemetry["timestamp"] = now
+        telemetry["obstruction_ratio"] = node_inst.airflow_model.obstruction_ratio
+        if telemetry.get("anomaly_score") is None:
+            telemetry["anomaly_score"] = None
+        frame[node_id] = telemetry
+        # Identical to json.dumps(frame) once joined; serialised only once
+        telemetry_json = json.dumps(telemetry)
+        node_texts.append(f"{json.dumps(node_id)}: {telemetry_json}")
+
+        # Increment sequence
+        _step_seq[node_id] += 1
+
+        # DB Insert: Telemetry (queued, written in batches)
+        telemetry_writer.submit_telemetry({
+            "seq_id": _step_seq[node_id],
+            "node_id": node_id,
+            "timestamp": telemetry["timestamp"],
+            "temperature": telemetry.get("temperature"),
+            "humidity": telemetry.get("humidity"),
+            "airflow": telemetry.get("airflow"),
+            "cpu_load": telemetry.get("cpu_load"),
+            "is_anomaly": 1 if telemetry.get("is_anomaly") else 0,
+            "anomaly_score": telemetry.get("anomaly_score"),
+            "profile_id": profile_id,
+        })
+
+        # Detect edge False→True transition — edge_ts passed to central server
+        curr_anomaly: bool = telemetry.get("is_anomaly", False)
+        edge_ts = None
+        if curr_anomaly and not _prev_edge_anomaly[node_id]:
+            edge_ts = now
+        _prev_edge_anomaly[node_id] = curr_anomaly
+
+        # Queue raw telemetry (no anomaly fields) for the central server
+        if central_server is not None:
+            central_batch.append({
+                "node_id": node_id,
+                "raw_telemetry": {
+                    k: telemetry[k]
+                    for k in ("temperature", "humidity", "airflow", "cpu_load")
+                },
+                "seq_id": _step_seq[node_id],
+                "edge_detection_ts": edge_ts,
+                "bytes_edge": len(telemetry_json.encode()),
+            })
+
+    # Feed central server with the whole tick; ready windows scored in one call
+    if central_server is not None:
+        central_server.receive_telemetry_batch(central_batch)
+        c_statuses = central_server.get_status()
+
+        for item in central_batch:
+            node_id = item["node_id"]
+
+            # DB Insert: Central Anomaly Event check
+            c_status = c_statuses.get(node_id, {})
+            c_det_ts = c_status.get("central_detection_ts")
+            if c_det_ts and not _prev_central_detection[node_id]:
+                injection_ts = central_server._records[node_id].get("injection_ts")
+                telemetry_writer.submit_anomaly_event({
+                    "seq_id": _step_seq[node_id],
+                    "node_id": node_id,
+                    "injection_timestamp": injection_ts,
+                    "edge_detection_ts": c_status.get("edge_detection_ts"),
+                    "central_detection_ts": c_det_ts,
+                    "edge_latency_ms": c_status.get("edge_latency_ms"),
+                    "central_latency_ms": c_status.get("central_latency_ms"),
+                    "detection_source": "central",
+                    "bytes_edge": c_status.get("bytes_edge"),
+                    "bytes_central": c_status.get("bytes_central"),
+                    "profile_id": profile_id,
+                })
+                _prev_central_detection[node_id] = True
+            elif not c_det_ts:
+                _prev_central_detection[node_id] = False
+
+    return frame, "{" + ", ".join(node_texts) + "}"
+
+
+def tick_and_encode(profile_id: Optional[int]) -> EncodedFrame:
+    """Runs one tick under sim_lock and encodes the frame (executor thread)."""
+    with sim_lock:
+        frame, text = run_tick(profile_id)
+    return frame_encoder.encode(frame, text)
+
+
+async def simulation_loop():
+    """
+    The single simulation loop: ticks every TICK_SECONDS of clock time (real
+    time scaled by the clock's speed) while at least one viewer is
+    subscribed, publishing each frame to the hub. Frames are encoded once per
+    tick and format regardless of the number of viewers. If a tick fails, the
+    loop stops and ends every subscription so the viewers' sockets are closed.
+    """
+    global simulation_task
+    loop = asyncio.get_running_loop()
+    try:
+        while hub.subscriber_count > 0:
+            started = time.monotonic()
+            encoded = await loop.run_in_executor(sim_executor, tick_and_encode, active_profile_id)
+            hub.publish(encoded)
+            # Sleeps 0 at unlimited speed, which still yields to other tasks
+            wait = clock.wall_seconds(TICK_SECONDS) - (time.monotonic() - started)
+            await asyncio.sleep(max(0.0, wait))
+    except Exception as e:
+        print(f"[SIM] Error: {e}")
+        hub.close()
+    finally:
+        simulation_task = None
+
+
+def ensure_simulation_running():
+    global simulation_task
+    if simulation_task is None:
+        simulation_task = asyncio.create_task(simulation_loop())
+
+
+@app.get("/simulation/status")
+def simulation_status():
+    return {
+        "ok": True,
+        "running": simulation_task is not None,
+        "tick_seconds": TICK_SECONDS,
+        "clock": clock.describe(),
+        "persistence": {"k": PERSISTENCE[0], "n": PERSISTENCE[1]},
+        "profile_id": active_profile_id,
+        **hub.stats(),
+    }
 
 
 @app.websocket("/ws/simulation")
 async def websocket_simulation(websocket: WebSocket):
+    global active_profile_id
     await websocket.accept()
 
+    # The simulation is shared, so the most recent viewer that names a
+    # profile decides which profile new rows are recorded under
     profile_id_raw = websocket.query_params.get("profile_id")
+    if profile_id_raw is not None:
+        try:
+            active_profile_id = int(profile_id_raw)
+        except ValueError:
+            pass
+
+    # encoding=binary selects the EHF1 float32 frames (frame_codec.py); with
+    # delta=1 a frame only carries the cells changed since the previous tick,
+    # falling back to a keyframe whenever this viewer missed a frame
+    binary = websocket.query_params.get("encoding") == "binary"
+    use_delta = websocket.query_params.get("delta") in ("1", "true")
+    last_sent = None  # (seq, filter version) of the last frame sent
+
+    # nodes / fields / every / on_change narrow what this viewer receives
+    # (subscriptions.py); JSON control messages can change them later
     try:
-        profile_id = int(profile_id_raw) if profile_id_raw is not None else None
-    except ValueError:
-        profile_id = None
-
+        view = SubscriptionFilter.from_params(websocket.query_params)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+
+    async def read_controls():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is None:
+                    print("[WS] Ignoring binary control message")
+                    continue
+                try:
+                    view.update(json.loads(message["text"]))
+                except (ValueError, TypeError, AttributeError) as e:
+                    print(f"[WS] Ignoring invalid control message: {e}")
+        except Exception as e:
+            print(f"[WS] Control reader stopped: {e}")
+        finally:
+            # Wake the send loop, which may be skipping frames (every / on_change)
+            subscription.put(None)
+
+    subscription = hub.subscribe()
+    ensure_simulation_running()
+    controls = asyncio.create_task(read_controls())
     try:
         while True:
-            frame = {}
-            for node_id, node_inst in nodes.items():
-                telemetry = node_inst.step()
-                telemetry["node_id"] = node_id
-                telemetry["timestamp"] = time.time()
-                telemetry["obstruction_ratio"] = node_inst.airflow_model.obstruction_ratio
-                if telemetry.get("anomaly_score") is None:
-                    telemetry["anomaly_score"] = None
-                frame[node_id] = telemetry
-
-                # Increment sequence
-                _step_seq[node_id] += 1
-
-                # DB Insert: Telemetry
-                insert_telemetry({
-                    "seq_id": _step_seq[node_id],
-                    "node_id": node_id,
-                    "timestamp": telemetry["timestamp"],
-                    "temperature": telemetry.get("temperature"),
-                    "humidity": telemetry.get("humidity"),
-                    "airflow": telemetry.get("airflow"),
-                    "cpu_load": telemetry.get("cpu_load"),
-                    "is_anomaly": 1 if telemetry.get("is_anomaly") else 0,
-                    "anomaly_score": telemetry.get("anomaly_score"),
-                    "profile_id": profile_id,
-                })
-
-                # Detect edge False→True transition — edge_ts passed to central server
-                curr_anomaly: bool = telemetry.get("is_anomaly", False)
-                edge_ts = None
-                if curr_anomaly and not _prev_edge_anomaly[node_id]:
-                    edge_ts = time.time()
-                _prev_edge_anomaly[node_id] = curr_anomaly
-
-                # Feed central server with raw telemetry (no anomaly fields)
-                if central_server is not None:
-                    raw_telemetry = {
-                        k: telemetry[k]
-                        for k in ("temperature", "humidity", "airflow", "cpu_load")
-                    }
-                    central_server.receive_telemetry(
-                        node_id, raw_telemetry, _step_seq[node_id], edge_ts,
-                        bytes_edge=len(json.dumps(telemetry).encode()),
-                    )
-
-                    # DB Insert: Central Anomaly Event check
-                    c_status = central_server.get_status().get(node_id, {})
-                    c_det_ts = c_status.get("central_detection_ts")
-                    if c_det_ts and not _prev_central_detection[node_id]:
-                        injection_ts = central_server._records[node_id].get("injection_ts")
-                        insert_anomaly_event({
-                            "seq_id": _step_seq[node_id],
-                            "node_id": node_id,
-                            "injection_timestamp": injection_ts,
-                            "edge_detection_ts": c_status.get("edge_detection_ts"),
-                            "central_detection_ts": c_det_ts,
-                            "edge_latency_ms": c_status.get("edge_latency_ms"),
-                            "central_latency_ms": c_status.get("central_latency_ms"),
-                            "detection_source": "central",
-                            "bytes_edge": c_status.get("bytes_edge"),
-                            "bytes_central": c_status.get("bytes_central"),
-                            "profile_id": profile_id,
-                        })
-                        _prev_central_detection[node_id] = True
-                    elif not c_det_ts:
-                        _prev_central_detection[node_id] = False
-
-            await websocket.send_json(frame)
-            await asyncio.sleep(1)
+            encoded = await subscription.get()
+            if encoded is None:
+                # From read_controls when the client left, else from the hub
+                # when the simulation loop stopped on an error
+                if controls.done():
+                    print("[WS] Client disconnected")
+                else:
+                    await websocket.close(code=1011)
+                break
+            if not view.wants(encoded):
+                continue
+            if binary:
+                follows = last_sent == (encoded.seq - 1, view.version)
+                await websocket.send_bytes(view.binary(encoded, use_delta and follows))
+                last_sent = (encoded.seq, view.version)
+            else:
+                await websocket.send_text(view.text(encoded))
     except WebSocketDisconnect:
         print("[WS] Client disconnected")
     except Exception as e:
         print(f"[WS] Error: {e}")
         await websocket.close()
+    finally:
+        controls.cancel()
+        hub.unsubscribe(subscription)
 
 
 @app.post("/simulation/inject")
-async def inject_scenario(node_id: str, scenario: str):
+@with_sim_lock
+def inject_scenario(node_id: str, scenario: str):
     if node_id not in nodes:
         return {"error": f"Unknown node: {node_id}"}
     node_inst = nodes[node_id]
@@ -372,7 +661,7 @@ async def inject_scenario(node_id: str, scenario: str):
         # Profiled 2026-03-27 — backend/tests/test_hvac_ramp_feasibility.py
         node_inst.inject_hvac_failure(duration_seconds=40)
         if central_server is not None:
-            central_server.record_injection(node_id, time.time())
+            central_server.record_injection(node_id, clock.now())
 
         _prev_edge_anomaly[node_id] = False
         _prev_central_detection[node_id] = False
@@ -381,7 +670,7 @@ async def inject_scenario(node_id: str, scenario: str):
     if scenario == "thermal_spike":
         node_inst.inject_thermal_spike(duration_seconds=30)
         if central_server is not None:
-            central_server.record_injection(node_id, time.time())
+            central_server.record_injection(node_id, clock.now())
 
         _prev_edge_anomaly[node_id] = False
         _prev_central_detection[node_id] = False
@@ -390,7 +679,7 @@ async def inject_scenario(node_id: str, scenario: str):
     if scenario == "coolant_leak":
         node_inst.inject_coolant_leak()
         if central_server is not None:
-            central_server.record_injection(node_id, time.time())
+            central_server.record_injection(node_id, clock.now())
 
         _prev_edge_anomaly[node_id] = False
         _prev_central_detection[node_id] = False
@@ -403,6 +692,7 @@ async def inject_scenario(node_id: str, scenario: str):
     return {"error": f"Unknown scenario: {scenario}"}
 
 @app.post("/api/runtime/reset")
+@with_sim_lock
 def reset_runtime():
     reset_runtime_state()
     return {"ok": True}
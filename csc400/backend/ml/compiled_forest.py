@@ -0,0 +1,268 @@
+"""
+Flat-array export and pure-NumPy scoring for a fitted IsolationForest.
+
+CompiledForest copies every tree of the forest into a handful of concatenated
+arrays (split feature, threshold, children, and the path-length value of each
+leaf) and scores rows for all trees at once, one tree level per NumPy pass.
+Scores are bit-identical to `model.decision_function(scaler.transform(X))`.
+
+The scaler is kept as an explicit (X - center) / scale step rather than being
+folded into the split thresholds: IsolationForest casts its input to float32
+before comparing against the float64 thresholds, so moving the affine transform
+into the thresholds changes which side of a split some rows fall on.
+
+Compiling reads IsolationForest internals (_decision_path_lengths,
+_average_path_length_per_tree, _max_samples, _iforest._average_path_length),
+so it is tied to the scikit-learn version pinned in requirements.txt;
+from_sklearn() raises if they are missing and test_compiled_forest.py checks
+score parity on synthetic forests, so an upgrade that changes them fails
+loudly instead of scoring differently.
+
+A compiled forest can be saved to a single .npz file and loaded back without
+scikit-learn or joblib, e.g. on edge nodes:
+
+    python -m backend.ml.compiled_forest models/model_v2_hybrid_real.npz
+"""
+import argparse
+import numpy as np
+
+
+class CompiledForest:
+    """An IsolationForest flattened into contiguous NumPy arrays."""
+
+    _ARRAYS = (
+        "feature", "threshold", "left", "right", "missing_left",
+        "leaf_value", "roots", "center", "scale",
+    )
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        missing_left: np.ndarray,
+        leaf_value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        denominator: float,
+        offset: float,
+        center: np.ndarray | None = None,
+        scale: np.ndarray | None = None,
+    ):
+        """
+        Args:
+            feature: Input column tested at each node (global node index).
+            threshold: Split threshold at each node; rows with x <= threshold go left.
+            left, right: Global index of each node's children. Leaves point to
+                         themselves so that extra passes keep rows in place.
+            missing_left: Whether a NaN input goes to the left child at each node.
+            leaf_value: Path length contributed by each leaf
+                        (depth + average path length correction - 1).
+            roots: Global index of the root node of each tree, in tree order.
+            max_depth: Number of passes needed to reach a leaf in every tree.
+            denominator: n_trees * average path length of max_samples.
+            offset: The forest's offset_, subtracted in decision_function().
+            center, scale: Scaler parameters applied before scoring, or None.
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.denominator = float(denominator)
+        self.offset = float(offset)
+        self.center = center
+        self.scale = scale
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model, scaler=None) -> "CompiledForest":
+        """
+        Flattens a fitted sklearn IsolationForest (and optional RobustScaler or
+        StandardScaler) into a CompiledForest.
+
+        Raises:
+            ValueError: If the scaler is of any other type.
+            RuntimeError: If the installed scikit-learn lacks the
+                          IsolationForest internals this relies on.
+        """
+        try:
+            from sklearn.ensemble._iforest import _average_path_length
+        except ImportError as e:
+            raise RuntimeError(f"Unsupported scikit-learn version for CompiledForest: {e}")
+        missing_attrs = [
+            name for name in ("_decision_path_lengths", "_average_path_length_per_tree", "_max_samples")
+            if not hasattr(model, name)
+        ]
+        if missing_attrs:
+            raise RuntimeError(
+                f"Unsupported scikit-learn version for CompiledForest: IsolationForest has no "
+                f"{', '.join(missing_attrs)} (see the version pinned in requirements.txt)"
+            )
+        center, scale = _scaler_params(scaler)
+
+        n_features = model.n_features_in_
+        subsample = model._max_features != n_features
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        base = 0
+        for i, (estimator, tree_features) in enumerate(zip(model.estimators_, model.estimators_features_)):
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == -1
+            local = np.arange(n_nodes)
+
+            # Map the tree's (possibly subsampled) feature index back to the input column
+            feature = np.where(is_leaf, 0, tree.feature)
+            if subsample:
+                feature = np.asarray(tree_features)[feature]
+
+            path_lengths = model._decision_path_lengths[i]
+            avg_lengths = model._average_path_length_per_tree[i]
+
+            features.append(feature)
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(base + np.where(is_leaf, local, tree.children_left))
+            rights.append(base + np.where(is_leaf, local, tree.children_right))
+            missing.append(
+                np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n_nodes)), dtype=bool)
+            )
+            # Same expression and evaluation order as IsolationForest
+            values.append(path_lengths + avg_lengths - 1.0)
+            roots.append(base)
+            base += n_nodes
+
+        denominator = len(model.estimators_) * _average_path_length([model._max_samples])[0]
+
+        return cls(
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            left=np.concatenate(lefts).astype(np.intp),
+            right=np.concatenate(rights).astype(np.intp),
+            missing_left=np.concatenate(missing),
+            leaf_value=np.concatenate(values).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max(e.tree_.max_depth for e in model.estimators_),
+            denominator=denominator,
+            offset=model.offset_,
+            center=None if center is None else np.asarray(center, dtype=np.float64),
+            scale=None if scale is None else np.asarray(scale, dtype=np.float64),
+        )
+
+    def save(self, path: str):
+        """Writes the compiled forest to a single .npz file."""
+        arrays = {name: getattr(self, name) for name in self._ARRAYS if getattr(self, name) is not None}
+        np.savez(
+            path,
+            max_depth=self.max_depth,
+            denominator=self.denominator,
+            offset=self.offset,
+            **arrays,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledForest":
+        """Loads a forest written by save(); needs only NumPy."""
+        with np.load(path) as data:
+            arrays = {name: data[name] if name in data else None for name in cls._ARRAYS}
+            return cls(
+                max_depth=int(data["max_depth"]),
+                denominator=float(data["denominator"]),
+                offset=float(data["offset"]),
+                **arrays,
+            )
+
+    def _transform(self, X: np.ndarray) -> np.ndarray:
+        """Applies the scaler and the float32 cast that IsolationForest applies."""
+        X = np.array(X, dtype=np.float64, ndmin=2)
+        if self.center is not None:
+            X -= self.center
+        if self.scale is not None:
+            X /= self.scale
+        return X.astype(np.float32)
+
+    def _depths(self, X: np.ndarray) -> np.ndarray:
+        """Sum of leaf path lengths over all trees for each row of float32 X."""
+        n_rows = len(X)
+        rows = np.arange(n_rows)[:, None]
+        nodes = np.broadcast_to(self.roots, (n_rows, self.n_trees)).copy()
+
+        for _ in range(self.max_depth):
+            x = X[rows, self.feature[nodes]]
+            go_left = x <= self.threshold[nodes]
+            nan = np.isnan(x)
+            if nan.any():
+                go_left = np.where(nan, self.missing_left[nodes], go_left)
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        leaf_values = self.leaf_value[nodes]
+        # Accumulate tree by tree to match sklearn's summation order exactly
+        depths = np.zeros(n_rows)
+        for column in leaf_values.T:
+            depths += column
+        return depths
+
+    def score_samples(self, X, chunk_size: int = 4096) -> np.ndarray:
+        """
+        Equivalent of IsolationForest.score_samples on unscaled rows
+        (the scaler, if any, is applied here).
+        """
+        X = self._transform(X)
+        depths = np.empty(len(X))
+        for start in range(0, len(X), chunk_size):
+            depths[start:start + chunk_size] = self._depths(X[start:start + chunk_size])
+
+        if self.denominator == 0:
+            # Single-sample forest: sklearn defines the normalised depth as 1
+            return np.full_like(depths, -0.5)
+        return -(2 ** -(depths / self.denominator))
+
+    def decision_function(self, X, chunk_size: int = 4096) -> np.ndarray:
+        """Equivalent of IsolationForest.decision_function(scaler.transform(X))."""
+        return self.score_samples(X, chunk_size) - self.offset
+
+
+def _scaler_params(scaler) -> tuple:
+    """(center, scale) that scaler.transform() applies, each None when skipped."""
+    if scaler is None:
+        return None, None
+    from sklearn.preprocessing import RobustScaler, StandardScaler
+
+    if isinstance(scaler, RobustScaler):
+        center = scaler.center_ if scaler.with_centering else None
+        scale = scaler.scale_ if scaler.with_scaling else None
+    elif isinstance(scaler, StandardScaler):
+        # mean_ is set even with with_mean=False, but transform() ignores it
+        center = scaler.mean_ if scaler.with_mean else None
+        scale = scaler.scale_ if scaler.with_std else None
+    else:
+        raise ValueError(
+            f"CompiledForest supports RobustScaler or StandardScaler, got {type(scaler).__name__}"
+        )
+    return center, scale
+
+
+def main():
+    from backend.ml.model_loader import ModelLoader
+
+    parser = argparse.ArgumentParser(description="Export the anomaly model as a compiled .npz forest.")
+    parser.add_argument("output", help="Path of the .npz file to write")
+    parser.add_argument("--model", default=ModelLoader.DEFAULT_MODEL_PATH)
+    parser.add_argument("--scaler", default=ModelLoader.DEFAULT_SCALER_PATH)
+    args = parser.parse_args()
+
+    loader = ModelLoader(args.model, args.scaler)
+    compiled = CompiledForest.from_sklearn(loader.model, loader.scaler)
+    compiled.save(args.output)
+    print(f"Wrote {compiled.n_trees} trees ({len(compiled.feature)} nodes) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Loaders for the raw MIT Intel Lab CSVs.
+
+datasets/MIT_dataset.csv has a couple of million rows. Reading it with
+pd.read_csv's inferred dtypes (float64 everywhere, Python strings for the
+date and time columns) and then parsing Date + ' ' + Timestamp with format
+inference costs several GB and most of the runtime of every script that
+touches it. read_mit() instead:
+
+  * reads in chunks with explicit dtypes: float32 measurements, a nullable
+    Int32 epoch, categorical Date / Timestamp strings and a categorical mote
+    id with integer categories (so sorting and groupby follow the numeric id);
+  * parses timestamps with explicit formats, once per distinct Date and
+    Timestamp value rather than once per row;
+  * caches the typed frame in the feature store as .npy arrays (codes and
+    categories for the categorical columns), keyed by the CSV's contents, so
+    later runs load it memory-mapped instead of re-parsing the CSV.
+
+The validation subset (data/real/mit_anomaly_validation.csv) has the same
+schema and must be read with the same function: the threshold analysis joins
+the two on their raw columns, which only matches when both sides carry the
+same dtypes.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backend.ml.feature_store import FeatureStore, default_store
+
+MIT_PATH = "datasets/MIT_dataset.csv"
+
+MIT_COLUMNS = ("Date", "Timestamp", "Epoch", "Moteid", "Temp (C)", "Humidity", "Light", "Voltage")
+
+# Moteid is read as float32 (it has missing values) and turned into a
+# categorical with integer categories once all chunks are in
+MIT_DTYPES = {
+    "Date": "category",
+    "Timestamp": "category",
+    "Epoch": "Int32",
+    "Moteid": "float32",
+    "Temp (C)": "float32",
+    "Humidity": "float32",
+    "Light": "float32",
+    "Voltage": "float32",
+}
+
+# e.g. "2/28/2004" and "8:02:17 AM"
+DATE_FORMAT = "%m/%d/%Y"
+TIME_FORMAT = "%I:%M:%S %p"
+
+LOADER_VERSION = 1
+
+
+def parse_mit_datetime(date: pd.Series, timestamp: pd.Series) -> pd.Series:
+    """
+    Combines the Date and Timestamp columns into datetime64 values. Each
+    distinct date and time string is parsed once; unparseable values give NaT.
+    """
+    date = date.astype("category")
+    timestamp = timestamp.astype("category")
+    days = pd.to_datetime(date.cat.categories, format=DATE_FORMAT, errors="coerce")
+    times = pd.to_datetime(timestamp.cat.categories, format=TIME_FORMAT, errors="coerce")
+    offsets = times - times.normalize()
+
+    day_codes = date.cat.codes.to_numpy()
+    time_codes = timestamp.cat.codes.to_numpy()
+    day_values = np.append(days.to_numpy(dtype="datetime64[ns]"), np.datetime64("NaT", "ns"))
+    offset_values = np.append(offsets.to_numpy(dtype="timedelta64[ns]"), np.timedelta64("NaT", "ns"))
+    # Code -1 (missing) indexes the trailing NaT
+    return pd.Series(day_values[day_codes] + offset_values[time_codes], index=date.index, name="Datetime")
+
+
+def _mote_categorical(moteid: np.ndarray) -> pd.Categorical:
+    """Float mote ids (NaN = missing) as a categorical with sorted int32 categories."""
+    present = ~np.isnan(moteid)
+    categories = np.unique(moteid[present]).astype(np.int32)
+    codes = np.full(len(moteid), -1, dtype=np.int32)
+    codes[present] = np.searchsorted(categories, moteid[present].astype(np.int32))
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def _count_rows(path: str, nrows: Optional[int]) -> int:
+    """Upper bound on the data rows of a CSV: its line count, capped at nrows."""
+    lines = 1
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return lines if nrows is None else min(lines, nrows)
+
+
+def _sorted_categorical(codes: np.ndarray, categories: list) -> pd.Categorical:
+    """Codes into first-seen categories, re-coded against sorted categories."""
+    categories = pd.Index(categories)
+    order = categories.argsort()
+    remap = np.empty(len(order) + 1, dtype=np.int32)
+    remap[order] = np.arange(len(order), dtype=np.int32)
+    remap[-1] = -1
+    return pd.Categorical.from_codes(remap[codes], categories=categories[order])
+
+
+def _read_csv(path: str, columns: Sequence[str], dtypes: Dict[str, str], nrows: Optional[int],
+              chunksize: int) -> pd.DataFrame:
+    """
+    Parses the CSV chunk by chunk straight into arrays allocated once for the
+    whole file, so only one chunk is held besides the result. Categorical
+    columns collect their categories across chunks and are sorted at the
+    end, which makes the result independent of the chunk size.
+    """
+    capacity = _count_rows(path, nrows)
+    values: Dict[str, np.ndarray] = {}
+    masks: Dict[str, np.ndarray] = {}
+    categories: Dict[str, dict] = {}
+    for col in columns:
+        if dtypes[col] == "category":
+            values[col] = np.empty(capacity, dtype=np.int32)
+            categories[col] = {}
+        elif dtypes[col] == "Int32":
+            values[col] = np.empty(capacity, dtype=np.int32)
+            masks[col] = np.empty(capacity, dtype=bool)
+        else:
+            values[col] = np.empty(capacity, dtype=dtypes[col])
+
+    n = 0
+    for chunk in pd.read_csv(path, usecols=list(columns), dtype=dtypes, nrows=nrows, chunksize=chunksize):
+        end = n + len(chunk)
+        for col in columns:
+            series = chunk[col]
+            if col in categories:
+                seen = categories[col]
+                # Chunk codes -> codes into every category seen so far (-1 stays missing)
+                to_global = np.array(
+                    [seen.setdefault(c, len(seen)) for c in series.cat.categories] + [-1], dtype=np.int32
+                )
+                values[col][n:end] = to_global[series.cat.codes.to_numpy()]
+            elif col in masks:
+                values[col][n:end] = series.to_numpy(dtype=np.int32, na_value=0)
+                masks[col][n:end] = series.isna().to_numpy()
+            else:
+                values[col][n:end] = series.to_numpy()
+        n = end
+    if n == 0:
+        return pd.DataFrame({col: pd.Series(dtype=dtypes[col]) for col in columns})
+
+    frame = {}
+    for col in columns:
+        if col in categories:
+            frame[col] = _sorted_categorical(values[col][:n], list(categories[col]))
+        elif col in masks:
+            frame[col] = pd.arrays.IntegerArray(values[col][:n], masks[col][:n])
+        else:
+            frame[col] = values[col][:n]
+    del values, masks
+
+    df = pd.DataFrame(frame, copy=False)
+    if "Moteid" in df:
+        df["Moteid"] = _mote_categorical(df["Moteid"].to_numpy(dtype=np.float32))
+    if "Date" in df and "Timestamp" in df:
+        df["Datetime"] = parse_mit_datetime(df["Date"], df["Timestamp"])
+    return df
+
+
+def _to_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Frame columns as plain NumPy arrays for the feature store."""
+    arrays = {}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[f"{i}_codes"] = series.cat.codes.to_numpy()
+            categories = series.cat.categories
+            arrays[f"{i}_categories"] = (
+                categories.to_numpy(dtype=str) if categories.dtype.kind in "OUT" else categories.to_numpy()
+            )
+        elif isinstance(series.dtype, pd.Int32Dtype):
+            arrays[f"{i}_values"] = series.to_numpy(dtype=np.int32, na_value=0)
+            arrays[f"{i}_mask"] = series.isna().to_numpy()
+        else:
+            arrays[f"{i}"] = series.to_numpy()
+    return arrays
+
+
+def _from_arrays(arrays: Dict[str, np.ndarray], columns: Sequence[str]) -> pd.DataFrame:
+    frame = {}
+    for i, col in enumerate(columns):
+        if f"{i}_codes" in arrays:
+            frame[col] = pd.Categorical.from_codes(arrays[f"{i}_codes"], categories=arrays[f"{i}_categories"])
+        elif f"{i}_values" in arrays:
+            frame[col] = pd.arrays.IntegerArray(np.array(arrays[f"{i}_values"]), np.array(arrays[f"{i}_mask"]))
+        else:
+            frame[col] = arrays[f"{i}"]
+    return pd.DataFrame(frame)
+
+
+def read_mit(
+    path: str = MIT_PATH,
+    usecols: Optional[Sequence[str]] = None,
+    nrows: Optional[int] = None,
+    chunksize: int = 250_000,
+    store: Optional[FeatureStore] = None,
+    dtypes: Optional[Dict[str, str]] = None,
+) -> pd.DataFrame:
+    """
+    Reads an MIT Intel Lab CSV with compact dtypes (see MIT_DTYPES).
+
+    Rows keep their file order. When both Date and Timestamp are read, a
+    parsed Datetime column is added.
+
+    Args:
+        path: CSV with the MIT schema (the raw dataset or a subset of it).
+        usecols: Columns to read, defaulting to all of MIT_COLUMNS.
+        nrows: Read only the first nrows rows.
+        chunksize: Rows parsed per chunk.
+        store: Feature store for the typed frame; defaults to default_store().
+               A disabled store always re-reads the CSV.
+        dtypes: Per-column overrides of MIT_DTYPES, e.g. {"Temp (C)": "float64"}
+                where float32 rounding would change a result.
+    """
+    columns = [col for col in MIT_COLUMNS if usecols is None or col in usecols]
+    unknown = set(usecols or ()) - set(MIT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown MIT columns: {', '.join(sorted(unknown))}")
+
+    dtypes = {col: (dtypes or {}).get(col, MIT_DTYPES[col]) for col in columns}
+    store = store or default_store()
+    df = None
+
+    def compute():
+        nonlocal df
+        df = _read_csv(path, columns, dtypes, nrows, chunksize)
+        return _to_arrays(df)
+
+    params = {
+        "version": LOADER_VERSION,
+        "columns": columns,
+        "nrows": nrows,
+        "dtypes": dtypes,
+        "date_format": DATE_FORMAT,
+        "time_format": TIME_FORMAT,
+    }
+    arrays = store.get("mit_csv", [path], params, compute)
+    if df is not None:
+        return df
+    names = columns + (["Datetime"] if "Date" in columns and "Timestamp" in columns else [])
+    return _from_arrays(arrays, names)
@@ -1,22 +1,64 @@
-
 from collections import deque
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Column order expected by the batch functions; matches SlidingWindowFeatureExtractor.variables
+FEATURE_VARIABLES = ['temperature', 'airflow', 'humidity', 'cpu_load']
 
 class SlidingWindowFeatureExtractor:
     """
     Extracts features from a sliding window of telemetry data.
+
+    In the default mode the window keeps the raw telemetry dicts and every
+    extract_features() call recomputes the statistics from scratch.
+
+    In incremental mode the window is a fixed NumPy ring buffer with running sums
+    and sums of squares, so add_point() and extract_features() are O(1). The sums
+    are accumulated relative to an anchor value per variable (shifted data), and
+    the anchor is moved to the current window mean every `reanchor_interval`
+    points, recomputing the sums from the buffer. This bounds both floating-point
+    drift and the cancellation error of the one-pass variance formula.
     """
 
-    def __init__(self, window_size: int = 10):
+    def __init__(self, window_size: int = 10, incremental: bool = False, reanchor_interval: int | None = None):
         """
         Initializes the feature extractor with a given window size.
 
         Args:
             window_size: The number of data points to include in the sliding window.
+            incremental: If True, maintain running statistics over a ring buffer
+                         instead of recomputing them on every extraction.
+            reanchor_interval: Number of points between exact recomputations of the
+                               running sums (incremental mode only). Defaults to
+                               window_size, keeping the amortised cost O(1).
         """
         self.window_size = window_size
-        self.window = deque(maxlen=window_size)
-        self.variables = ['temperature', 'airflow', 'humidity', 'cpu_load']
+        self.variables = list(FEATURE_VARIABLES)
+        self.incremental = incremental
+
+        if not incremental:
+            self.window = deque(maxlen=window_size)
+            return
+
+        self.window = None
+        self.reanchor_interval = reanchor_interval or window_size
+        n_vars = len(self.variables)
+        self._buffer = np.zeros((window_size, n_vars))
+        self._head = 0                        # next slot to overwrite (oldest point when full)
+        self._count = 0
+        self._since_anchor = 0
+        self._anchor = np.zeros(n_vars)
+        self._sum = np.zeros(n_vars)          # sum of (x - anchor)
+        self._sumsq = np.zeros(n_vars)        # sum of (x - anchor)^2
+        self._row = np.zeros(n_vars)          # scratch buffers reused on every call
+        self._delta = np.zeros(n_vars)
+        self._features = np.zeros((n_vars, 3))
+
+    def __len__(self) -> int:
+        """Returns the number of data points currently in the window."""
+        if self.incremental:
+            return self._count
+        return len(self.window)
 
     def add_point(self, data: dict):
         """
@@ -25,7 +67,44 @@ class SlidingWindowFeatureExtractor:
         Args:
             data: A dictionary representing a single telemetry reading.
         """
-        self.window.append(data)
+        if not self.incremental:
+            self.window.append(data)
+            return
+
+        row = self._row
+        for i, var in enumerate(self.variables):
+            row[i] = data[var]
+
+        delta = self._delta
+        slot = self._buffer[self._head]
+        if self._count == self.window_size:
+            # Remove the point being overwritten from the running sums
+            np.subtract(slot, self._anchor, out=delta)
+            self._sum -= delta
+            np.multiply(delta, delta, out=delta)
+            self._sumsq -= delta
+        else:
+            self._count += 1
+
+        slot[:] = row
+        np.subtract(row, self._anchor, out=delta)
+        self._sum += delta
+        np.multiply(delta, delta, out=delta)
+        self._sumsq += delta
+
+        self._head = (self._head + 1) % self.window_size
+        self._since_anchor += 1
+        if self._since_anchor >= self.reanchor_interval:
+            self._reanchor()
+
+    def _reanchor(self):
+        """Moves the anchor to the current window mean and recomputes the sums exactly."""
+        values = self._buffer if self._count == self.window_size else self._buffer[:self._count]
+        self._anchor[:] = values.mean(axis=0)
+        shifted = values - self._anchor
+        self._sum[:] = shifted.sum(axis=0)
+        self._sumsq[:] = (shifted * shifted).sum(axis=0)
+        self._since_anchor = 0
 
     def is_window_ready(self) -> bool:
         """
@@ -34,7 +113,7 @@ class SlidingWindowFeatureExtractor:
         Returns:
             True if the window is full, False otherwise.
         """
-        return len(self.window) == self.window_size
+        return len(self) == self.window_size
 
     def extract_features(self) -> list[float]:
         """
@@ -44,21 +123,128 @@ class SlidingWindowFeatureExtractor:
             A list of floats representing the calculated features.
             The features are ordered as:
             [temp_mean, temp_var, temp_roc,
-             hum_mean, hum_var, hum_roc,
              air_mean, air_var, air_roc,
+             hum_mean, hum_var, hum_roc,
              cpu_mean, cpu_var, cpu_roc]
         """
         if not self.is_window_ready():
             raise ValueError("Window is not ready for feature extraction.")
 
+        if self.incremental:
+            return self._extract_incremental()
+
         features = []
         for var in self.variables:
             values = [point[var] for point in self.window]
-            
+
             mean = np.mean(values)
             variance = np.var(values)
             rate_of_change = values[-1] - values[0]
-            
+
             features.extend([mean, variance, rate_of_change])
-            
+
+        return features
+
+    def _extract_incremental(self) -> list[float]:
+        """O(1) feature extraction from the running sums (incremental mode)."""
+        out = self._features
+        shifted_mean = out[:, 0]
+        np.divide(self._sum, self.window_size, out=shifted_mean)
+
+        variance = out[:, 1]
+        np.divide(self._sumsq, self.window_size, out=variance)
+        np.multiply(shifted_mean, shifted_mean, out=self._delta)
+        variance -= self._delta
+        np.maximum(variance, 0.0, out=variance)
+
+        shifted_mean += self._anchor
+
+        # Full window: the oldest point sits in the next slot to overwrite
+        newest = self._buffer[self._head - 1]
+        oldest = self._buffer[self._head]
+        np.subtract(newest, oldest, out=out[:, 2])
+
+        return out.ravel().tolist()
+
+
+def extract_features_batch(values, window_size: int = 10, chunk_size: int = 65536) -> np.ndarray:
+    """
+    Computes the sliding-window features for every full window of a telemetry array.
+
+    Produces exactly the rows that feeding `values` point by point through a
+    SlidingWindowFeatureExtractor would produce, in the same order and with the
+    same floating-point results. Windows are materialised chunk by chunk from a
+    strided view, so peak memory is bounded by chunk_size rather than len(values).
+
+    Args:
+        values: Array of shape (n_points, 4) with columns in FEATURE_VARIABLES order
+                (temperature, airflow, humidity, cpu_load).
+        window_size: The number of data points in each window.
+        chunk_size: Number of windows evaluated per vectorized pass.
+
+    Returns:
+        Array of shape (max(n_points - window_size + 1, 0), 12) with the features
+        ordered as in SlidingWindowFeatureExtractor.extract_features().
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim != 2 or values.shape[1] != len(FEATURE_VARIABLES):
+        raise ValueError(f"Expected an array of shape (n, {len(FEATURE_VARIABLES)}).")
+
+    n_vars = values.shape[1]
+    n_windows = max(len(values) - window_size + 1, 0)
+    features = np.empty((n_windows, n_vars * 3))
+    if n_windows == 0:
         return features
+
+    # Shape (n_windows, n_vars, window_size); a view, no copy
+    windows = sliding_window_view(values, window_size, axis=0)
+    for start in range(0, n_windows, chunk_size):
+        end = min(start + chunk_size, n_windows)
+        # Contiguous copy so each reduction runs over one window in the same
+        # summation order as np.mean / np.var on a single window
+        chunk = np.ascontiguousarray(windows[start:end])
+        out = features[start:end]
+        out[:, 0::3] = chunk.mean(axis=-1)
+        out[:, 1::3] = chunk.var(axis=-1)
+        out[:, 2::3] = values[start + window_size - 1:end + window_size - 1] - values[start:end]
+
+    return features
+
+
+def extract_features_grouped(values, group_ids, window_size: int = 10, chunk_size: int = 65536):
+    """
+    Computes sliding-window features independently for each group (node / mote).
+
+    Equivalent to `for _, group in df.groupby(key)` with a fresh extractor per
+    group: groups are visited in sorted key order, rows inside a group keep their
+    input order, and no window spans two groups. Missing group keys (NaN) are
+    not dropped here; filter them out first, as DataFrame.groupby would.
+
+    Args:
+        values: Array of shape (n_points, 4) in FEATURE_VARIABLES order.
+        group_ids: Array-like of length n_points with the group key of each row.
+        window_size: The number of data points in each window.
+        chunk_size: Number of windows evaluated per vectorized pass.
+
+    Returns:
+        (features, end_index): the (n_windows, 12) feature matrix and, for each
+        window, the row index into `values` of its last (newest) point.
+    """
+    values = np.asarray(values, dtype=float)
+    group_ids = np.asarray(group_ids)
+    if len(group_ids) != len(values):
+        raise ValueError("group_ids must have one entry per row of values.")
+
+    _, inverse = np.unique(group_ids, return_inverse=True)
+    order = np.argsort(inverse.ravel(), kind="stable")
+    sorted_groups = inverse.ravel()[order]
+
+    features = extract_features_batch(values[order], window_size, chunk_size)
+    if len(features) == 0:
+        return features, np.empty(0, dtype=np.intp)
+
+    # Rows are contiguous per group, so a window stays inside one group exactly
+    # when its first and last rows share a group
+    valid = sorted_groups[:len(features)] == sorted_groups[window_size - 1:]
+    end_index = order[np.flatnonzero(valid) + window_size - 1]
+    return features[valid], end_index
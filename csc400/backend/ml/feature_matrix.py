@@ -0,0 +1,144 @@
+"""
+Feature matrices on disk, and chunked scaling / scoring over them.
+
+Training and validation used to hold every feature source in memory
+(pd.read_csv(...).values, np.vstack, df.values.tolist()) before scaling it in
+one call. Here feature sources are .npy files opened memory-mapped, so a
+process only pages in the rows it touches and several processes scoring the
+same file share one page-cached copy:
+
+  * FeatureMatrixWriter streams rows into a .npy file whose length is not
+    known up front (the header is rewritten in place on close);
+  * csv_to_npy converts a headerless feature CSV chunk by chunk, and
+    load_feature_csv caches the result in the feature store;
+  * scale_chunked / score_chunked apply a fitted scaler and model a block of
+    rows at a time, writing into a preallocated (possibly memory-mapped)
+    output instead of materialising intermediate copies.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.ml.feature_store import FeatureStore, default_store
+
+CHUNK_ROWS = 65536
+
+
+class FeatureMatrixWriter:
+    """
+    Appends row blocks to a 2-D .npy file.
+
+    The file starts with a header for zero rows. NumPy pads .npy headers so
+    the first axis can grow without changing the header length, so close()
+    rewrites it in place with the final row count.
+    """
+
+    def __init__(self, path: str, n_columns: int, dtype=np.float64):
+        self.path = path
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+        self.n_rows = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, "wb")
+        self._write_header()
+        self._data_offset = self._file.tell()
+
+    def _write_header(self):
+        np.lib.format.write_array_header_1_0(self._file, {
+            "descr": np.lib.format.dtype_to_descr(self.dtype),
+            "fortran_order": False,
+            "shape": (self.n_rows, self.n_columns),
+        })
+
+    def append(self, rows) -> None:
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        if rows.ndim != 2 or rows.shape[1] != self.n_columns:
+            raise ValueError(f"Expected rows of shape (n, {self.n_columns}), got {rows.shape}")
+        self._file.write(rows.tobytes())
+        self.n_rows += len(rows)
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._write_header()
+        if self._file.tell() != self._data_offset:
+            self._file.close()
+            raise RuntimeError("Rewritten .npy header changed length; file is corrupt.")
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_matrix(path: str) -> np.ndarray:
+    """Opens a feature matrix read-only and memory-mapped."""
+    return np.load(path, mmap_mode="r")
+
+
+def csv_to_npy(csv_path: str, npy_path: str, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """
+    Converts a headerless CSV of feature rows (e.g. data/real/mit_features.csv)
+    into a .npy file without loading the whole CSV. Returns the memory-mapped
+    result.
+    """
+    writer = None
+    try:
+        for chunk in pd.read_csv(csv_path, header=None, dtype=np.float64, chunksize=chunk_rows):
+            if writer is None:
+                writer = FeatureMatrixWriter(npy_path, chunk.shape[1])
+            writer.append(chunk.to_numpy())
+    except pd.errors.EmptyDataError:
+        pass
+    if writer is None:
+        np.save(npy_path, np.empty((0, 0)))
+    else:
+        writer.close()
+    return open_matrix(npy_path)
+
+
+def scale_chunked(scaler, X, chunk_rows: int = CHUNK_ROWS, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    scaler.transform(X) one block of rows at a time.
+
+    Args:
+        scaler: A fitted scaler (row-wise transform, e.g. RobustScaler).
+        X: (n, d) array, typically memory-mapped.
+        chunk_rows: Rows per transform call.
+        out: Preallocated (n, d) float array to fill, e.g. from
+             np.lib.format.open_memmap; a new array by default.
+    """
+    if out is None:
+        out = np.empty(X.shape, dtype=np.float64)
+    for start in range(0, len(X), chunk_rows):
+        out[start:start + chunk_rows] = scaler.transform(np.asarray(X[start:start + chunk_rows]))
+    return out
+
+
+def score_chunked(model, scaler, X, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """
+    model.decision_function(scaler.transform(X)) one block of rows at a time,
+    so only chunk_rows scaled rows exist at once. Returns a float array of
+    length n.
+    """
+    scores = np.empty(len(X), dtype=np.float64)
+    for start in range(0, len(X), chunk_rows):
+        block = scaler.transform(np.asarray(X[start:start + chunk_rows]))
+        scores[start:start + len(block)] = model.decision_function(block)
+    return scores
+
+
+def load_feature_csv(path: str, store: Optional[FeatureStore] = None) -> np.ndarray:
+    """
+    A headerless feature CSV as a memory-mapped matrix. The CSV is converted
+    once and the .npy cached in the feature store by the CSV's contents.
+    """
+    store = store or default_store()
+    return store.get_matrix("feature_csv", [path], {"dtype": "float64"},
+                            lambda out: csv_to_npy(path, out))
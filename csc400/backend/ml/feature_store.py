@@ -0,0 +1,259 @@
+"""
+On-disk cache for derived feature matrices.
+
+Training, validation and the threshold analysis all turn the same raw CSVs
+into sliding-window features. The store keys each result by the SHA-256 of
+every input file plus the transformation parameters (window size, proxy
+mappings, imputation seeds, ...), and keeps the arrays as .npy files that are
+loaded memory-mapped. Changing an input file or a parameter changes the key,
+so stale entries are never returned; they are simply no longer used.
+Matrices too large to build in memory are written straight into the entry
+with get_matrix().
+
+Hashing a large CSV is not free either, so file digests are memoised in
+digests.json by (size, mtime_ns) and only recomputed when the file changes.
+
+Layout under the store root (default data/feature_cache, or the
+EHAB_FEATURE_CACHE environment variable; "off" disables caching):
+
+    <name>-<key>/<array>.npy   one file per named array
+    <name>-<key>/meta.json     sources, params and shapes; written last, so an
+                               entry without it is incomplete and ignored
+    digests.json               file digest memo
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+STORE_VERSION = 1
+DEFAULT_ROOT = "data/feature_cache"
+
+
+class FeatureStore:
+    """Content-addressed cache of named NumPy arrays."""
+
+    def __init__(self, root: Optional[str] = None, enabled: bool = True):
+        """
+        Args:
+            root: Cache directory; created on first write.
+            enabled: If False, get() always computes and never touches disk.
+        """
+        self.root = root or DEFAULT_ROOT
+        self.enabled = enabled
+        self._digests: Optional[dict] = None
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def _digest_memo(self) -> dict:
+        if self._digests is None:
+            try:
+                with open(os.path.join(self.root, "digests.json")) as f:
+                    self._digests = json.load(f)
+            except (OSError, ValueError):
+                self._digests = {}
+        return self._digests
+
+    def file_digest(self, path: str) -> str:
+        """SHA-256 of a file's contents, memoised by size and mtime."""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            memo = self._digest_memo()
+            cached = memo.get(path)
+            if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+                return cached["sha256"]
+
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()
+
+        with self._lock:
+            memo[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+            if self.enabled:
+                os.makedirs(self.root, exist_ok=True)
+                _write_json(os.path.join(self.root, "digests.json"), memo)
+        return digest
+
+    def key(self, name: str, sources: Iterable[str], params: dict) -> str:
+        """Cache key for a named transformation of the given files."""
+        payload = {
+            "store_version": STORE_VERSION,
+            "name": name,
+            "sources": [self.file_digest(p) for p in sources],
+            "params": params,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Entries
+    # ------------------------------------------------------------------
+
+    def _entry_dir(self, name: str, key: str) -> str:
+        return os.path.join(self.root, f"{name}-{key[:20]}")
+
+    def load(self, name: str, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """The cached arrays (memory-mapped, read-only) or None if missing."""
+        entry = self._entry_dir(name, key)
+        try:
+            with open(os.path.join(entry, "meta.json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("key") != key:
+            return None
+        try:
+            return {
+                array: np.load(os.path.join(entry, f"{array}.npy"), mmap_mode="r")
+                for array in meta["arrays"]
+            }
+        except (OSError, ValueError):
+            return None
+
+    def save(self, name: str, key: str, arrays: Dict[str, np.ndarray], info: dict) -> None:
+        """Writes an entry atomically (temporary directory, then rename)."""
+        def write(tmp):
+            for array, values in arrays.items():
+                values = np.asarray(values)
+                if values.dtype == object:
+                    raise TypeError(f"Array {array!r} has dtype object; store numeric or datetime arrays")
+                np.save(os.path.join(tmp, f"{array}.npy"), values, allow_pickle=False)
+            return list(arrays)
+        self._write_entry(name, key, write, info)
+
+    def _write_entry(self, name: str, key: str, write: Callable[[str], Iterable[str]], info: dict) -> None:
+        """Runs write(tmp_dir), which returns the array names it saved, then commits the entry."""
+        os.makedirs(self.root, exist_ok=True)
+        entry = self._entry_dir(name, key)
+        tmp = tempfile.mkdtemp(prefix=f".{name}-", dir=self.root)
+        try:
+            names = list(write(tmp))
+            shapes = {}
+            for array in names:
+                values = np.load(os.path.join(tmp, f"{array}.npy"), mmap_mode="r")
+                shapes[array] = {"shape": list(values.shape), "dtype": str(values.dtype)}
+                del values
+            _write_json(os.path.join(tmp, "meta.json"), {
+                "key": key,
+                "name": name,
+                "arrays": shapes,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                **info,
+            })
+            shutil.rmtree(entry, ignore_errors=True)
+            os.replace(tmp, entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def get(
+        self,
+        name: str,
+        sources: Iterable[str],
+        params: dict,
+        compute: Callable[[], Dict[str, np.ndarray]],
+    ) -> Dict[str, np.ndarray]:
+        """
+        Returns the arrays for (name, sources, params), computing and caching
+        them on a miss.
+
+        Args:
+            name: Short identifier of the transformation (used in the path).
+            sources: Input files whose contents the result depends on.
+            params: JSON-serialisable parameters of the transformation. The
+                    code itself is not hashed; add or bump a "version" entry
+                    when the transformation changes.
+            compute: Builds {array name: ndarray} from scratch.
+        """
+        if not self.enabled:
+            return compute()
+
+        sources = list(sources)
+        key = self.key(name, sources, params)
+        cached = self.load(name, key)
+        if cached is not None:
+            print(f"[FeatureStore] Hit: {name} ({key[:12]})")
+            return cached
+
+        print(f"[FeatureStore] Miss: {name} ({key[:12]}), computing...")
+        arrays = compute()
+        self.save(name, key, arrays, {
+            "sources": [os.path.abspath(p) for p in sources],
+            "params": params,
+        })
+        return self.load(name, key) or arrays
+
+    def get_features(self, name: str, sources: Iterable[str], params: dict,
+                     compute: Callable[[], np.ndarray]) -> np.ndarray:
+        """get() for a transformation producing a single feature matrix."""
+        return self.get(name, sources, params, lambda: {"features": compute()})["features"]
+
+    def get_matrix(self, name: str, sources: Iterable[str], params: dict,
+                   write: Callable[[str], None]) -> np.ndarray:
+        """
+        get_features() for matrices too large to build in memory: write(path)
+        streams the .npy file itself (e.g. with FeatureMatrixWriter) and the
+        result is returned memory-mapped. With the store disabled the file
+        goes to a temporary path that is unlinked once mapped.
+        """
+        if not self.enabled:
+            fd, path = tempfile.mkstemp(prefix=f"{name}-", suffix=".npy")
+            os.close(fd)
+            try:
+                write(path)
+                return np.load(path, mmap_mode="r")
+            finally:
+                os.unlink(path)
+
+        sources = list(sources)
+        key = self.key(name, sources, params)
+        cached = self.load(name, key)
+        if cached is not None:
+            print(f"[FeatureStore] Hit: {name} ({key[:12]})")
+            return cached["features"]
+
+        print(f"[FeatureStore] Miss: {name} ({key[:12]}), computing...")
+
+        def write_entry(tmp):
+            write(os.path.join(tmp, "features.npy"))
+            return ["features"]
+
+        self._write_entry(name, key, write_entry, {
+            "sources": [os.path.abspath(p) for p in sources],
+            "params": params,
+        })
+        return self.load(name, key)["features"]
+
+
+def _write_json(path: str, data: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+_default_store: Optional[FeatureStore] = None
+
+
+def default_store() -> FeatureStore:
+    """The process-wide store configured from EHAB_FEATURE_CACHE."""
+    global _default_store
+    if _default_store is None:
+        setting = os.environ.get("EHAB_FEATURE_CACHE")
+        if setting is not None and setting.strip().lower() in ("off", "0", "false", "none"):
+            _default_store = FeatureStore(enabled=False)
+        else:
+            _default_store = FeatureStore(root=setting or None)
+    return _default_store
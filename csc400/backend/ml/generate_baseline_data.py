@@ -1,80 +1,167 @@
+"""
+Generates the synthetic baseline feature matrix used to train the model.
 
-import numpy as np
+The physics run on the vectorized FleetSimulator, so many nodes (and seeds)
+advance together, and features are computed in bulk with
+extract_features_batch instead of one extractor call per step. Telemetry is
+simulated in chunks of chunk_steps; only one chunk is held in memory, and
+features are written straight into a memory-mapped .npy file.
+
+Row layout is (seed, node)-major: all windows of the first node of the first
+seed, then the next node, and so on. Every node contributes
+duration_steps - window_size + 1 rows, in time order, exactly the rows a
+SlidingWindowFeatureExtractor fed with that node's telemetry would produce.
+A JSON manifest next to the .npy records the shape and generation settings.
+
+Run from the project root:
+    python -m backend.ml.generate_baseline_data --nodes 16 --seeds 42
+"""
+import argparse
+import json
 import os
-from backend.simulation.thermal import ThermalModel
-from backend.simulation.airflow import AirflowModel
-from backend.simulation.humidity import HumidityModel
-from backend.simulation.environment import EnvironmentalModel
-from backend.simulation.node import VirtualNode
-from backend.ml.feature_extraction import SlidingWindowFeatureExtractor
-
-def generate_baseline(duration_steps=172800, seed=42, output_path="backend/ml/baseline_features.npy"):
+import time
+from typing import Optional, Sequence
+
+import numpy as np
+
+from backend.ml.feature_extraction import FEATURE_VARIABLES, extract_features_batch
+from backend.simulation.fleet import FleetSimulator
+
+FEATURE_NAMES = [
+    f"{prefix}_{stat}"
+    for prefix in ("temp", "air", "hum", "cpu")
+    for stat in ("mean", "var", "roc")
+]
+
+MANIFEST_VERSION = 1
+
+
+def manifest_path(output_path: str) -> str:
+    """Path of the manifest written next to a feature file."""
+    root, _ = os.path.splitext(output_path)
+    return root + ".manifest.json"
+
+
+def _simulate_features(fleet: FleetSimulator, duration_steps: int, window_size: int,
+                       chunk_steps: int, out: np.ndarray, row_offset: int) -> None:
+    """Steps the fleet and writes each node's windows into its block of out."""
+    n_nodes = fleet.n_nodes
+    rows_per_node = duration_steps - window_size + 1
+    overlap = window_size - 1
+
+    # Telemetry buffer: the last window_size - 1 steps of the previous chunk,
+    # then this chunk's steps, so windows spanning the chunk boundary are kept
+    buffer = np.empty((overlap + chunk_steps, n_nodes, len(FEATURE_VARIABLES)))
+    carried = 0
+    windows_done = 0
+    step = 0
+    while step < duration_steps:
+        steps = min(chunk_steps, duration_steps - step)
+        for t in range(carried, carried + steps):
+            frame = fleet.step()
+            for j, var in enumerate(FEATURE_VARIABLES):
+                buffer[t, :, j] = frame[var]
+        filled = carried + steps
+        step += steps
+
+        n_windows = filled - window_size + 1
+        if n_windows > 0:
+            for node in range(n_nodes):
+                start = row_offset + node * rows_per_node + windows_done
+                out[start:start + n_windows] = extract_features_batch(buffer[:filled, node, :], window_size)
+            windows_done += n_windows
+
+        carried = min(overlap, filled)
+        buffer[:carried] = buffer[filled - carried:filled]
+
+
+def generate_baseline(
+    duration_steps: int = 172800,
+    seed: int = 42,
+    output_path: str = "backend/ml/baseline_features.npy",
+    n_nodes: int = 1,
+    seeds: Optional[Sequence[int]] = None,
+    window_size: int = 10,
+    chunk_steps: int = 65536,
+) -> np.ndarray:
     """
     Generates synthetic baseline data for normal operation.
-    
+
     Args:
-        duration_steps (int): Number of simulation steps (default 48h = 172800s).
-        seed (int): Random seed for reproducibility.
-        output_path (str): Path to save the resulting feature vectors.
+        duration_steps (int): Number of simulation steps per node (default 48h = 172800s).
+        seed (int): Random seed for reproducibility (used when seeds is None).
+        output_path (str): Path to save the resulting feature vectors (.npy).
+        n_nodes (int): Nodes simulated per seed.
+        seeds (Sequence[int], optional): Several seeds, each simulated as its
+                                         own fleet of n_nodes nodes.
+        window_size (int): Sliding window length used for the features.
+        chunk_steps (int): Steps simulated per chunk (bounds memory use).
+
+    Returns:
+        np.ndarray: The feature matrix, memory-mapped from output_path.
     """
-    # 1. Setup Models with deterministic seed
-    thermal_model = ThermalModel(
-        air_mass=50.0,
-        heat_capacity=1005.0,
-        heat_coefficient=500.0,
-        cooling_coefficient=300.0,
-        initial_temperature=21.0,
-        ambient_temperature=20.0,
-    )
-    
-    airflow_model = AirflowModel(
-        nominal_flow=2.5
-    )
+    seeds = [seed] if seeds is None else list(seeds)
+    if duration_steps < window_size:
+        raise ValueError("duration_steps must be at least window_size.")
 
-    humidity_model = HumidityModel(
-        initial_humidity=45.0,
-        drift=0.01,
-        noise_amplitude=0.2,
-        random_seed=seed
-    )
+    rows_per_node = duration_steps - window_size + 1
+    shape = (len(seeds) * n_nodes * rows_per_node, len(FEATURE_NAMES))
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    features = np.lib.format.open_memmap(output_path, mode="w+", dtype=np.float64, shape=shape)
 
-    environmental_model = EnvironmentalModel(
-        thermal_model=thermal_model,
-        airflow_model=airflow_model,
-        humidity_model=humidity_model,
-    )
+    print(f"Generating baseline data: {len(seeds)} seed(s) x {n_nodes} node(s) x {duration_steps} steps...")
+    started = time.perf_counter()
+    for i, fleet_seed in enumerate(seeds):
+        fleet = FleetSimulator(n_nodes, seed=fleet_seed)
+        _simulate_features(fleet, duration_steps, window_size, chunk_steps,
+                           features, i * n_nodes * rows_per_node)
+        print(f"Progress: seed {fleet_seed} done ({i + 1}/{len(seeds)}).")
+    features.flush()
+    elapsed = time.perf_counter() - started
+
+    manifest = {
+        "manifest_version": MANIFEST_VERSION,
+        "features_file": os.path.basename(output_path),
+        "shape": list(shape),
+        "dtype": "float64",
+        "layout": "seed-major, then node, then time",
+        "feature_names": FEATURE_NAMES,
+        "seeds": seeds,
+        "n_nodes": n_nodes,
+        "duration_steps": duration_steps,
+        "window_size": window_size,
+        "rows_per_node": rows_per_node,
+        "simulator": "FleetSimulator",
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "generation_seconds": round(elapsed, 3),
+    }
+    with open(manifest_path(output_path), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"Baseline generation complete. Saved to {output_path} in {elapsed:.1f}s")
+    print(f"Shape of feature matrix: {shape}")
+    return features
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the synthetic baseline feature matrix.")
+    parser.add_argument("--duration", type=int, default=172800, help="Steps per node.")
+    parser.add_argument("--seeds", type=str, default="42", help="Comma-separated fleet seeds.")
+    parser.add_argument("--nodes", type=int, default=1, help="Nodes per seed.")
+    parser.add_argument("--output", type=str, default="backend/ml/baseline_features.npy")
+    parser.add_argument("--chunk-steps", type=int, default=65536)
+    args = parser.parse_args()
 
-    node = VirtualNode(
-        node_id="baseline-node",
-        environmental_model=environmental_model,
-        random_seed=seed
+    generate_baseline(
+        duration_steps=args.duration,
+        output_path=args.output,
+        n_nodes=args.nodes,
+        seeds=[int(s) for s in args.seeds.split(",") if s.strip()],
+        chunk_steps=args.chunk_steps,
     )
 
-    # 2. Setup Feature Extractor
-    extractor = SlidingWindowFeatureExtractor(window_size=10)
-    baseline_features = []
-
-    # 3. Run Simulation (No time.sleep for offline generation)
-    print(f"Generating baseline data for {duration_steps} steps...")
-    for i in range(duration_steps):
-        telemetry = node.step()
-        extractor.add_point(telemetry)
-        
-        if extractor.is_window_ready():
-            features = extractor.extract_features()
-            baseline_features.append(features)
-        
-        if (i + 1) % 10000 == 0:
-            print(f"Progress: {i + 1}/{duration_steps} steps completed.")
-
-    # 4. Save to Numpy File
-    features_array = np.array(baseline_features)
-    np.save(output_path, features_array)
-    
-    print(f"Baseline generation complete. Saved to {output_path}")
-    print(f"Shape of feature matrix: {features_array.shape}")
 
 if __name__ == "__main__":
-    # Ensure we are in the project root or handle paths correctly
     # For this script, we assume it's run from the project root.
-    generate_baseline()
+    main()
@@ -1,25 +1,56 @@
 import joblib
 import os
+import numpy as np
 from typing import List, Dict, Any
 
+from .compiled_forest import CompiledForest
+
 
 class ModelLoader:
-    """Handles runtime loading and inference for the anomaly detection model."""
+    """
+    Handles runtime loading and inference for the anomaly detection model.
+
+    By default the sklearn forest is compiled into a CompiledForest after loading
+    and scored with it (same scores, far less per-call overhead). A model_path
+    ending in .npz loads a previously exported CompiledForest directly, with the
+    scaler baked in, and does not need scikit-learn or a scaler file.
+    """
+
+    # Threshold lowered from model.offset_ (effectively score < 0) to score < 0.15
+    # Clean baseline floor: 0.2275 (11σ above threshold)
+    # HVAC failure minimum: 0.082 | Coolant leak minimum: 0.070
+    # Profiled 2026-03-27 — backend/tests/test_clean_baseline_profile.py
+    ANOMALY_THRESHOLD = 0.15
+
+    # Paths relative to project root
+    DEFAULT_MODEL_PATH = "models/model_v2_hybrid_real.pkl"
+    DEFAULT_SCALER_PATH = "models/scaler_v2.pkl"
 
     def __init__(
         self,
         model_path: str | None = None,
         scaler_path: str | None = None,
+        compiled: bool = True,
     ):
-        # Paths relative to project root
-        self.model_path = model_path or "models/model_v2_hybrid_real.pkl"
-        self.scaler_path = scaler_path or "models/scaler_v2.pkl"
+        self.model_path = model_path or self.DEFAULT_MODEL_PATH
+        self.scaler_path = scaler_path or self.DEFAULT_SCALER_PATH
+        self.model = None
+        self.scaler = None
+        self.forest: CompiledForest | None = None
 
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(
                 f"Model file not found at {self.model_path}."
             )
-        
+
+        if self.model_path.endswith(".npz"):
+            try:
+                self.forest = CompiledForest.load(self.model_path)
+            except Exception as e:
+                raise RuntimeError(f"Failed to load compiled model: {e}")
+            print(f"[ModelLoader] Loaded compiled model: {self.model_path} ({self.forest.n_trees} trees)")
+            return
+
         if not os.path.exists(self.scaler_path):
             raise FileNotFoundError(
                 f"Scaler file not found at {self.scaler_path}. Identity fallback disabled."
@@ -39,21 +70,45 @@ class ModelLoader:
                 # Fallback if for some reason it's not present
                 print("[ModelLoader] Decision threshold: unknown")
 
+            if compiled:
+                self.forest = CompiledForest.from_sklearn(self.model, self.scaler)
+
         except Exception as e:
             raise RuntimeError(f"Failed to load model or scaler: {e}")
 
     def predict(self, feature_vector: List[float]) -> Dict[str, Any]:
-        scaled = self.scaler.transform([feature_vector])
-        score = self.model.decision_function(scaled)[0]
-        # Threshold lowered from model.offset_ (effectively score < 0) to score < 0.15
-        # Clean baseline floor: 0.2275 (11σ above threshold)
-        # HVAC failure minimum: 0.082 | Coolant leak minimum: 0.070
-        # Profiled 2026-03-27 — backend/tests/test_clean_baseline_profile.py
-        is_anomaly = float(score) < 0.15
-        
+        result = self.predict_batch([feature_vector])
+        return {
+            "anomaly_score": float(result["anomaly_scores"][0]),
+            "is_anomaly": bool(result["is_anomaly"][0]),
+        }
+
+    def predict_batch(self, feature_matrix) -> Dict[str, np.ndarray]:
+        """
+        Scores many feature vectors with one scaler/model call.
+
+        Args:
+            feature_matrix: Array-like of shape (n_windows, 12).
+
+        Returns:
+            Dict with "anomaly_scores" (float array) and "is_anomaly" (bool array),
+            both of length n_windows, using the same threshold as predict().
+        """
+        matrix = np.asarray(feature_matrix, dtype=float)
+        if len(matrix) == 0:
+            return {
+                "anomaly_scores": np.empty(0, dtype=float),
+                "is_anomaly": np.empty(0, dtype=bool),
+            }
+
+        matrix = matrix.reshape(len(matrix), -1)
+        if self.forest is not None:
+            scores = self.forest.decision_function(matrix)
+        else:
+            scores = self.model.decision_function(self.scaler.transform(matrix))
         return {
-            "anomaly_score": float(score),
-            "is_anomaly": bool(is_anomaly),
+            "anomaly_scores": scores,
+            "is_anomaly": scores < self.ANOMALY_THRESHOLD,
         }
 
 
@@ -0,0 +1,74 @@
+"""
+Process-wide registry of loaded anomaly models.
+
+Every VirtualNode, the CentralServer and the API share one ModelLoader per
+(model, scaler) pair instead of each loading its own copy from disk. A loaded
+ModelLoader is never mutated after construction, so handing out the same
+instance to every consumer is safe. reload() loads a fresh copy and swaps it in
+with a single dict assignment; callers holding the old instance keep using it
+until they fetch the new one.
+"""
+import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from .model_loader import ModelLoader
+
+
+class ModelRegistry:
+    """Loads each model version once and hands out shared references."""
+
+    def __init__(self):
+        self._models: Dict[Tuple[str, str], ModelLoader] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_path: Optional[str], scaler_path: Optional[str]) -> Tuple[str, str]:
+        return (
+            os.path.abspath(model_path or ModelLoader.DEFAULT_MODEL_PATH),
+            os.path.abspath(scaler_path or ModelLoader.DEFAULT_SCALER_PATH),
+        )
+
+    def get(self, model_path: Optional[str] = None, scaler_path: Optional[str] = None) -> ModelLoader:
+        """
+        Returns the shared ModelLoader for the given paths, loading it on first use.
+
+        Raises the same exceptions as ModelLoader (FileNotFoundError, RuntimeError);
+        failed loads are not cached, so a later call retries.
+        """
+        key = self._key(model_path, scaler_path)
+        loader = self._models.get(key)
+        if loader is not None:
+            return loader
+
+        with self._lock:
+            loader = self._models.get(key)
+            if loader is None:
+                loader = ModelLoader(model_path=model_path, scaler_path=scaler_path)
+                self._models[key] = loader
+            return loader
+
+    def reload(self, model_path: Optional[str] = None, scaler_path: Optional[str] = None) -> ModelLoader:
+        """
+        Loads the model from disk again and atomically replaces the shared instance.
+
+        The old instance stays registered if loading fails.
+        """
+        key = self._key(model_path, scaler_path)
+        loader = ModelLoader(model_path=model_path, scaler_path=scaler_path)
+        with self._lock:
+            self._models[key] = loader
+        return loader
+
+    def clear(self):
+        """Drops every cached model (the next get() loads from disk)."""
+        with self._lock:
+            self._models.clear()
+
+
+registry = ModelRegistry()
+
+
+def get_model(model_path: Optional[str] = None, scaler_path: Optional[str] = None) -> ModelLoader:
+    """Returns the process-wide shared ModelLoader (see ModelRegistry.get)."""
+    return registry.get(model_path, scaler_path)
@@ -0,0 +1,177 @@
+"""
+Vectorized threshold and k-of-n temporal-policy sweeps over scored windows.
+
+A window is flagged when its decision_function score is below the threshold,
+and a k-of-n policy raises an alert at step i when at least k of the last n
+flags (fewer at the start of a stream) are set. The deployed persistence
+rule, any flag in the last 20 steps, is the 1-of-20 policy; "2 consecutive"
+is 2-of-2.
+
+Instead of re-flagging the stream once per threshold, every policy is
+reduced to one effective score per step:
+
+    alert(i, t)  <=>  k-th smallest score among the last n windows  <  t
+
+so a stream and policy are summarised by a single array, and counts for any
+number of thresholds come from one sort plus np.searchsorted. The same trick
+gives alert onsets (an onset at i needs s[i] < t <= s[i - 1]) and the first
+detection index (the running minimum of s). All metrics are exact, not
+interpolated, for every (k, n, threshold) in the grid.
+
+k_of_n() is the direct form for a single flag array (cumulative-sum window
+counts), used where the alert sequence itself is needed.
+"""
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+CHUNK_ROWS = 65536
+
+
+def k_of_n(flags: np.ndarray, k: int, n: int) -> np.ndarray:
+    """Alerts where at least k of the last n flags (fewer at the start) are set."""
+    flags = np.asarray(flags, dtype=bool)
+    counts = np.cumsum(np.r_[0, flags.astype(np.int64)])
+    start = np.maximum(np.arange(1, len(flags) + 1) - n, 0)
+    return counts[1:] - counts[start] >= k
+
+
+def all_k_of_n(max_n: int) -> List[Tuple[int, int]]:
+    """Every (k, n) with 1 <= k <= n <= max_n."""
+    return [(k, n) for n in range(1, max_n + 1) for k in range(1, n + 1)]
+
+
+def effective_scores(scores: np.ndarray, k: int, n: int, chunk_rows: int = CHUNK_ROWS) -> np.ndarray:
+    """
+    Per step, the k-th smallest score among the last n windows, or +inf
+    while fewer than k windows have been seen. For any threshold t,
+    effective_scores(...) < t equals k_of_n(scores < t, k, n).
+    """
+    if not 1 <= k <= n:
+        raise ValueError(f"Need 1 <= k <= n, got k={k}, n={n}")
+    scores = np.asarray(scores, dtype=np.float64)
+    if k == n == 1:
+        return scores.copy()
+    # Missing history counts as never flagged
+    padded = np.r_[np.full(n - 1, np.inf), scores]
+    windows = sliding_window_view(padded, n)
+    out = np.empty(len(scores))
+    for start in range(0, len(scores), chunk_rows):
+        block = windows[start:start + chunk_rows]
+        out[start:start + len(block)] = np.partition(block, k - 1, axis=1)[:, k - 1]
+    return out
+
+
+def count_below(values: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+    """Number of values strictly below each threshold."""
+    return np.searchsorted(np.sort(values), thresholds, side="left")
+
+
+def threshold_grid(*score_arrays: np.ndarray, n_points: int = 2001, include: Iterable[float] = ()) -> np.ndarray:
+    """
+    Sorted, unique thresholds covering the pooled scores: n_points quantiles
+    (dense where scores are), n_points evenly spaced values over the score
+    range, and any explicitly included thresholds.
+    """
+    pooled = np.concatenate([np.asarray(s, dtype=np.float64).ravel() for s in score_arrays])
+    pooled = pooled[np.isfinite(pooled)]
+    parts = [np.asarray(list(include), dtype=np.float64)]
+    if len(pooled):
+        lo, hi = pooled.min(), pooled.max()
+        # Just above the maximum, so the top of the grid flags every window
+        top = np.nextafter(hi, np.inf)
+        parts += [
+            np.quantile(pooled, np.linspace(0.0, 1.0, n_points)),
+            np.linspace(lo, top, n_points),
+        ]
+    return np.unique(np.concatenate(parts))
+
+
+def _rates(tp, fp, n_anomaly: int, n_normal: int) -> Dict[str, np.ndarray]:
+    tp = np.asarray(tp, dtype=np.int64)
+    fp = np.asarray(fp, dtype=np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recall = tp / n_anomaly if n_anomaly else np.zeros(tp.shape)
+        fpr = fp / n_normal if n_normal else np.zeros(fp.shape)
+        precision = np.where(tp + fp > 0, tp / np.maximum(tp + fp, 1), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {
+        "recall": recall,
+        "false_positive_rate": fpr,
+        "precision": precision,
+        "F1": f1,
+        "TP": tp,
+        "FP": fp,
+        "TN": n_normal - fp,
+        "FN": n_anomaly - tp,
+    }
+
+
+def sweep_thresholds(normal_scores: np.ndarray, anomaly_scores: np.ndarray,
+                     thresholds: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Window-level metrics (recall, FPR, precision, F1 and the confusion counts)
+    for every threshold, each as an array aligned with thresholds. recall
+    against false_positive_rate is the ROC curve.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    tp = count_below(anomaly_scores, thresholds)
+    fp = count_below(normal_scores, thresholds)
+    return _rates(tp, fp, len(anomaly_scores), len(normal_scores))
+
+
+def policy_counts(scores: np.ndarray, thresholds: np.ndarray, k: int, n: int) -> Dict[str, np.ndarray]:
+    """
+    For one stream and one k-of-n policy, per threshold: alerting steps,
+    alert onsets (False -> True transitions) and the first alert index
+    (-1 when the policy never alerts).
+    """
+    s = effective_scores(scores, k, n)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if len(s) == 0:
+        zeros = np.zeros(len(thresholds), dtype=np.int64)
+        return {"alerts": zeros, "onsets": zeros, "first_index": zeros - 1}
+
+    alerts = count_below(s, thresholds)
+    # Alerting at i and at i - 1; step 0 has no predecessor
+    both = np.maximum(s, np.r_[np.inf, s[:-1]])
+    onsets = alerts - count_below(both, thresholds)
+
+    # First i with s[i] < t is the first i whose running minimum is below t
+    running_min = np.minimum.accumulate(s)
+    first = np.searchsorted(-running_min, -thresholds, side="right")
+    first = np.where(first < len(s), first, -1)
+    return {"alerts": alerts, "onsets": onsets, "first_index": first}
+
+
+def sweep_policies(normal_scores: np.ndarray, anomaly_scores: np.ndarray, thresholds: np.ndarray,
+                   policies: Sequence[Tuple[int, int]]) -> Dict[str, np.ndarray]:
+    """
+    Alert-level metrics for every (policy, threshold) pair.
+
+    The normal and anomaly streams are each treated as one ordered sequence,
+    as in the analysis. Returns 2-D arrays of shape (len(policies),
+    len(thresholds)): recall, false_positive_rate, precision, F1, TP, FP, TN,
+    FN (alerting steps), normal_alert_count / anomaly_alert_count (onsets)
+    and first_detection_index (first anomaly-stream alert, -1 if none), plus
+    "k" and "n" arrays describing the rows.
+    """
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    keys = ("recall", "false_positive_rate", "precision", "F1", "TP", "FP", "TN", "FN",
+            "normal_alert_count", "anomaly_alert_count", "first_detection_index")
+    rows = {key: [] for key in keys}
+    for k, n in policies:
+        normal = policy_counts(normal_scores, thresholds, k, n)
+        anomaly = policy_counts(anomaly_scores, thresholds, k, n)
+        for key, values in _rates(anomaly["alerts"], normal["alerts"],
+                                  len(anomaly_scores), len(normal_scores)).items():
+            rows[key].append(values)
+        rows["normal_alert_count"].append(normal["onsets"])
+        rows["anomaly_alert_count"].append(anomaly["onsets"])
+        rows["first_detection_index"].append(anomaly["first_index"])
+
+    out = {key: np.array(values).reshape(len(policies), len(thresholds)) for key, values in rows.items()}
+    out["k"] = np.array([k for k, _ in policies], dtype=np.int64)
+    out["n"] = np.array([n for _, n in policies], dtype=np.int64)
+    return out
@@ -1,4 +1,5 @@
 
+import argparse
 import pandas as pd
 import numpy as np
 import os
@@ -12,75 +13,141 @@ from sklearn.utils import shuffle
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from backend.ml.feature_extraction import SlidingWindowFeatureExtractor
+from backend.ml.feature_extraction import FEATURE_VARIABLES, SlidingWindowFeatureExtractor, extract_features_batch
+from backend.ml.feature_matrix import FeatureMatrixWriter, load_feature_csv, scale_chunked
+from backend.ml.feature_store import default_store
+from backend.simulation.export import MANIFEST_NAME, read_telemetry
 from backend.simulation.thermal_model import ThermalModel
 from backend.simulation.airflow import AirflowModel
 from backend.simulation.humidity import HumidityModel
 from backend.simulation.node import VirtualNode
 
-def build_training_data():
+SYNTHETIC_PATH = 'data/synthetic/normal_telemetry.csv'
+KAGGLE_PATH = 'datasets/HVAC_Kaggle.csv'
+KAGGLE_HUMIDITY_SEED = 77
+SAMPLE_SEED = 42
+
+def load_synthetic_features(rows=None):
+    """Windows over normal_telemetry.csv (optionally a row slice), cached by content."""
+    def compute():
+        df = pd.read_csv(SYNTHETIC_PATH)
+        if rows is not None:
+            df = df.iloc[rows[0]:rows[1]]
+        return extract_features_batch(df[FEATURE_VARIABLES].to_numpy(dtype=float), window_size=10)
+    params = {"window_size": 10, "rows": list(rows) if rows is not None else None}
+    return default_store().get_features("synthetic_windows", [SYNTHETIC_PATH], params, compute)
+
+def load_kaggle_features():
+    """Kaggle HVAC rows mapped onto the four telemetry channels, then windowed."""
+    def compute():
+        df_kag = pd.read_csv(KAGGLE_PATH)
+        df_kag = df_kag[df_kag['Power'] > 0].copy()
+        delta_t = df_kag['T_Return'] - df_kag['T_Supply']
+
+        kag_data = pd.DataFrame()
+        kag_data['temperature'] = df_kag['T_Supply']
+        std_dt = delta_t.std()
+        kag_data['airflow'] = (delta_t / std_dt) * 0.25 + 2.5
+        p_min_kag, p_max_kag = df_kag['Power'].min(), df_kag['Power'].max()
+        kag_data['cpu_load'] = (df_kag['Power'] - p_min_kag) / (p_max_kag - p_min_kag) * 0.8 + 0.1
+        # Same values as np.random.seed(77) followed by np.random.normal
+        kag_data['humidity'] = np.random.RandomState(KAGGLE_HUMIDITY_SEED).normal(45.0, 2.0, len(df_kag))
+
+        return extract_features_batch(kag_data[FEATURE_VARIABLES].to_numpy(dtype=float), window_size=10)
+    params = {
+        "window_size": 10,
+        "filter": "Power > 0",
+        "airflow": {"scale": 0.25, "offset": 2.5},
+        "cpu_load": {"scale": 0.8, "offset": 0.1},
+        "humidity": {"seed": KAGGLE_HUMIDITY_SEED, "mean": 45.0, "std": 2.0},
+    }
+    return default_store().get_features("kaggle_hvac_windows", [KAGGLE_PATH], params, compute)
+
+def load_captured_features(export_dir, profile_id=None):
+    """
+    Feature windows from telemetry exported by backend.simulation.export.
+
+    Nodes are read and windowed one at a time (in node id order) and streamed
+    into a memory-mapped matrix, so only one node's telemetry is in memory.
+    The matrix is cached by the export manifest, which changes whenever rows
+    are appended.
+    """
+    root = os.path.join(export_dir, "telemetry", f"profile={profile_id or 0}")
+    nodes = sorted(d.split("=", 1)[1] for d in os.listdir(root) if d.startswith("node=")) if os.path.isdir(root) else []
+
+    def write(path):
+        with FeatureMatrixWriter(path, 12) as writer:
+            for node in nodes:
+                cols = read_telemetry(export_dir, profile_id=profile_id, node_ids=[node], columns=FEATURE_VARIABLES)
+                values = np.column_stack([cols[v] for v in FEATURE_VARIABLES])
+                keep = ~np.isnan(values).any(axis=1)
+                writer.append(extract_features_batch(values[keep], window_size=10))
+
+    params = {"window_size": 10, "profile_id": profile_id or 0, "nodes": nodes}
+    return default_store().get_matrix("captured_windows", [os.path.join(export_dir, MANIFEST_NAME)], params, write)
+
+def build_training_data(captured_dir=None, captured_profile=None, captured_share=0.2,
+                        total_target=25000, out_path=None):
+    """
+    Samples the training matrix from every source.
+
+    Sources are memory-mapped, so sampling only reads the chosen rows. The
+    result is written into a preallocated array (a memory-mapped .npy at
+    out_path if given) directly in its shuffled order.
+    """
     print("--- STEP 2: Building training data ---")
     
     # Source A: Synthetic
     print("Source A: Synthetic...")
-    df_syn = pd.read_csv('data/synthetic/normal_telemetry.csv')
-    extractor = SlidingWindowFeatureExtractor(window_size=10)
-    syn_features = []
-    for _, row in df_syn.iterrows():
-        extractor.add_point(row.to_dict())
-        if extractor.is_window_ready():
-            syn_features.append(extractor.extract_features())
-    syn_features = np.array(syn_features)
+    syn_features = load_synthetic_features()
     
     # Source B: Cold Source
     print("Source B: Cold Source (Pre-processed)...")
-    cold_features = pd.read_csv('data/real/cold_source_features.csv', header=None).values
+    cold_features = load_feature_csv('data/real/cold_source_features.csv')
     
     # Source C: MIT
     print("Source C: MIT (Pre-processed)...")
-    mit_features = pd.read_csv('data/real/mit_features.csv', header=None, nrows=8000).values
+    # All motes; the MIT share is sampled from the whole file
+    mit_features = load_feature_csv('data/real/mit_features.csv')
     
     # Source D: Kaggle HVAC
     print("Source D: Kaggle HVAC...")
-    df_kag = pd.read_csv('datasets/HVAC_Kaggle.csv')
-    df_kag = df_kag[df_kag['Power'] > 0].copy()
-    delta_t = df_kag['T_Return'] - df_kag['T_Supply']
-    
-    kag_data = pd.DataFrame()
-    kag_data['temperature'] = df_kag['T_Supply']
-    std_dt = delta_t.std()
-    kag_data['airflow'] = (delta_t / std_dt) * 0.25 + 2.5
-    p_min_kag, p_max_kag = df_kag['Power'].min(), df_kag['Power'].max()
-    kag_data['cpu_load'] = (df_kag['Power'] - p_min_kag) / (p_max_kag - p_min_kag) * 0.8 + 0.1
-    np.random.seed(77)
-    kag_data['humidity'] = np.random.normal(45.0, 2.0, len(df_kag))
+    kag_features = load_kaggle_features()
     
-    extractor = SlidingWindowFeatureExtractor(window_size=10)
-    kag_features = []
-    for _, row in kag_data.iterrows():
-        extractor.add_point(row.to_dict())
-        if extractor.is_window_ready():
-            kag_features.append(extractor.extract_features())
-    kag_features = np.array(kag_features)
+    # Source E (optional): telemetry captured by the running system
+    cap_features = np.empty((0, 12))
+    if captured_dir is not None:
+        print(f"Source E: Captured telemetry ({captured_dir})...")
+        cap_features = load_captured_features(captured_dir, captured_profile)
     
-    total_target = 25000
     n_a = min(len(syn_features), int(total_target * 0.4))
     n_b = min(len(cold_features), int(total_target * 0.25))
     n_c = min(len(mit_features), int(total_target * 0.20))
     n_d = min(len(kag_features), int(total_target * 0.15))
+    n_e = min(len(cap_features), int(total_target * captured_share))
     
-    def sample(arr, n):
-        idx = np.random.choice(len(arr), n, replace=False)
-        return arr[idx]
-    
-    X_train = np.vstack([
-        sample(syn_features, n_a),
-        sample(cold_features, n_b),
-        sample(mit_features, n_c),
-        sample(kag_features, n_d)
-    ])
-    
-    X_train = shuffle(X_train, random_state=42)
+    sources = [(syn_features, n_a), (cold_features, n_b), (mit_features, n_c),
+               (kag_features, n_d), (cap_features, n_e)]
+    n_total = sum(n for _, n in sources)
+    if out_path:
+        X_train = np.lib.format.open_memmap(out_path, mode='w+', dtype=np.float64, shape=(n_total, 12))
+    else:
+        X_train = np.empty((n_total, 12))
+
+    # Same rows and order as shuffle(np.vstack(samples), random_state=42):
+    # source row j of the stacked matrix lands at position[j]
+    position = np.empty(n_total, dtype=np.intp)
+    position[shuffle(np.arange(n_total), random_state=42)] = np.arange(n_total)
+    # Row sampling has its own generator, independent of the global RNG and of
+    # whether sources came from the cache. (The selected rows differ from
+    # models trained before this, which drew from the global RNG as left by
+    # the Kaggle humidity imputation.)
+    rng = np.random.default_rng(SAMPLE_SEED)
+    offset = 0
+    for arr, n in sources:
+        idx = rng.choice(len(arr), n, replace=False)
+        X_train[position[offset:offset + n]] = arr[idx]
+        offset += n
     
     print("\nTraining Data Composition:")
     print(f"| Source      | Rows  | Percentage |")
@@ -89,6 +156,8 @@ def build_training_data():
     print(f"| Cold Source | {n_b:5} | {n_b/len(X_train)*100:9.1f}% |")
     print(f"| MIT         | {n_c:5} | {n_c/len(X_train)*100:9.1f}% |")
     print(f"| Kaggle      | {n_d:5} | {n_d/len(X_train)*100:9.1f}% |")
+    if n_e:
+        print(f"| Captured    | {n_e:5} | {n_e/len(X_train)*100:9.1f}% |")
     print(f"| TOTAL       | {len(X_train):5} | 100.0%     |")
     
     feature_names = [
@@ -111,14 +180,7 @@ def build_training_data():
 
 def validate_model(model, scaler):
     print("\n--- STEP 4: Validation ---")
-    df_syn = pd.read_csv('data/synthetic/normal_telemetry.csv')
-    normal_segment = df_syn.iloc[25000:25100]
-    extractor = SlidingWindowFeatureExtractor(window_size=10)
-    test_features = []
-    for _, row in normal_segment.iterrows():
-        extractor.add_point(row.to_dict())
-        if extractor.is_window_ready():
-            test_features.append(extractor.extract_features())
+    test_features = load_synthetic_features(rows=(25000, 25100))
     
     X_test = scaler.transform(test_features)
     preds = model.predict(X_test)
@@ -171,11 +233,31 @@ def sanity_check_hvac(model, scaler):
     return pass_hvac
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the hybrid Isolation Forest model.")
+    parser.add_argument("--captured", default=None,
+                        help="Export directory from backend.simulation.export to add as a training source")
+    parser.add_argument("--captured-profile", type=int, default=None)
+    parser.add_argument("--captured-share", type=float, default=0.2,
+                        help="Share of the --total-rows target drawn from captured telemetry")
+    parser.add_argument("--total-rows", type=int, default=25000,
+                        help="Size of the sampled training matrix")
+    parser.add_argument("--matrix-dir", default=None,
+                        help="Write the training matrices as memory-mapped .npy files here")
+    args = parser.parse_args()
+
     os.makedirs('models', exist_ok=True)
-    X_train = build_training_data()
+    if args.matrix_dir:
+        os.makedirs(args.matrix_dir, exist_ok=True)
+    X_train = build_training_data(
+        args.captured, args.captured_profile, args.captured_share, args.total_rows,
+        os.path.join(args.matrix_dir, 'X_train.npy') if args.matrix_dir else None,
+    )
     print("\n--- STEP 3: Scale and train ---")
     scaler = RobustScaler()
-    X_scaled = scaler.fit_transform(X_train)
+    scaler.fit(X_train)
+    X_scaled = scale_chunked(scaler, X_train, out=np.lib.format.open_memmap(
+        os.path.join(args.matrix_dir, 'X_scaled.npy'), mode='w+', dtype=np.float64, shape=X_train.shape
+    ) if args.matrix_dir else None)
     model = IsolationForest(contamination=0.01, random_state=42, n_estimators=200)
     model.fit(X_scaled)
     print(f"Model Decision Threshold: {model.offset_:.6f}")
@@ -6,39 +6,31 @@ import numpy as np
 sys.path.append(os.getcwd())
 
 from backend.ml.model_loader import ModelLoader
-from backend.ml.feature_extraction import SlidingWindowFeatureExtractor
+from backend.ml.feature_extraction import FEATURE_VARIABLES, extract_features_grouped
+from backend.ml.feature_matrix import load_feature_csv, score_chunked
+from backend.ml.feature_store import default_store
 
 THRESHOLD = 0.15
 
 def _score_preextracted(path, scaler, model):
-    """Load a headerless CSV of pre-extracted 12-feature rows; return (scores, preds)."""
-    df = pd.read_csv(path, header=None)
-    feats = df.values.tolist()
-    scaled = scaler.transform(feats)
-    scores = model.decision_function(scaled).tolist()
-    preds = [s < THRESHOLD for s in scores]
-    return scores, preds
+    """Score a headerless CSV of pre-extracted 12-feature rows (memory-mapped); return (scores, preds)."""
+    return _score_features(load_feature_csv(path), scaler, model)
 
 def _score_raw_telemetry(path, scaler, model):
     """Load normal_telemetry.csv, extract sliding-window features, return (scores, preds)."""
-    df = pd.read_csv(path)
-    scores, preds = [], []
-    for node_id, group in df.groupby('node_id'):
-        extractor = SlidingWindowFeatureExtractor(window_size=10)
-        for _, row in group.iterrows():
-            extractor.add_point({
-                'temperature': float(row['temperature']),
-                'airflow':     float(row['airflow']),
-                'humidity':    float(row['humidity']),
-                'cpu_load':    float(row['cpu_load']),
-            })
-            if extractor.is_window_ready():
-                feat = extractor.extract_features()
-                scaled = scaler.transform([feat])
-                score = float(model.decision_function(scaled)[0])
-                scores.append(score)
-                preds.append(score < THRESHOLD)
-    return scores, preds
+    def compute():
+        df = pd.read_csv(path)
+        feats, _ = extract_features_grouped(
+            df[FEATURE_VARIABLES].to_numpy(dtype=float), df['node_id'].to_numpy(), window_size=10
+        )
+        return feats
+    feats = default_store().get_features("synthetic_node_windows", [path], {"window_size": 10}, compute)
+    return _score_features(feats, scaler, model)
+
+def _score_features(feats, scaler, model):
+    """Score a (n_windows, 12) feature matrix in row chunks; return (scores, preds) arrays."""
+    scores = score_chunked(model, scaler, feats)
+    return scores, scores < THRESHOLD
 
 def validate_on_real_anomalies():
     print("--- E-HABITAT FULL VALIDATION ---")
@@ -59,35 +51,34 @@ def validate_on_real_anomalies():
         print(f"Error: {anomaly_path} not found.")
         return
 
-    df_anom = pd.read_csv(anomaly_path)
-    print(f"[2/5] Loaded {len(df_anom)} raw anomaly rows.")
-
-    l_min, l_max = df_anom['Light'].min(), df_anom['Light'].max()
-    df_anom['airflow']  = 2.0 + (df_anom['Light'] - l_min) / (l_max - l_min + 1e-6)
-    v_min, v_max = df_anom['Voltage'].min(), df_anom['Voltage'].max()
-    df_anom['cpu_load'] = 0.1 + (df_anom['Voltage'] - v_min) / (v_max - v_min + 1e-6) * 0.8
-    df_anom['temperature'] = df_anom['Temp (C)']
-    df_anom['humidity']    = df_anom['Humidity']
-    df_anom = df_anom.ffill().bfill().fillna(0)
-
-    anom_scores, anom_preds = [], []
-    for _, group in df_anom.groupby('Moteid'):
-        extractor = SlidingWindowFeatureExtractor(window_size=10)
-        for _, row in group.iterrows():
-            extractor.add_point({
-                'temperature': float(row['temperature']),
-                'airflow':     float(row['airflow']),
-                'humidity':    float(row['humidity']),
-                'cpu_load':    float(row['cpu_load']),
-            })
-            if extractor.is_window_ready():
-                feat = extractor.extract_features()
-                scaled = scaler.transform([feat])
-                score = float(model.decision_function(scaled)[0])
-                anom_scores.append(score)
-                anom_preds.append(score < THRESHOLD)
-
-    TP = sum(anom_preds)
+    def compute():
+        df_anom = pd.read_csv(anomaly_path)
+        l_min, l_max = df_anom['Light'].min(), df_anom['Light'].max()
+        df_anom['airflow']  = 2.0 + (df_anom['Light'] - l_min) / (l_max - l_min + 1e-6)
+        v_min, v_max = df_anom['Voltage'].min(), df_anom['Voltage'].max()
+        df_anom['cpu_load'] = 0.1 + (df_anom['Voltage'] - v_min) / (v_max - v_min + 1e-6) * 0.8
+        df_anom['temperature'] = df_anom['Temp (C)']
+        df_anom['humidity']    = df_anom['Humidity']
+        df_anom = df_anom.ffill().bfill().fillna(0)
+
+        feats, _ = extract_features_grouped(
+            df_anom[FEATURE_VARIABLES].to_numpy(dtype=float), df_anom['Moteid'].to_numpy(), window_size=10
+        )
+        return {"features": feats, "rows": np.array(len(df_anom))}
+
+    params = {
+        "window_size": 10,
+        "airflow": {"source": "Light", "offset": 2.0, "scale": 1.0},
+        "cpu_load": {"source": "Voltage", "offset": 0.1, "scale": 0.8},
+        "imputation": "ffill, bfill, 0",
+    }
+    anom = default_store().get("mit_anomaly_windows", [anomaly_path], params, compute)
+    anom_feats = anom["features"]
+    print(f"[2/5] Loaded {int(anom['rows'])} raw anomaly rows.")
+
+    anom_scores, anom_preds = _score_features(anom_feats, scaler, model)
+
+    TP = int(anom_preds.sum())
     FN = len(anom_preds) - TP
     print(f"       Anomaly windows: {len(anom_preds)}  |  TP={TP}  FN={FN}")
 
@@ -101,37 +92,41 @@ def validate_on_real_anomalies():
     normal_scores, normal_preds = [], []
 
     mit_norm_path = 'data/real/mit_features.csv'
-    mit_fp_count = 0
+    mit_fp_count = mit_windows = 0
     if os.path.exists(mit_norm_path):
         s, p = _score_preextracted(mit_norm_path, scaler, model)
-        normal_scores.extend(s)
-        normal_preds.extend(p)
-        mit_fp_count = sum(p)
+        normal_scores.append(s)
+        normal_preds.append(p)
+        mit_fp_count = int(p.sum())
+        mit_windows = len(p)
         print(f"       MIT CSAIL normal:   {len(p):6d} windows  |  FP={mit_fp_count}  ({mit_fp_count/len(p)*100:.4f}%)")
 
     synth_path = 'data/synthetic/normal_telemetry.csv'
     synth_fp_count = 0
     if os.path.exists(synth_path):
         s, p = _score_raw_telemetry(synth_path, scaler, model)
-        normal_scores.extend(s)
-        normal_preds.extend(p)
-        synth_fp_count = sum(p)
+        normal_scores.append(s)
+        normal_preds.append(p)
+        synth_fp_count = int(p.sum())
         print(f"       Synthetic normal:   {len(p):6d} windows  |  FP={synth_fp_count}  ({synth_fp_count/len(p)*100:.4f}%)")
 
-    FP = sum(normal_preds)
+    normal_scores = np.concatenate(normal_scores) if normal_scores else np.empty(0)
+    normal_preds = np.concatenate(normal_preds) if normal_preds else np.empty(0, dtype=bool)
+    FP = int(normal_preds.sum())
     TN = len(normal_preds) - FP
 
     # ── 3b. Cold source — scored separately, not in FP metrics ──────────────
     cold_path = 'data/real/cold_source_features.csv'
     cold_note = ""
     if os.path.exists(cold_path):
-        cs, cp = _score_preextracted(cold_path, scaler, model)
-        cold_fp = sum(cp)
+        cold_feats = load_feature_csv(cold_path)
+        cs, cp = _score_features(cold_feats, scaler, model)
+        cold_fp = int(cp.sum())
         cold_note = (
             f"  Cold source:         {len(cp):6d} windows  |  FP={cold_fp}  ({cold_fp/len(cp)*100:.2f}%)\n"
             f"  NOTE: Cold source excluded from precision/F1/FPR metrics. Its\n"
-            f"  temperature variance (mean={np.mean([cs[i] for i, p in enumerate(cp)]):.3f}) and humidity\n"
-            f"  variance (col7 avg {pd.read_csv(cold_path, header=None)[7].mean():.1f}) are far outside the\n"
+            f"  temperature variance (mean={np.mean(cs):.3f}) and humidity\n"
+            f"  variance (col7 avg {cold_feats[:, 7].mean():.1f}) are far outside the\n"
             f"  PsyEngine normal operating range (MIT hum_var avg 0.03). The model\n"
             f"  correctly identifies it as out-of-distribution — not a false positive\n"
             f"  in the deployable sense."
@@ -151,15 +146,15 @@ def validate_on_real_anomalies():
 
     try:
         from sklearn.metrics import roc_auc_score
-        labels     = [1] * len(anom_scores) + [0] * len(normal_scores)
-        neg_scores = [-s for s in anom_scores + normal_scores]
+        labels     = np.r_[np.ones(len(anom_scores)), np.zeros(len(normal_scores))]
+        neg_scores = -np.concatenate([anom_scores, normal_scores])
         auc = roc_auc_score(labels, neg_scores)
     except Exception as e:
         auc = None
         print(f"       AUC-ROC skipped: {e}")
 
-    avg_anom   = float(np.mean(anom_scores))   if anom_scores   else 0.0
-    avg_normal = float(np.mean(normal_scores)) if normal_scores else 0.0
+    avg_anom   = float(np.mean(anom_scores))   if len(anom_scores)   else 0.0
+    avg_normal = float(np.mean(normal_scores)) if len(normal_scores) else 0.0
 
     # ── 5. Print and save ────────────────────────────────────────────────────
     lines = [
@@ -192,10 +187,10 @@ def validate_on_real_anomalies():
         "------------------",
         f"  Avg score — anomaly windows: {avg_anom:.4f}",
         f"  Avg score — normal  windows: {avg_normal:.4f}",
-        f"  Min anomaly score:           {min(anom_scores):.4f}" if anom_scores else "",
-        f"  Max anomaly score:           {max(anom_scores):.4f}" if anom_scores else "",
-        f"  Min normal  score:           {min(normal_scores):.4f}" if normal_scores else "",
-        f"  Max normal  score:           {max(normal_scores):.4f}" if normal_scores else "",
+        f"  Min anomaly score:           {anom_scores.min():.4f}" if len(anom_scores) else "",
+        f"  Max anomaly score:           {anom_scores.max():.4f}" if len(anom_scores) else "",
+        f"  Min normal  score:           {normal_scores.min():.4f}" if len(normal_scores) else "",
+        f"  Max normal  score:           {normal_scores.max():.4f}" if len(normal_scores) else "",
         "",
         "Cold Source Dataset (Out-of-Distribution — Scored Separately)",
         "--------------------------------------------------------------",
@@ -207,8 +202,8 @@ def validate_on_real_anomalies():
         "Data Sources",
         "------------",
         f"  Anomaly (TP/FN): MIT CSAIL Intel Lab anomaly windows — mit_anomaly_validation.csv",
-        f"  Normal  (TN/FP): MIT CSAIL normal windows       — mit_features.csv      ({mit_fp_count} FP / {len(pd.read_csv(mit_norm_path, header=None))} windows)",
-        f"                   Synthetic PsyEngine baseline   — normal_telemetry.csv  ({synth_fp_count} FP / {len(normal_preds) - (len(pd.read_csv(mit_norm_path, header=None))) } windows)",
+        f"  Normal  (TN/FP): MIT CSAIL normal windows       — mit_features.csv      ({mit_fp_count} FP / {mit_windows} windows)",
+        f"                   Synthetic PsyEngine baseline   — normal_telemetry.csv  ({synth_fp_count} FP / {len(normal_preds) - mit_windows} windows)",
         f"  Excluded (OOD):  Cold source server room data   — cold_source_features.csv  (operating regime outside model normal range)",
     ]
 
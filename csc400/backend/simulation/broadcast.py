@@ -0,0 +1,74 @@
+"""
+Fan-out hub for simulation frames.
+
+One producer (the simulation task) publishes each frame once; every websocket
+subscribes with its own bounded queue. A slow viewer only loses its own oldest
+frames and never delays the simulation or the other viewers.
+"""
+import asyncio
+from typing import Any, Set
+
+
+class Subscription:
+    """A single subscriber's bounded frame queue with a drop-oldest policy."""
+
+    def __init__(self, maxsize: int):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, message: Any) -> None:
+        """Enqueues a message, discarding the oldest one if the queue is full."""
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(message)
+
+    async def get(self) -> Any:
+        """Waits for the next message."""
+        return await self._queue.get()
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class BroadcastHub:
+    """Publishes messages to every current subscriber. Used from one event loop."""
+
+    def __init__(self, queue_size: int = 8):
+        """
+        Args:
+            queue_size: Maximum undelivered messages kept per subscriber.
+        """
+        self.queue_size = queue_size
+        self._subscribers: Set[Subscription] = set()
+        self.published = 0
+
+    def subscribe(self) -> Subscription:
+        sub = Subscription(self.queue_size)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, message: Any) -> None:
+        """Delivers message to every subscriber without waiting on any of them."""
+        self.published += 1
+        for sub in self._subscribers:
+            sub.put(message)
+
+    def close(self) -> None:
+        """Sends the end-of-stream marker (None) to every subscriber."""
+        for sub in self._subscribers:
+            sub.put(None)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped": sum(sub.dropped for sub in self._subscribers),
+        }
@@ -6,11 +6,12 @@ inference pipeline independently, and records detection timestamps for
 latency comparison against edge detection.
 """
 import json
-import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from ..ml.feature_extraction import SlidingWindowFeatureExtractor
 from ..ml.model_loader import ModelLoader
+from .clock import WallClock
+from .persistence import DEFAULT_POLICY, PersistenceTracker
 
 
 class CentralServer:
@@ -18,23 +19,30 @@ class CentralServer:
     Mirrors VirtualNode ML inference, but centralized.
 
     Each node gets its own SlidingWindowFeatureExtractor and anomaly persistence
-    window (20 steps), identical to VirtualNode. Detection timestamps are recorded
-    on the False→True persistent-anomaly transition so latency_delta_ms reflects
-    the real gap between edge and central detection.
+    tracker (k-of-n, 1-of-20 by default), identical to VirtualNode. Detection
+    timestamps are recorded on the False→True persistent-anomaly transition so
+    latency_delta_ms reflects the real gap between edge and central detection.
+    Timestamps come from the given clock, so under a SimulatedClock latencies
+    are in simulated time.
     """
 
-    ANOMALY_PERSISTENCE_STEPS = 20
-
-    def __init__(self, model_loader: ModelLoader):
+    def __init__(self, model_loader: ModelLoader, clock=None,
+                 persistence: Tuple[int, int] = DEFAULT_POLICY):
         """
         Args:
             model_loader: Shared ModelLoader instance (same one used by VirtualNodes).
+            clock: Source of detection timestamps (WallClock or SimulatedClock).
+                   Defaults to the wall clock.
+            persistence: (k, n) anomaly persistence policy; should match the
+                         nodes' so edge and central detections are comparable.
         """
         self.model = model_loader
+        self.clock = clock if clock is not None else WallClock()
+        self.persistence = persistence
 
         # Per-node sliding windows and persistence state
         self._extractors: Dict[str, SlidingWindowFeatureExtractor] = {}
-        self._anomaly_flags: Dict[str, list] = {}   # rolling window of raw bool flags
+        self._anomaly_flags: Dict[str, PersistenceTracker] = {}  # last n raw flags per node
         self._prev_persistent: Dict[str, bool] = {} # last persistent state per node
 
         # Per-node stats / event records
@@ -47,8 +55,8 @@ class CentralServer:
     def _ensure_node(self, node_id: str) -> None:
         """Lazily initialise per-node state on first telemetry received."""
         if node_id not in self._extractors:
-            self._extractors[node_id] = SlidingWindowFeatureExtractor(window_size=10)
-            self._anomaly_flags[node_id] = []
+            self._extractors[node_id] = SlidingWindowFeatureExtractor(window_size=10, incremental=True)
+            self._anomaly_flags[node_id] = PersistenceTracker.from_policy(self.persistence)
             self._prev_persistent[node_id] = False
             self._records[node_id] = {
                 "injection_ts": None,
@@ -82,50 +90,84 @@ class CentralServer:
             raw_telemetry: Dict with keys temperature, humidity, airflow, cpu_load.
                            Must NOT contain anomaly_score / is_anomaly — raw only.
             seq_id: Step sequence number from the originating node.
-            edge_detection_ts: time.time() value from when the edge node first
+            edge_detection_ts: Clock time from when the edge node first
                                transitioned to persistent anomaly, or None if the
                                edge has not yet detected an anomaly.
             bytes_edge: Byte size of the full edge telemetry frame (including
                         anomaly fields). Pass this from the API layer when available.
         """
-        self._ensure_node(node_id)
-        record = self._records[node_id]
+        self.receive_telemetry_batch([{
+            "node_id": node_id,
+            "raw_telemetry": raw_telemetry,
+            "seq_id": seq_id,
+            "edge_detection_ts": edge_detection_ts,
+            "bytes_edge": bytes_edge,
+        }])
+
+    def receive_telemetry_batch(self, batch: Iterable[Dict[str, Any]]) -> None:
+        """
+        Feed one tick of telemetry from many nodes into the central pipeline.
 
-        # Track bandwidth: accumulate bytes received by central
-        record["bytes_central"] += len(json.dumps(raw_telemetry).encode())
-        record["last_updated"] = time.time()
+        Every ready window in the batch is scored with a single predict_batch()
+        call; bookkeeping per node is identical to receive_telemetry().
+
+        Args:
+            batch: Dicts with the receive_telemetry() arguments as keys
+                   (node_id, raw_telemetry, seq_id, edge_detection_ts and
+                   optionally bytes_edge).
+        """
+        ready_nodes: List[str] = []
+        ready_features: List[List[float]] = []
 
-        if bytes_edge is not None:
-            if record["bytes_edge"] is None:
-                record["bytes_edge"] = 0
-            record["bytes_edge"] += bytes_edge
+        for item in batch:
+            node_id = item["node_id"]
+            raw_telemetry = item["raw_telemetry"]
+            edge_detection_ts = item.get("edge_detection_ts")
+            bytes_edge = item.get("bytes_edge")
 
-        # Store edge detection timestamp — first occurrence per injection cycle only
-        if edge_detection_ts is not None and record["edge_detection_ts"] is None:
-            record["edge_detection_ts"] = edge_detection_ts
+            self._ensure_node(node_id)
+            record = self._records[node_id]
 
-        # Feed into this node's sliding window
-        extractor = self._extractors[node_id]
-        extractor.add_point(raw_telemetry)
+            # Track bandwidth: accumulate bytes received by central
+            record["bytes_central"] += len(json.dumps(raw_telemetry).encode())
+            record["last_updated"] = self.clock.now()
 
-        if not extractor.is_window_ready():
+            if bytes_edge is not None:
+                if record["bytes_edge"] is None:
+                    record["bytes_edge"] = 0
+                record["bytes_edge"] += bytes_edge
+
+            # Store edge detection timestamp — first occurrence per injection cycle only
+            if edge_detection_ts is not None and record["edge_detection_ts"] is None:
+                record["edge_detection_ts"] = edge_detection_ts
+
+            # Feed into this node's sliding window
+            extractor = self._extractors[node_id]
+            extractor.add_point(raw_telemetry)
+
+            if extractor.is_window_ready():
+                ready_nodes.append(node_id)
+                ready_features.append(extractor.extract_features())
+
+        if not ready_nodes:
             return
 
-        # Run inference
-        features = extractor.extract_features()
-        result = self.model.predict(features)
-        raw_flag: bool = result["is_anomaly"]
+        # Run inference for every ready window at once
+        results = self.model.predict_batch(ready_features)
+        for node_id, raw_flag in zip(ready_nodes, results["is_anomaly"]):
+            self._update_persistence(node_id, bool(raw_flag))
+
+    def _update_persistence(self, node_id: str, raw_flag: bool) -> None:
+        """Apply one raw model flag to the node's persistence window and detection record."""
+        record = self._records[node_id]
 
-        # Mirror VirtualNode anomaly persistence (20-step rolling window)
-        flags = self._anomaly_flags[node_id]
-        flags.append(raw_flag)
-        self._anomaly_flags[node_id] = flags[-self.ANOMALY_PERSISTENCE_STEPS:]
-        persistent_anomaly = any(flags)
+        # Mirror VirtualNode anomaly persistence
+        persistent_anomaly = self._anomaly_flags[node_id].update(raw_flag)
 
         # Record central_detection_ts on first False → True transition per injection cycle
         prev = self._prev_persistent[node_id]
         if persistent_anomaly and not prev and record["central_detection_ts"] is None:
-            record["central_detection_ts"] = time.time()
+            record["central_detection_ts"] = self.clock.now()
             injection_ts = record["injection_ts"]
             if record["edge_detection_ts"] is not None:
                 delta_ms = (record["central_detection_ts"] - record["edge_detection_ts"]) * 1000
@@ -164,7 +206,7 @@ class CentralServer:
             "last_updated": None,
         })
 
-        self._anomaly_flags[node_id] = []
+        self._anomaly_flags[node_id].reset()
         self._prev_persistent[node_id] = False
         
     def get_status(self) -> Dict[str, Any]:
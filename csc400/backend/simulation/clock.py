@@ -0,0 +1,97 @@
+"""
+Simulation clocks.
+
+Every timestamp the simulation records (telemetry, injections, edge and
+central detections) is read from a clock, so latency metrics are measured in
+the clock's time:
+
+    WallClock       real time; the simulation is paced by real sleeps
+    SimulatedClock  time advances only when the simulation steps, either at
+                    N x real speed or as fast as possible (speed=None)
+
+With a SimulatedClock, edge_latency_ms and central_latency_ms are exact
+multiples of the step length however fast the run was executed, so a day of
+scenario traffic can be replayed in minutes and still compared to a real-time
+run.
+"""
+import time
+from typing import Optional
+
+
+class WallClock:
+    """Real time. advance() is a no-op: real time moves on its own."""
+
+    speed = 1.0
+
+    def now(self) -> float:
+        return time.time()
+
+    def advance(self, seconds: float) -> float:
+        return self.now()
+
+    def wall_seconds(self, seconds: float) -> float:
+        """Real seconds that `seconds` of simulation time should take."""
+        return seconds
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+    def describe(self) -> dict:
+        return {"mode": "wall", "speed": 1.0, "now": self.now()}
+
+
+class SimulatedClock:
+    """Time that only moves when the simulation advances it."""
+
+    def __init__(self, start: Optional[float] = None, speed: Optional[float] = None):
+        """
+        Args:
+            start: Epoch seconds of the first step. Defaults to the current time.
+            speed: Simulated seconds per real second (e.g. 60 runs one
+                   simulated minute per second); None runs as fast as possible.
+        """
+        if speed is not None and speed <= 0:
+            raise ValueError("speed must be > 0 (or None for as fast as possible)")
+        self._now = time.time() if start is None else float(start)
+        self.speed = speed
+
+    def now(self) -> float:
+        return self._now
+
+    def advance(self, seconds: float) -> float:
+        """Moves simulated time forward and returns the new time."""
+        self._now += seconds
+        return self._now
+
+    def wall_seconds(self, seconds: float) -> float:
+        return 0.0 if self.speed is None else seconds / self.speed
+
+    def sleep(self, seconds: float) -> None:
+        """Waits the scaled real time, then advances simulated time."""
+        wall = self.wall_seconds(seconds)
+        if wall > 0:
+            time.sleep(wall)
+        self.advance(seconds)
+
+    def describe(self) -> dict:
+        return {"mode": "simulated", "speed": self.speed, "now": self._now}
+
+
+def parse_speed(value: Optional[str]) -> Optional[float]:
+    """Parses a speed setting: "max" -> None (as fast as possible), else a float."""
+    if value is None or value.strip().lower() in ("max", "fast", "inf"):
+        return None
+    return float(value)
+
+
+def make_clock(speed: Optional[str] = None, start: Optional[float] = None):
+    """
+    Builds the clock for a speed setting: unset or "1"/"realtime" keeps the
+    wall clock; a number or "max" gives a SimulatedClock.
+    """
+    if speed is None or speed.strip().lower() in ("", "realtime", "wall"):
+        return WallClock()
+    parsed = parse_speed(speed)
+    if parsed == 1.0 and start is None:
+        return WallClock()
+    return SimulatedClock(start=start, speed=parsed)
@@ -1,10 +1,106 @@
+import queue
 import sqlite3
+import threading
+import time
 from pathlib import Path
 
 # DB file path relative to project root
 DB_DIR = Path("db")
 DB_PATH = DB_DIR / "ehabitat.db"
 
+TELEMETRY_COLUMNS = (
+    "seq_id", "node_id", "timestamp", "temperature", "humidity",
+    "airflow", "cpu_load", "is_anomaly", "anomaly_score", "profile_id",
+)
+
+ANOMALY_EVENT_COLUMNS = (
+    "seq_id", "node_id", "injection_timestamp", "edge_detection_ts",
+    "central_detection_ts", "edge_latency_ms", "central_latency_ms",
+    "detection_source", "bytes_edge", "bytes_central", "profile_id",
+)
+
+
+def _insert_query(table_name: str, columns: tuple) -> str:
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+TELEMETRY_INSERT = _insert_query("telemetry", TELEMETRY_COLUMNS)
+ANOMALY_EVENT_INSERT = _insert_query("anomaly_events", ANOMALY_EVENT_COLUMNS)
+
+
+def _row(record: dict, columns: tuple) -> tuple:
+    """Orders a record by column; missing keys are stored as NULL."""
+    return tuple(record.get(col) for col in columns)
+
+
+# ----------------------------------------------------------------------
+# Rollups: per-node telemetry summaries at fixed bucket sizes (seconds),
+# kept up to date in the same transaction as the raw inserts
+# ----------------------------------------------------------------------
+
+ROLLUP_RESOLUTIONS = (10, 60, 3600)
+ROLLUP_METRICS = ("temperature", "humidity", "airflow", "cpu_load", "anomaly_score")
+# Raw telemetry is written once per node per simulation tick (1 Hz by default)
+RAW_SAMPLE_SECONDS = 1.0
+
+_ROLLUP_KEY = ("resolution", "node_id", "profile_key", "bucket")
+_ROLLUP_COLUMNS = _ROLLUP_KEY + ("sample_count", "anomaly_count", "last_ts") + tuple(
+    f"{m}_{stat}" for m in ROLLUP_METRICS for stat in ("min", "max", "sum", "count", "last")
+)
+
+ROLLUP_UPSERT = (
+    _insert_query("telemetry_rollup", _ROLLUP_COLUMNS)
+    + f" ON CONFLICT({', '.join(_ROLLUP_KEY)}) DO UPDATE SET "
+    + ", ".join(
+        [
+            "sample_count = sample_count + excluded.sample_count",
+            "anomaly_count = anomaly_count + excluded.anomaly_count",
+            "last_ts = MAX(last_ts, excluded.last_ts)",
+        ]
+        + [
+            # Right-hand sides see the pre-update row, so last_ts here is the old value
+            part
+            for m in ROLLUP_METRICS
+            for part in (
+                f"{m}_min = MIN(COALESCE(excluded.{m}_min, {m}_min), COALESCE({m}_min, excluded.{m}_min))",
+                f"{m}_max = MAX(COALESCE(excluded.{m}_max, {m}_max), COALESCE({m}_max, excluded.{m}_max))",
+                f"{m}_sum = COALESCE({m}_sum, 0) + COALESCE(excluded.{m}_sum, 0)",
+                f"{m}_count = {m}_count + excluded.{m}_count",
+                f"{m}_last = CASE WHEN excluded.last_ts >= last_ts THEN excluded.{m}_last ELSE {m}_last END",
+            )
+        ]
+    )
+)
+
+_TS = TELEMETRY_COLUMNS.index("timestamp")
+_NODE = TELEMETRY_COLUMNS.index("node_id")
+_ANOMALY = TELEMETRY_COLUMNS.index("is_anomaly")
+_PROFILE = TELEMETRY_COLUMNS.index("profile_id")
+_METRIC_IDX = tuple(TELEMETRY_COLUMNS.index(m) for m in ROLLUP_METRICS)
+
+
+def _rollup_rows(telemetry_rows):
+    """Yields one ROLLUP_UPSERT parameter tuple per telemetry row and resolution."""
+    for row in telemetry_rows:
+        ts = row[_TS]
+        # Rollup primary keys cannot hold NULL; profile ids start at 1
+        profile_key = row[_PROFILE] or 0
+        anomaly = 1 if row[_ANOMALY] else 0
+        stats = []
+        for i in _METRIC_IDX:
+            v = row[i]
+            stats.extend((v, v, v, 0 if v is None else 1, v))
+        for res in ROLLUP_RESOLUTIONS:
+            bucket = int(ts // res) * res
+            yield (res, row[_NODE], profile_key, bucket, 1, anomaly, ts, *stats)
+
+
+def _write_telemetry(conn: sqlite3.Connection, rows: list):
+    """Inserts telemetry tuples and folds them into the rollups (caller commits)."""
+    conn.executemany(TELEMETRY_INSERT, rows)
+    conn.executemany(ROLLUP_UPSERT, _rollup_rows(rows))
+
 
 def _ensure_column(
     cursor: sqlite3.Cursor,
@@ -20,12 +116,50 @@ def _ensure_column(
         )
 
 
+# ----------------------------------------------------------------------
+# Schema migrations. PRAGMA user_version records how many have been applied;
+# append new steps to MIGRATIONS and never reorder or edit applied ones.
+# ----------------------------------------------------------------------
+
+def _migration_1_composite_indexes(cursor: sqlite3.Cursor):
+    # Range lookups filter on node_id (+ profile_id) and a timestamp range;
+    # single-column indexes let SQLite use only one of those predicates.
+    # Not covering: range queries select every column, so each matching
+    # index entry is still followed by a rowid lookup into telemetry
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_telemetry_node_profile_ts "
+        "ON telemetry(node_id, profile_id, timestamp)"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_telemetry_node_ts ON telemetry(node_id, timestamp)"
+    )
+    # Covered by the prefix of both composite indexes
+    cursor.execute("DROP INDEX IF EXISTS idx_telemetry_node_id")
+
+
+MIGRATIONS = [
+    _migration_1_composite_indexes,
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def _migrate(cursor: sqlite3.Cursor):
+    """Applies every migration newer than the database's user_version."""
+    cursor.execute("PRAGMA user_version")
+    version = cursor.fetchone()[0]
+    for number in range(version + 1, SCHEMA_VERSION + 1):
+        MIGRATIONS[number - 1](cursor)
+        cursor.execute(f"PRAGMA user_version = {number}")
+
+
 def init_db():
     """Initializes the database, creates tables and indices if they don't exist."""
     if not DB_DIR.exists():
         DB_DIR.mkdir(parents=True, exist_ok=True)
 
     conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    # WAL lets the API read history while the TelemetryWriter is committing
+    conn.execute("PRAGMA journal_mode=WAL")
     cursor = conn.cursor()
 
     cursor.execute(
@@ -78,12 +212,34 @@ def init_db():
     _ensure_column(cursor, "telemetry", "profile_id", "INTEGER")
     _ensure_column(cursor, "anomaly_events", "profile_id", "INTEGER")
 
-    cursor.execute("CREATE INDEX IF NOT EXISTS idx_profiles_name ON profiles(name)")
     cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_telemetry_timestamp ON telemetry(timestamp)"
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'telemetry_rollup'"
+    )
+    rollup_is_new = cursor.fetchone() is None
+    metric_columns = ",\n".join(
+        f"            {m}_{stat} {'INTEGER NOT NULL' if stat == 'count' else 'REAL'}"
+        for m in ROLLUP_METRICS
+        for stat in ("min", "max", "sum", "count", "last")
     )
     cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_telemetry_node_id ON telemetry(node_id)"
+        f"""
+        CREATE TABLE IF NOT EXISTS telemetry_rollup (
+            resolution    INTEGER NOT NULL,
+            node_id       TEXT NOT NULL,
+            profile_key   INTEGER NOT NULL,
+            bucket        INTEGER NOT NULL,
+            sample_count  INTEGER NOT NULL,
+            anomaly_count INTEGER NOT NULL,
+            last_ts       REAL NOT NULL,
+{metric_columns},
+            PRIMARY KEY (resolution, node_id, profile_key, bucket)
+        ) WITHOUT ROWID
+        """
+    )
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_profiles_name ON profiles(name)")
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_telemetry_timestamp ON telemetry(timestamp)"
     )
     cursor.execute(
         "CREATE INDEX IF NOT EXISTS idx_telemetry_profile_id ON telemetry(profile_id)"
@@ -92,9 +248,40 @@ def init_db():
         "CREATE INDEX IF NOT EXISTS idx_anomaly_events_profile_id ON anomaly_events(profile_id)"
     )
 
+    _migrate(cursor)
+
     conn.commit()
     conn.close()
 
+    # Databases created before rollups existed: backfill from the raw rows
+    if rollup_is_new:
+        rebuild_rollups()
+
+
+def rebuild_rollups(chunk_size: int = 10_000) -> int:
+    """
+    Recomputes telemetry_rollup from the raw telemetry table.
+
+    Returns the number of telemetry rows folded in.
+    """
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    total = 0
+    try:
+        with conn:
+            conn.execute("DELETE FROM telemetry_rollup")
+            cursor = conn.execute(
+                f"SELECT {', '.join(TELEMETRY_COLUMNS)} FROM telemetry ORDER BY timestamp, id"
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                conn.executemany(ROLLUP_UPSERT, _rollup_rows(rows))
+                total += len(rows)
+    finally:
+        conn.close()
+    return total
+
 
 def get_profiles() -> list:
     query = "SELECT id, name, created_at FROM profiles ORDER BY LOWER(name) ASC"
@@ -138,19 +325,13 @@ def create_profile(name: str) -> dict:
 
 
 def insert_telemetry(record: dict):
-    """Inserts one row into telemetry. Dict keys must match column names."""
-    query = """
-        INSERT INTO telemetry (
-            seq_id, node_id, timestamp, temperature, humidity,
-            airflow, cpu_load, is_anomaly, anomaly_score, profile_id
-        ) VALUES (
-            :seq_id, :node_id, :timestamp, :temperature, :humidity,
-            :airflow, :cpu_load, :is_anomaly, :anomaly_score, :profile_id
-        )
+    """
+    Inserts one row into telemetry immediately. Keys match column names; missing
+    keys are stored as NULL. The simulation loop uses TelemetryWriter instead.
     """
     try:
         conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-        conn.execute(query, record)
+        _write_telemetry(conn, [_row(record, TELEMETRY_COLUMNS)])
         conn.commit()
         conn.close()
     except Exception as e:
@@ -158,58 +339,367 @@ def insert_telemetry(record: dict):
 
 
 def insert_anomaly_event(record: dict):
-    """Inserts one row into anomaly_events. Dict keys must match column names."""
-    query = """
-        INSERT INTO anomaly_events (
-            seq_id, node_id, injection_timestamp, edge_detection_ts,
-            central_detection_ts, edge_latency_ms, central_latency_ms,
-            detection_source, bytes_edge, bytes_central, profile_id
-        ) VALUES (
-            :seq_id, :node_id, :injection_timestamp, :edge_detection_ts,
-            :central_detection_ts, :edge_latency_ms, :central_latency_ms,
-            :detection_source, :bytes_edge, :bytes_central, :profile_id
-        )
+    """
+    Inserts one row into anomaly_events immediately. Keys match column names;
+    missing keys are stored as NULL.
     """
     try:
         conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-        conn.execute(query, record)
+        conn.execute(ANOMALY_EVENT_INSERT, _row(record, ANOMALY_EVENT_COLUMNS))
         conn.commit()
         conn.close()
     except Exception as e:
         print(f"Database error in insert_anomaly_event: {e}")
 
 
-def get_anomaly_events(profile_id: int | None = None) -> list:
-    """Returns anomaly rows ordered by injection_timestamp DESC."""
-    query = "SELECT * FROM anomaly_events"
-    params: list[int] = []
+class TelemetryWriter:
+    """
+    Write-behind queue for telemetry and anomaly event rows.
+
+    submit_*() only enqueues the row; a background thread owns one long-lived
+    WAL-mode connection and writes queued rows with executemany(), committing
+    once per batch and updating the rollups in the same transaction. A batch
+    is flushed when it reaches batch_size rows or when flush_interval seconds
+    have passed since its first row, so readers see new rows at most about
+    flush_interval late. If a batch fails, its rows are retried one at a time
+    so only the rows that fail on their own are dropped.
+
+    The queue is bounded. When it is full, submit blocks for up to put_timeout
+    seconds (backpressure on the producer) and then drops the row; both cases
+    are counted in metrics(). The thread starts on first use and close()
+    writes everything still queued before stopping it.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+    _POLL_SECONDS = 0.1
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        max_queue: int = 50_000,
+        put_timeout: float = 0.05,
+    ):
+        """
+        Args:
+            db_path: Database file; defaults to DB_PATH at the time the thread starts.
+            batch_size: Maximum rows per transaction.
+            flush_interval: Maximum seconds a row waits in a partial batch.
+            max_queue: Maximum rows waiting to be written.
+            put_timeout: Seconds submit() waits on a full queue before dropping.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "submitted": 0,
+            "written": 0,
+            "dropped": 0,
+            "blocked": 0,
+            "batches": 0,
+            "errors": 0,
+            "max_queue_depth": 0,
+            "last_batch_rows": 0,
+            "last_batch_ms": None,
+        }
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def submit_telemetry(self, record: dict) -> bool:
+        """Queues one telemetry row. Returns False if it was dropped."""
+        return self._submit((TELEMETRY_INSERT, _row(record, TELEMETRY_COLUMNS)))
+
+    def submit_anomaly_event(self, record: dict) -> bool:
+        """Queues one anomaly_events row. Returns False if it was dropped."""
+        return self._submit((ANOMALY_EVENT_INSERT, _row(record, ANOMALY_EVENT_COLUMNS)))
+
+    def _submit(self, item) -> bool:
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self._count("blocked")
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                self._count("dropped")
+                return False
+
+        depth = self._queue.qsize()
+        with self._stats_lock:
+            self._stats["submitted"] += 1
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Blocks until every row submitted before this call is committed.
+        Returns False on timeout or if the writer thread is not running.
+        """
+        thread = self._thread
+        if thread is None:
+            return True
+        if not thread.is_alive():
+            return False
+        done = threading.Event()
+        self._queue.put((self._FLUSH, done))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        # Wait in slices so a writer that dies meanwhile cannot hang the caller
+        while not done.wait(self._POLL_SECONDS):
+            if not thread.is_alive():
+                return done.is_set()
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def close(self, timeout: float | None = None):
+        """
+        Writes all queued rows, then stops the thread and closes the connection.
+        If the thread is still writing after timeout, it is kept (and still
+        reported as running) so a later close() can wait for it again.
+        """
+        with self._start_lock:
+            thread = self._thread
+            if thread is None:
+                return
+            if thread.is_alive() and not self._stopping:
+                self._queue.put((self._STOP, None))
+                self._stopping = True
+            thread.join(timeout)
+            if thread.is_alive():
+                return
+            self._thread = None
+            self._stopping = False
+
+    def metrics(self) -> dict:
+        """Counters for monitoring ingest and backpressure."""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["queue_capacity"] = self._queue.maxsize
+        stats["running"] = self._thread is not None and self._thread.is_alive()
+        return stats
+
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="telemetry-writer", daemon=True
+                )
+                self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path or DB_PATH))
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: fsync at checkpoints, not at every commit
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _run(self):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            print(f"Database error in TelemetryWriter: {e}")
+            self._count("errors")
+            return
+        try:
+            stopping = False
+            while not stopping:
+                batch, waiters, stopping = self._collect_batch()
+                if batch:
+                    self._write_batch(conn, batch)
+                for done in waiters:
+                    done.set()
+        finally:
+            conn.close()
+
+    def _collect_batch(self):
+        """Waits for the first row, then gathers more until the batch is full or due."""
+        batch, waiters = [], []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            query, payload = item
+            if query is self._STOP:
+                return batch, waiters, True
+            if query is self._FLUSH:
+                waiters.append(payload)
+                # Drain what is already queued, without waiting for the deadline
+                deadline = 0.0
+            else:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size:
+                return batch, waiters, False
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    item = self._queue.get(timeout=remaining)
+                else:
+                    item = self._queue.get_nowait()
+            except queue.Empty:
+                return batch, waiters, False
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: list):
+        started = time.perf_counter()
+        grouped: dict[str, list] = {}
+        for query, row in batch:
+            grouped.setdefault(query, []).append(row)
+        try:
+            with conn:
+                for query, rows in grouped.items():
+                    _write_rows(conn, query, rows)
+            written = len(batch)
+        except Exception as e:
+            print(f"Database error in TelemetryWriter: {e}")
+            self._count("errors")
+            written = self._write_rows_singly(conn, batch)
+
+        with self._stats_lock:
+            self._stats["written"] += written
+            self._stats["dropped"] += len(batch) - written
+            self._stats["batches"] += 1
+            self._stats["last_batch_rows"] = written
+            self._stats["last_batch_ms"] = (time.perf_counter() - started) * 1000.0
+
+    def _write_rows_singly(self, conn: sqlite3.Connection, batch: list) -> int:
+        """Retries a failed batch one row per transaction; returns the rows written."""
+        written = 0
+        for query, row in batch:
+            try:
+                with conn:
+                    _write_rows(conn, query, [row])
+                written += 1
+            except Exception as e:
+                print(f"Database error in TelemetryWriter, dropping row: {e}")
+        return written
+
+
+def _write_rows(conn: sqlite3.Connection, query: str, rows: list):
+    if query == TELEMETRY_INSERT:
+        _write_telemetry(conn, rows)
+    else:
+        conn.executemany(query, rows)
+
+
+def _iter_query(query: str, params: list, chunk_size: int = 1000):
+    """Yields rows as dicts while SQLite produces them, chunk_size at a time."""
+    conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    try:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for r in rows:
+                yield dict(r)
+    finally:
+        conn.close()
+
+
+def anomaly_events_query(
+    profile_id: int | None = None,
+    after: tuple[float, int] | None = None,
+    limit: int | None = None,
+) -> tuple[str, list]:
+    """
+    Builds the SQL for anomaly events, newest injection first.
+
+    Rows are ordered by (IFNULL(injection_timestamp, -1), id) DESC, so events
+    without an injection time come last. `after` is the key of the last row
+    of the previous page (keyset pagination).
+    """
+    query = "SELECT * FROM anomaly_events WHERE 1 = 1"
+    params: list[float | int] = []
 
     if profile_id is not None:
-        query += " WHERE profile_id = ?"
+        query += " AND profile_id = ?"
         params.append(profile_id)
 
-    query += " ORDER BY injection_timestamp DESC"
+    if after is not None:
+        query += (
+            " AND (IFNULL(injection_timestamp, -1) < ?"
+            " OR (IFNULL(injection_timestamp, -1) = ? AND id < ?))"
+        )
+        params.extend([after[0], after[0], after[1]])
+
+    query += " ORDER BY IFNULL(injection_timestamp, -1) DESC, id DESC"
+
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def anomaly_event_key(row: dict) -> tuple[float, int]:
+    """Keyset cursor of an anomaly event row, for anomaly_events_query(after=...)."""
+    injection_ts = row["injection_timestamp"]
+    return (-1 if injection_ts is None else injection_ts, row["id"])
 
+
+def iter_anomaly_events(
+    profile_id: int | None = None,
+    after: tuple[float, int] | None = None,
+    limit: int | None = None,
+):
+    """Streams anomaly event rows in anomaly_events_query() order."""
+    query, params = anomaly_events_query(profile_id, after, limit)
+    yield from _iter_query(query, params)
+
+
+def get_anomaly_events(
+    profile_id: int | None = None,
+    after: tuple[float, int] | None = None,
+    limit: int | None = None,
+) -> list:
+    """Returns anomaly rows ordered by injection_timestamp DESC (then id DESC)."""
     try:
-        conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+        return list(iter_anomaly_events(profile_id, after, limit))
     except Exception as e:
         print(f"Database error in get_anomaly_events: {e}")
         return []
 
 
-def get_telemetry_range(
+def telemetry_range_query(
     node_id: str,
     start: float,
     end: float,
     profile_id: int | None = None,
-) -> list:
-    """Returns telemetry rows for node_id between start and end timestamps, ordered ASC."""
+    after: tuple[float, int] | None = None,
+    limit: int | None = None,
+) -> tuple[str, list]:
+    """
+    Builds the SQL and parameters for a node's telemetry over [start, end].
+
+    Rows are ordered by (timestamp, id). `after` is the (timestamp, id) of the
+    last row of the previous page (keyset pagination). Served by
+    idx_telemetry_node_profile_ts when profile_id is given and by
+    idx_telemetry_node_ts otherwise (see test_database_schema.py). The index
+    narrows the scan to the node's range in order; every column is selected,
+    so each row is then read from the table by rowid.
+    """
     query = """
         SELECT * FROM telemetry
         WHERE node_id = ? AND timestamp >= ? AND timestamp <= ?
@@ -220,7 +710,142 @@ def get_telemetry_range(
         query += " AND profile_id = ?"
         params.append(profile_id)
 
-    query += " ORDER BY timestamp ASC"
+    if after is not None:
+        # The first predicate keeps the seek on the index; the second skips
+        # rows of the cursor's own timestamp that were already returned
+        query += " AND timestamp >= ? AND (timestamp > ? OR id > ?)"
+        params.extend([after[0], after[0], after[1]])
+
+    query += " ORDER BY timestamp ASC, id ASC"
+
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+
+def telemetry_key(row: dict) -> tuple[float, int]:
+    """Keyset cursor of a telemetry row, for telemetry_range_query(after=...)."""
+    return (row["timestamp"], row["id"])
+
+
+def iter_telemetry_range(
+    node_id: str,
+    start: float,
+    end: float,
+    profile_id: int | None = None,
+    after: tuple[float, int] | None = None,
+    limit: int | None = None,
+):
+    """Streams telemetry rows in telemetry_range_query() order."""
+    query, params = telemetry_range_query(node_id, start, end, profile_id, after, limit)
+    yield from _iter_query(query, params)
+
+
+def get_telemetry_range(
+    node_id: str,
+    start: float,
+    end: float,
+    profile_id: int | None = None,
+    after: tuple[float, int] | None = None,
+    limit: int | None = None,
+) -> list:
+    """Returns telemetry rows for node_id between start and end timestamps, ordered ASC."""
+    try:
+        return list(iter_telemetry_range(node_id, start, end, profile_id, after, limit))
+    except Exception as e:
+        print(f"Database error in get_telemetry_range: {e}")
+        return []
+
+
+def choose_resolution(start: float, end: float, max_points: int | None) -> int:
+    """
+    Picks the finest resolution (0 = raw rows) whose bucket count over
+    [start, end] fits in max_points. When even the coarsest rollup has too
+    many buckets, returns a multiple of it small enough that the merged
+    buckets (see get_telemetry_rollup) number at most max_points.
+    """
+    span = max(end - start, 0.0)
+    if max_points is None or span / RAW_SAMPLE_SECONDS <= max_points:
+        return 0
+    for res in ROLLUP_RESOLUTIONS:
+        # Buckets are aligned to multiples of res, so [start, end] touches
+        # (end - bucket of start) // res + 1 of them, not span / res
+        if (end - start // res * res) // res + 1 <= max_points:
+            return res
+    # Merged buckets start at the coarsest bucket holding start, so
+    # (end - base) // resolution + 1 <= max_points
+    coarsest = ROLLUP_RESOLUTIONS[-1]
+    base = start // coarsest * coarsest
+    return coarsest * (int((end - base) // (coarsest * max_points)) + 1)
+
+
+def _format_rollup(row: dict, profile_id: int | None) -> dict:
+    out = {
+        "node_id": row["node_id"],
+        "timestamp": row["bucket"],
+        "resolution": row["resolution"],
+        "profile_id": profile_id,
+        "sample_count": row["sample_count"],
+        "anomaly_count": row["anomaly_count"],
+        "is_anomaly": 1 if row["anomaly_count"] else 0,
+    }
+    for m in ROLLUP_METRICS:
+        count = row[f"{m}_count"]
+        out[m] = row[f"{m}_sum"] / count if count else None
+        out[f"{m}_min"] = row[f"{m}_min"]
+        out[f"{m}_max"] = row[f"{m}_max"]
+        out[f"{m}_last"] = row[f"{m}_last"]
+    return out
+
+
+def _merge_rollups(a: dict, b: dict) -> dict:
+    """Combines two rollup rows (different profiles, or adjacent buckets being downsampled)."""
+    merged = dict(a)
+    merged["sample_count"] = a["sample_count"] + b["sample_count"]
+    merged["anomaly_count"] = a["anomaly_count"] + b["anomaly_count"]
+    newer = b if b["last_ts"] >= a["last_ts"] else a
+    merged["last_ts"] = newer["last_ts"]
+    for m in ROLLUP_METRICS:
+        mins = [v for v in (a[f"{m}_min"], b[f"{m}_min"]) if v is not None]
+        maxs = [v for v in (a[f"{m}_max"], b[f"{m}_max"]) if v is not None]
+        merged[f"{m}_min"] = min(mins) if mins else None
+        merged[f"{m}_max"] = max(maxs) if maxs else None
+        merged[f"{m}_sum"] = (a[f"{m}_sum"] or 0) + (b[f"{m}_sum"] or 0)
+        merged[f"{m}_count"] = a[f"{m}_count"] + b[f"{m}_count"]
+        merged[f"{m}_last"] = newer[f"{m}_last"]
+    return merged
+
+
+def get_telemetry_rollup(
+    node_id: str,
+    start: float,
+    end: float,
+    resolution: int,
+    profile_id: int | None = None,
+) -> list:
+    """
+    Returns rollup buckets for node_id overlapping [start, end], ordered ASC.
+
+    Each row carries the bucket start as "timestamp", the mean of every metric
+    under its plain name plus *_min / *_max / *_last, and sample/anomaly counts.
+    With profile_id None, buckets of all profiles are merged. A resolution
+    coarser than the coarsest stored rollup merges its buckets into
+    resolution-sized ones, counted from the coarsest bucket holding start.
+    """
+    stored = min(resolution, ROLLUP_RESOLUTIONS[-1])
+    base = int(start // stored) * stored
+    query = """
+        SELECT * FROM telemetry_rollup
+        WHERE resolution = ? AND node_id = ? AND bucket >= ? AND bucket <= ?
+    """
+    params: list[float | str | int] = [stored, node_id, base, end]
+
+    if profile_id is not None:
+        query += " AND profile_key = ?"
+        params.append(profile_id)
+
+    query += " ORDER BY bucket ASC"
 
     try:
         conn = sqlite3.connect(str(DB_PATH), check_same_thread=False)
@@ -229,7 +854,37 @@ def get_telemetry_range(
         cursor.execute(query, params)
         rows = cursor.fetchall()
         conn.close()
-        return [dict(r) for r in rows]
     except Exception as e:
-        print(f"Database error in get_telemetry_range: {e}")
+        print(f"Database error in get_telemetry_rollup: {e}")
         return []
+
+    merged: list[dict] = []
+    for r in rows:
+        row = dict(r)
+        if resolution > stored:
+            row["bucket"] = base + (row["bucket"] - base) // resolution * resolution
+            row["resolution"] = resolution
+        if merged and merged[-1]["bucket"] == row["bucket"]:
+            merged[-1] = _merge_rollups(merged[-1], row)
+        else:
+            merged.append(row)
+    return [_format_rollup(row, profile_id) for row in merged]
+
+
+def get_telemetry_history(
+    node_id: str,
+    start: float,
+    end: float,
+    profile_id: int | None = None,
+    max_points: int | None = None,
+) -> tuple[int, list]:
+    """
+    Returns (resolution, rows) for a chart of node_id over [start, end].
+
+    Uses raw rows when they fit in max_points (or max_points is None),
+    otherwise the finest rollup that does; see choose_resolution().
+    """
+    resolution = choose_resolution(start, end, max_points)
+    if resolution == 0:
+        return 0, get_telemetry_range(node_id, start, end, profile_id=profile_id)
+    return resolution, get_telemetry_rollup(node_id, start, end, resolution, profile_id=profile_id)
@@ -0,0 +1,356 @@
+"""
+Columnar export of captured telemetry and anomaly events.
+
+Rows are copied out of the SQLite database into partitioned column files:
+
+    <out_dir>/telemetry/profile=<p>/node=<node_id>/date=<YYYY-MM-DD>/part-<first id>.npz
+    <out_dir>/anomaly_events/profile=<p>/date=<YYYY-MM-DD>/part-<first id>.npz
+
+where <p> is the profile id (0 for rows recorded without a profile) and the
+date is the UTC day of the row's timestamp. Each part holds one array per
+column, so readers load whole columns straight into NumPy.
+
+Exports are incremental: manifest.json records, per profile, the highest row
+id already exported, and the next run only appends parts for newer rows.
+Parquet parts are written instead of .npz with fmt="parquet" (needs pyarrow).
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from . import database
+
+MANIFEST_NAME = "manifest.json"
+FORMAT_VERSION = 1
+
+TELEMETRY_EXPORT_COLUMNS = ("id",) + database.TELEMETRY_COLUMNS
+ANOMALY_EVENT_EXPORT_COLUMNS = ("id",) + database.ANOMALY_EVENT_COLUMNS
+
+# Text columns are exported as unicode arrays; every other column as float64
+# (NULL -> NaN) except integer keys, which never hold NULL
+_TEXT_COLUMNS = {"node_id", "detection_source"}
+_INT_COLUMNS = {"id", "seq_id"}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet export requires pyarrow (pip install pyarrow); use fmt='npz' otherwise."
+        ) from e
+    return pyarrow
+
+
+def _to_columns(rows: List[tuple], columns: tuple) -> Dict[str, np.ndarray]:
+    """Turns row tuples into one typed NumPy array per column."""
+    raw = list(zip(*rows)) if rows else [()] * len(columns)
+    out = {}
+    for name, values in zip(columns, raw):
+        if name in _TEXT_COLUMNS:
+            out[name] = np.array(["" if v is None else v for v in values], dtype=str)
+        elif name in _INT_COLUMNS:
+            out[name] = np.array(values, dtype=np.int64)
+        else:
+            out[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+    return out
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d")
+
+
+class _PartitionBuffer:
+    """
+    Buffers rows per partition directory and writes them as part files.
+
+    A partition is written once it holds part_rows rows. At most buffer_rows
+    rows are held across all partitions: past that, the largest partition is
+    written early, so memory stays bounded however many node x day partitions
+    an export touches.
+    """
+
+    def __init__(self, root: Path, columns: tuple, fmt: str, part_rows: int, buffer_rows: int):
+        self.root = root
+        self.columns = columns
+        self.fmt = fmt
+        self.part_rows = part_rows
+        self.buffer_rows = buffer_rows
+        self._rows: Dict[str, List[tuple]] = {}
+        self._buffered = 0
+        self.written: List[dict] = []
+
+    def add(self, partition: str, row: tuple):
+        rows = self._rows.setdefault(partition, [])
+        rows.append(row)
+        self._buffered += 1
+        if len(rows) >= self.part_rows:
+            self._write(partition)
+        elif self._buffered >= self.buffer_rows:
+            self._write(max(self._rows, key=lambda p: len(self._rows[p])))
+
+    def close(self):
+        for partition in list(self._rows):
+            self._write(partition)
+
+    def _write(self, partition: str):
+        rows = self._rows.pop(partition, [])
+        if not rows:
+            return
+        self._buffered -= len(rows)
+        cols = _to_columns(rows, self.columns)
+        directory = self.root / partition
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{int(cols['id'][0]):012d}.{self.fmt}"
+
+        if self.fmt == "parquet":
+            pa = _import_pyarrow()
+            pa.parquet.write_table(pa.table(cols), str(path))
+        else:
+            np.savez(path, **cols)
+
+        self.written.append({
+            "path": str(path.relative_to(self.root.parent)),
+            "rows": len(rows),
+            "first_id": int(cols["id"][0]),
+            "last_id": int(cols["id"][-1]),
+        })
+
+
+def _load_manifest(out_dir: Path) -> dict:
+    path = out_dir / MANIFEST_NAME
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return {"format_version": FORMAT_VERSION, "profiles": {}, "parts": []}
+
+
+def _save_manifest(out_dir: Path, manifest: dict):
+    # Write then rename so a crash never leaves a truncated manifest
+    tmp = out_dir / (MANIFEST_NAME + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+
+
+def _export_table(
+    conn: sqlite3.Connection,
+    table: str,
+    columns: tuple,
+    out_dir: Path,
+    profile_id: Optional[int],
+    after_id: int,
+    start: Optional[float],
+    end: Optional[float],
+    time_column: str,
+    by_node: bool,
+    fmt: str,
+    part_rows: int,
+    buffer_rows: int,
+    chunk_size: int,
+):
+    profile_key = profile_id or 0
+    query = f"SELECT {', '.join(columns)} FROM {table} WHERE id > ?"
+    params: list = [after_id]
+    if profile_id is None:
+        query += " AND profile_id IS NULL"
+    else:
+        query += " AND profile_id = ?"
+        params.append(profile_id)
+    if start is not None:
+        query += f" AND {time_column} >= ?"
+        params.append(start)
+    if end is not None:
+        query += f" AND {time_column} <= ?"
+        params.append(end)
+    query += " ORDER BY id"
+
+    buffer = _PartitionBuffer(out_dir / table, columns, fmt, part_rows, buffer_rows)
+    node_idx = columns.index("node_id")
+    ts_idx = columns.index(time_column)
+    last_id = after_id
+
+    cursor = conn.execute(query, params)
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        for row in rows:
+            ts = row[ts_idx]
+            day = _day(ts) if ts is not None else "unknown"
+            partition = f"profile={profile_key}"
+            if by_node:
+                partition += f"/node={row[node_idx]}"
+            buffer.add(f"{partition}/date={day}", row)
+        last_id = rows[-1][0]
+
+    buffer.close()
+    return last_id, buffer.written
+
+
+def export_profile(
+    out_dir: str | Path,
+    profile_id: Optional[int] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    fmt: str = "npz",
+    part_rows: int = 500_000,
+    buffer_rows: int = 200_000,
+    chunk_size: int = 10_000,
+) -> dict:
+    """
+    Exports telemetry and anomaly events of one profile (None = rows recorded
+    without a profile) newer than the last export into out_dir.
+
+    The manifest keeps the highest exported row id, so rows skipped by a
+    start/end bound are not picked up by later runs unless their id is newer.
+
+    Args:
+        out_dir: Export root; created if missing.
+        profile_id: Profile to export.
+        start, end: Optional epoch-second bounds (telemetry timestamp,
+                    anomaly event injection_timestamp).
+        fmt: "npz" (NumPy only) or "parquet" (requires pyarrow).
+        part_rows: Maximum rows per part file.
+        buffer_rows: Maximum rows held in memory across all partitions; the
+                     largest partition is written early once reached.
+        chunk_size: Rows fetched from SQLite per round trip.
+
+    Returns:
+        Summary dict with the number of rows and parts written per table.
+    """
+    if fmt not in ("npz", "parquet"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet":
+        _import_pyarrow()
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest(out_dir)
+    state = manifest["profiles"].setdefault(
+        str(profile_id or 0), {"telemetry_last_id": 0, "anomaly_events_last_id": 0}
+    )
+
+    summary = {}
+    conn = sqlite3.connect(str(database.DB_PATH), check_same_thread=False)
+    try:
+        for table, columns, time_column, by_node in (
+            ("telemetry", TELEMETRY_EXPORT_COLUMNS, "timestamp", True),
+            ("anomaly_events", ANOMALY_EVENT_EXPORT_COLUMNS, "injection_timestamp", False),
+        ):
+            key = f"{table}_last_id"
+            last_id, parts = _export_table(
+                conn, table, columns, out_dir, profile_id, state[key],
+                start, end, time_column, by_node, fmt, part_rows, buffer_rows, chunk_size,
+            )
+            state[key] = last_id
+            manifest["parts"].extend({"table": table, **p} for p in parts)
+            summary[table] = {"rows": sum(p["rows"] for p in parts), "parts": len(parts)}
+    finally:
+        conn.close()
+
+    _save_manifest(out_dir, manifest)
+    return summary
+
+
+def _read_part(path: Path, columns: Optional[Iterable[str]]) -> Dict[str, np.ndarray]:
+    if path.suffix == ".parquet":
+        pa = _import_pyarrow()
+        table = pa.parquet.read_table(str(path), columns=list(columns) if columns else None)
+        return {name: table[name].to_numpy() for name in table.column_names}
+    with np.load(path) as data:
+        names = columns or data.files
+        return {name: data[name] for name in names}
+
+
+def read_table(
+    out_dir: str | Path,
+    table: str = "telemetry",
+    profile_id: Optional[int] = None,
+    node_ids: Optional[Iterable[str]] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    columns: Optional[Iterable[str]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Loads exported rows as one NumPy array per column, sorted by row id.
+
+    Partition directories are pruned by profile, node (telemetry only; events
+    are not partitioned by node and are filtered row by row) and day before
+    any file is opened. Missing numeric values are NaN and missing text is "".
+    """
+    out_dir = Path(out_dir)
+    root = out_dir / table / f"profile={profile_id or 0}"
+    time_column = "timestamp" if table == "telemetry" else "injection_timestamp"
+    wanted = None if columns is None else list(dict.fromkeys(["id", time_column, *columns]))
+    node_filter = None if node_ids is None else {str(n) for n in node_ids}
+    # node_id is needed for the row-level node filter even when not requested
+    loaded = wanted
+    if wanted is not None and node_filter is not None and "node_id" not in wanted:
+        loaded = wanted + ["node_id"]
+    first_day = _day(start) if start is not None else None
+    last_day = _day(end) if end is not None else None
+
+    parts = []
+    for path in sorted(root.rglob("part-*.*")):
+        labels = dict(p.split("=", 1) for p in path.relative_to(root).parts[:-1])
+        if node_filter is not None and "node" in labels and labels["node"] not in node_filter:
+            continue
+        day = labels.get("date")
+        if day != "unknown" and (
+            (first_day is not None and day < first_day) or (last_day is not None and day > last_day)
+        ):
+            continue
+        parts.append(_read_part(path, loaded))
+
+    export_columns = TELEMETRY_EXPORT_COLUMNS if table == "telemetry" else ANOMALY_EVENT_EXPORT_COLUMNS
+    names = wanted or list(export_columns)
+    if not parts:
+        return _to_columns([], tuple(names))
+
+    merged = {name: np.concatenate([p[name] for p in parts]) for name in loaded or names}
+    mask = np.ones(len(merged["id"]), dtype=bool)
+    if start is not None:
+        mask &= merged[time_column] >= start
+    if end is not None:
+        mask &= merged[time_column] <= end
+    if node_filter is not None:
+        mask &= np.isin(merged["node_id"], list(node_filter))
+    order = np.argsort(merged["id"][mask], kind="stable")
+    return {name: merged[name][mask][order] for name in names}
+
+
+def read_telemetry(out_dir: str | Path, profile_id: Optional[int] = None, **kwargs) -> Dict[str, np.ndarray]:
+    """read_table() for the telemetry table."""
+    return read_table(out_dir, "telemetry", profile_id=profile_id, **kwargs)
+
+
+def read_anomaly_events(out_dir: str | Path, profile_id: Optional[int] = None, **kwargs) -> Dict[str, np.ndarray]:
+    """read_table() for the anomaly_events table."""
+    return read_table(out_dir, "anomaly_events", profile_id=profile_id, **kwargs)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export captured telemetry to columnar files.")
+    parser.add_argument("out_dir")
+    parser.add_argument("--profile-id", type=int, default=None)
+    parser.add_argument("--start", type=float, default=None)
+    parser.add_argument("--end", type=float, default=None)
+    parser.add_argument("--format", choices=("npz", "parquet"), default="npz")
+    args = parser.parse_args()
+
+    summary = export_profile(args.out_dir, args.profile_id, args.start, args.end, fmt=args.format)
+    for table, stats in summary.items():
+        print(f"{table}: {stats['rows']} rows in {stats['parts']} part(s)")
+
+
+if __name__ == "__main__":
+    main()
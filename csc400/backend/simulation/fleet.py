@@ -0,0 +1,388 @@
+"""
+This module defines the FleetSimulator, a vectorized counterpart to VirtualNode
+that advances many simulated nodes at once using NumPy arrays.
+"""
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+from .node import VirtualNode
+
+
+# Fixed constants shared with the scalar models (see airflow.py / node.py)
+HVAC_SETPOINT = 20.88
+HVAC_GAIN = 0.05
+HVAC_FAILURE_RAMP_STEPS = 15.0
+CPU_AR_COEFF = 0.95
+CPU_MEAN_WEIGHT = 0.05
+CPU_TARGET = 0.5
+HUMIDITY_COUPLING = -0.3
+HUMIDITY_REVERSION = -0.05
+COOLANT_LEAK_RAMP_STEPS = 20
+COOLANT_LEAK_RATE = 2.5
+COOLANT_LEAK_CAP = 85.0
+
+
+class FleetSimulator:
+    """
+    Simulates a fleet of nodes with the same physics as VirtualNode, but with all
+    per-node state held in contiguous arrays and advanced in one vectorized step.
+
+    The per-step feedback loop is identical to VirtualNode.step():
+    1. Generate CPU load (AR(1) or thermal-spike override)
+    2. HVAC responds to the PREVIOUS step temperature (or HVAC failure / lag override)
+    3. New airflow affects current step cooling
+    4. Temperature changes based on new cooling
+    5. Humidity responds to the NEW temperature (then coolant-leak override)
+
+    Noise is drawn from a single numpy Generator, so a fleet run is reproducible
+    for a given seed but does not reproduce the per-node random.Random streams.
+    ML inference is not part of the fleet step; feed the returned arrays into the
+    feature extraction / model layer as needed.
+    """
+
+    def __init__(
+        self,
+        n_nodes: int,
+        *,
+        air_mass=50.0,
+        heat_capacity=1005.0,
+        heat_coefficient=500.0,
+        cooling_coefficient=300.0,
+        initial_temperature=21.0,
+        ambient_temperature=20.0,
+        nominal_flow=2.5,
+        initial_humidity=45.0,
+        humidity_drift=0.01,
+        humidity_noise=0.2,
+        reference_temp=21.0,
+        cpu_noise_std=0.02,
+        airflow_noise_std=0.08,
+        node_ids: Optional[Sequence[str]] = None,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initializes the FleetSimulator.
+
+        Every physical parameter accepts either a scalar (shared by all nodes) or
+        an array of length n_nodes. Defaults match make_node() in api.py.
+
+        Args:
+            n_nodes (int): Number of nodes in the fleet.
+            air_mass, heat_capacity, heat_coefficient, cooling_coefficient,
+            initial_temperature, ambient_temperature: ThermalModel parameters.
+            nominal_flow: AirflowModel nominal flow.
+            initial_humidity, humidity_drift, humidity_noise, reference_temp:
+                HumidityModel parameters (humidity_noise is the uniform amplitude).
+            cpu_noise_std (float): Std-dev of the AR(1) CPU load innovation.
+            airflow_noise_std (float): Std-dev of the HVAC airflow noise.
+            node_ids (Optional[Sequence[str]]): Node identifiers; defaults to
+                                                "node-1" .. "node-N".
+            seed (Optional[int]): Seed for the fleet random number generator.
+        """
+        if n_nodes < 1:
+            raise ValueError("n_nodes must be at least 1.")
+        self.n_nodes = int(n_nodes)
+
+        if node_ids is None:
+            node_ids = [f"node-{i + 1}" for i in range(self.n_nodes)]
+        if len(node_ids) != self.n_nodes:
+            raise ValueError("node_ids must have exactly n_nodes entries.")
+        self.node_ids = list(node_ids)
+        self._index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+
+        self.rng = np.random.default_rng(seed)
+        self.cpu_noise_std = float(cpu_noise_std)
+        self.airflow_noise_std = float(airflow_noise_std)
+
+        # Thermal parameters and state
+        self.thermal_mass = self._param(air_mass) * self._param(heat_capacity)
+        self.heat_coefficient = self._param(heat_coefficient)
+        self.cooling_coefficient = self._param(cooling_coefficient)
+        self.ambient_temperature = self._param(ambient_temperature)
+        self.temperature = self._param(initial_temperature)
+
+        # Airflow parameters and state
+        self.nominal_flow = self._param(nominal_flow)
+        self.obstruction_ratio = np.zeros(self.n_nodes)
+        self.current_flow = self.nominal_flow.copy()
+
+        # Humidity parameters and state
+        self.initial_humidity = self._param(initial_humidity)
+        self.humidity = self.initial_humidity.copy()
+        self.humidity_drift = self._param(humidity_drift)
+        self.humidity_noise = self._param(humidity_noise)
+        self.reference_temp = self._param(reference_temp)
+
+        # AR(1) CPU load state
+        self.cpu_load_state = np.full(self.n_nodes, CPU_TARGET)
+
+        # Anomaly injection state
+        self.spike_remaining_steps = np.zeros(self.n_nodes, dtype=np.int64)
+        self.cpu_load_override = np.zeros(self.n_nodes)
+        self.hvac_lag_steps = np.zeros(self.n_nodes, dtype=np.int64)
+        self.frozen_airflow = np.zeros(self.n_nodes)
+        self.hvac_failure_remaining_steps = np.zeros(self.n_nodes, dtype=np.int64)
+        self.hvac_failure_total_steps = np.zeros(self.n_nodes, dtype=np.int64)
+        self.coolant_leak_active = np.zeros(self.n_nodes, dtype=bool)
+        self.coolant_leak_remaining_steps = np.zeros(self.n_nodes, dtype=np.int64)
+        self.coolant_leak_base_humidity = np.zeros(self.n_nodes)
+
+    @classmethod
+    def from_nodes(
+        cls,
+        nodes: Iterable[VirtualNode],
+        cpu_noise_std: float = 0.02,
+        airflow_noise_std: float = 0.08,
+        seed: Optional[int] = None,
+    ) -> "FleetSimulator":
+        """
+        Builds a fleet that continues from the current state of existing VirtualNodes.
+
+        Args:
+            nodes (Iterable[VirtualNode]): Nodes whose parameters and state are copied.
+            cpu_noise_std (float): Std-dev of the AR(1) CPU load innovation.
+            airflow_noise_std (float): Std-dev of the HVAC airflow noise.
+            seed (Optional[int]): Seed for the fleet random number generator.
+
+        Returns:
+            FleetSimulator: A fleet with one entry per node, in iteration order.
+        """
+        nodes = list(nodes)
+
+        def collect(getter):
+            return np.array([getter(n) for n in nodes], dtype=float)
+
+        fleet = cls(
+            len(nodes),
+            air_mass=collect(lambda n: n.thermal_model.air_mass),
+            heat_capacity=collect(lambda n: n.thermal_model.heat_capacity),
+            heat_coefficient=collect(lambda n: n.thermal_model.heat_coefficient),
+            cooling_coefficient=collect(lambda n: n.thermal_model.cooling_coefficient),
+            initial_temperature=collect(lambda n: n.thermal_model.temperature),
+            ambient_temperature=collect(lambda n: n.thermal_model.ambient_temperature),
+            nominal_flow=collect(lambda n: n.airflow_model.nominal_flow),
+            initial_humidity=collect(lambda n: n.humidity_model.initial_humidity),
+            humidity_drift=collect(lambda n: n.humidity_model.drift),
+            humidity_noise=collect(lambda n: n.humidity_model.noise_amplitude),
+            reference_temp=collect(lambda n: n.humidity_model.reference_temp),
+            cpu_noise_std=cpu_noise_std,
+            airflow_noise_std=airflow_noise_std,
+            node_ids=[n.node_id for n in nodes],
+            seed=seed,
+        )
+
+        fleet.obstruction_ratio[:] = collect(lambda n: n.airflow_model.obstruction_ratio)
+        fleet.current_flow[:] = collect(lambda n: n.airflow_model.current_flow)
+        fleet.humidity[:] = collect(lambda n: n.humidity_model.current_humidity)
+        fleet.cpu_load_state[:] = collect(lambda n: n.cpu_load_state)
+
+        fleet.spike_remaining_steps[:] = [n.spike_remaining_steps for n in nodes]
+        fleet.cpu_load_override[:] = collect(lambda n: n.cpu_load_override)
+        fleet.hvac_lag_steps[:] = [n.hvac_lag_steps for n in nodes]
+        fleet.frozen_airflow[:] = collect(lambda n: n._frozen_airflow or 0.0)
+        fleet.hvac_failure_remaining_steps[:] = [n.hvac_failure_remaining_steps for n in nodes]
+        fleet.hvac_failure_total_steps[:] = [n.hvac_failure_total_steps for n in nodes]
+        fleet.coolant_leak_active[:] = [n.coolant_leak_active for n in nodes]
+        fleet.coolant_leak_remaining_steps[:] = [n.coolant_leak_remaining_steps for n in nodes]
+        fleet.coolant_leak_base_humidity[:] = collect(lambda n: n.coolant_leak_base_humidity)
+        return fleet
+
+    def _param(self, value) -> np.ndarray:
+        """Broadcasts a scalar or per-node parameter to a float array of length n_nodes."""
+        arr = np.asarray(value, dtype=float)
+        if arr.ndim == 0:
+            return np.full(self.n_nodes, float(arr))
+        if arr.shape != (self.n_nodes,):
+            raise ValueError(f"Expected a scalar or an array of length {self.n_nodes}.")
+        return arr.copy()
+
+    def index_of(self, node_id: str) -> int:
+        """Returns the array index of node_id."""
+        return self._index[node_id]
+
+    # ------------------------------------------------------------------
+    # Anomaly injection (mirrors VirtualNode.inject_*)
+    # ------------------------------------------------------------------
+
+    def inject_thermal_spike(self, idx, duration_seconds: int = 120, lag_seconds: int = 40):
+        """
+        Injects a thermal spike on the selected nodes by overriding CPU load.
+
+        Args:
+            idx: Node index, array of indices, or boolean mask.
+            duration_seconds (int): How many steps the spike should last.
+            lag_seconds (int): How many steps the HVAC should lag (unresponsive).
+        """
+        self.cpu_load_override[idx] = 1.0
+        self.spike_remaining_steps[idx] = duration_seconds
+        self.hvac_lag_steps[idx] = lag_seconds
+        # Reduce airflow to 15% during lag - HVAC not responding
+        self.frozen_airflow[idx] = self.current_flow[idx] * 0.15
+
+    def inject_hvac_failure(self, idx, duration_seconds: int = 40):
+        """
+        Injects a ramped HVAC failure on the selected nodes.
+
+        Args:
+            idx: Node index, array of indices, or boolean mask.
+            duration_seconds (int): Total steps the failure lasts.
+        """
+        self.hvac_failure_remaining_steps[idx] = duration_seconds
+        self.hvac_failure_total_steps[idx] = duration_seconds
+
+    def inject_coolant_leak(self, idx):
+        """
+        Injects a coolant leak (humidity ramp) on the selected nodes.
+
+        Args:
+            idx: Node index, array of indices, or boolean mask.
+        """
+        self.coolant_leak_active[idx] = True
+        self.coolant_leak_remaining_steps[idx] = COOLANT_LEAK_RAMP_STEPS
+        self.coolant_leak_base_humidity[idx] = self.humidity[idx]
+
+    def set_obstruction(self, idx, ratio: float):
+        """Sets the airflow obstruction ratio on the selected nodes (AirflowModel.set_obstruction)."""
+        ratio = max(0.0, min(1.0, float(ratio)))
+        self.obstruction_ratio[idx] = ratio
+        self.current_flow[idx] = self.nominal_flow[idx] * (1.0 - ratio)
+
+    # ------------------------------------------------------------------
+    # Simulation step
+    # ------------------------------------------------------------------
+
+    def _generate_cpu_load(self) -> np.ndarray:
+        """Advances the AR(1) CPU load state, honouring active thermal-spike overrides."""
+        spiking = self.spike_remaining_steps > 0
+        noise = self.rng.normal(0.0, self.cpu_noise_std, self.n_nodes)
+
+        ar_state = CPU_AR_COEFF * self.cpu_load_state + CPU_MEAN_WEIGHT * CPU_TARGET + noise
+        np.clip(ar_state, 0.1, 0.9, out=ar_state)
+
+        self.cpu_load_state = np.where(spiking, self.cpu_load_state, ar_state)
+        self.spike_remaining_steps[spiking] -= 1
+        return np.where(spiking, self.cpu_load_override, self.cpu_load_state)
+
+    def _step_airflow(self) -> np.ndarray:
+        """Computes this step's airflow from the previous step's temperature."""
+        failing = self.hvac_failure_remaining_steps > 0
+        lagging = ~failing & (self.hvac_lag_steps > 0)
+        normal = ~failing & ~lagging
+
+        airflow = np.empty(self.n_nodes)
+
+        # HVAC failure: linear ramp to full obstruction over the first 15 steps
+        if failing.any():
+            elapsed = self.hvac_failure_total_steps[failing] - self.hvac_failure_remaining_steps[failing]
+            ramp_ratio = np.minimum(1.0, elapsed / HVAC_FAILURE_RAMP_STEPS)
+            self.obstruction_ratio[failing] = ramp_ratio
+            flow = self.nominal_flow[failing] * (1.0 - ramp_ratio)
+            self.current_flow[failing] = flow
+            airflow[failing] = flow
+
+            self.hvac_failure_remaining_steps[failing] -= 1
+            cleared = failing & (self.hvac_failure_remaining_steps == 0)
+            self.obstruction_ratio[cleared] = 0.0
+
+        # HVAC lag: airflow frozen at the reduced level captured at injection
+        if lagging.any():
+            airflow[lagging] = self.frozen_airflow[lagging]
+            self.hvac_lag_steps[lagging] -= 1
+
+        # Normal HVAC feedback (AirflowModel.step)
+        noise = self.rng.normal(0.0, self.airflow_noise_std, self.n_nodes)
+        target_nominal = self.nominal_flow * (1.0 - self.obstruction_ratio)
+        hvac_response = HVAC_GAIN * (self.temperature - HVAC_SETPOINT)
+        flow = np.maximum(0.0, target_nominal + hvac_response + noise)
+        flow[self.obstruction_ratio >= 1.0] = 0.0
+        self.current_flow[normal] = flow[normal]
+        airflow[normal] = flow[normal]
+
+        return airflow
+
+    def step(self) -> dict:
+        """
+        Advances every node by one step.
+
+        Returns:
+            dict: Arrays of length n_nodes keyed by "temperature", "humidity",
+                  "airflow" and "cpu_load" (same fields as VirtualNode telemetry).
+        """
+        # 1. Generate CPU load
+        cpu_load = self._generate_cpu_load()
+
+        # 2. Airflow responds to last step's temperature
+        airflow = self._step_airflow()
+
+        # 3. Airflow ratio for cooling efficiency
+        airflow_ratio = np.divide(
+            airflow,
+            self.nominal_flow,
+            out=np.zeros(self.n_nodes),
+            where=self.nominal_flow > 0,
+        )
+
+        # 4. Thermal update (ThermalModel.step with dt=1)
+        clamped_cpu_load = np.clip(cpu_load, 0.0, 1.0)
+        p_heat = self.heat_coefficient * clamped_cpu_load
+        cooling_power = self.cooling_coefficient * airflow_ratio * (
+            self.temperature - self.ambient_temperature
+        )
+        temperature_change = np.divide(
+            p_heat - cooling_power,
+            self.thermal_mass,
+            out=np.zeros(self.n_nodes),
+            where=self.thermal_mass != 0,
+        )
+        self.temperature = self.temperature + temperature_change
+
+        # 5. Humidity update coupled to the NEW temperature (HumidityModel.step)
+        noise = self.rng.uniform(-1.0, 1.0, self.n_nodes) * self.humidity_noise
+        coupling_drift = HUMIDITY_COUPLING * (self.temperature - self.reference_temp) * 0.01
+        reversion = HUMIDITY_REVERSION * (self.humidity - self.initial_humidity)
+        self.humidity = np.clip(
+            self.humidity + self.humidity_drift + reversion + coupling_drift + noise,
+            0.0,
+            100.0,
+        )
+        humidity = self.humidity.copy()
+
+        # Coolant leak override — applied after physics
+        leaking = self.coolant_leak_active & (self.coolant_leak_remaining_steps > 0)
+        if leaking.any():
+            humidity[leaking] = np.minimum(
+                COOLANT_LEAK_CAP,
+                self.coolant_leak_base_humidity[leaking]
+                + COOLANT_LEAK_RATE
+                * (COOLANT_LEAK_RAMP_STEPS - self.coolant_leak_remaining_steps[leaking]),
+            )
+            self.coolant_leak_remaining_steps[leaking] -= 1
+        # Leaks whose ramp has finished clear on the following step
+        self.coolant_leak_active &= leaking
+
+        return {
+            "temperature": self.temperature.copy(),
+            "humidity": humidity,
+            "airflow": airflow,
+            "cpu_load": cpu_load,
+        }
+
+    def telemetry(self, frame: dict, idx: int) -> dict:
+        """
+        Converts one node's entry of a step() result into a VirtualNode-style dict.
+
+        Args:
+            frame (dict): The arrays returned by step().
+            idx (int): Node index.
+
+        Returns:
+            dict: Telemetry with node_id and the four physical readings.
+        """
+        return {
+            "node_id": self.node_ids[idx],
+            "temperature": float(frame["temperature"][idx]),
+            "humidity": float(frame["humidity"][idx]),
+            "airflow": float(frame["airflow"][idx]),
+            "cpu_load": float(frame["cpu_load"][idx]),
+        }
@@ -0,0 +1,287 @@
+"""
+Compact binary encoding of simulation frames for the /ws/simulation websocket.
+
+A frame is the per-tick dict {node_id: telemetry}. In binary form every node
+becomes one row of a fixed float32 matrix with the columns in FRAME_FIELDS
+(None -> NaN, booleans -> 0/1), and the frame carries a single float64 tick
+timestamp instead of one per node. A subscriber may select a subset of nodes
+and fields (a view); field_mask has bit i set when FRAME_FIELDS[i] is present,
+and the columns keep FRAME_FIELDS order.
+
+Layout (little-endian):
+
+    header   magic "EHF1" | version u8 | kind u8 | n_nodes u16 | n_fields u16 |
+             field_mask u16 | seq u32 | timestamp f64
+    keyframe node table: n_nodes x (u8 length + UTF-8 node id), then the
+             n_nodes x n_fields float32 matrix, row-major
+    delta    bitmask of changed cells (n_nodes * n_fields bits, row-major,
+             MSB first, numpy.packbits order), then the float32 values of the
+             changed cells in the same order
+
+Version 1 had no field_mask (every frame carried all FRAME_FIELDS); version
+2 added it, so decoders reject frames whose version they were not built for.
+Node ids are limited to MAX_NODE_ID_BYTES bytes of UTF-8 by the u8 length.
+
+A delta is relative to the frame with seq - 1 and is only valid for a client
+that received that frame with the same view; node order is the one of the
+last keyframe.
+"""
+import json
+import struct
+from typing import Dict, List, Optional
+
+import numpy as np
+
+MAGIC = b"EHF1"
+VERSION = 2
+KEYFRAME = 0
+DELTA = 1
+
+FRAME_FIELDS = (
+    "temperature", "humidity", "airflow", "cpu_load",
+    "anomaly_score", "is_anomaly", "obstruction_ratio",
+)
+
+MAX_NODE_ID_BYTES = 255
+
+_HEADER = struct.Struct("<4sBBHHHId")
+_ALL_FIELDS_MASK = (1 << len(FRAME_FIELDS)) - 1
+
+
+def frame_matrix(frame: Dict[str, dict], node_ids: List[str]) -> np.ndarray:
+    """Packs a frame into an (n_nodes, n_fields) float32 matrix."""
+    values = np.empty((len(node_ids), len(FRAME_FIELDS)), dtype=np.float32)
+    for i, node_id in enumerate(node_ids):
+        telemetry = frame[node_id]
+        for j, field in enumerate(FRAME_FIELDS):
+            v = telemetry.get(field)
+            values[i, j] = np.nan if v is None else float(v)
+    return values
+
+
+def _node_table(node_ids: List[str]) -> bytes:
+    """Keyframe node table: a u8 length and the UTF-8 bytes of each node id."""
+    table = bytearray()
+    for node_id in node_ids:
+        encoded = node_id.encode("utf-8")
+        if len(encoded) > MAX_NODE_ID_BYTES:
+            raise ValueError(
+                f"Node id {node_id[:32]!r}... is {len(encoded)} bytes in UTF-8; "
+                f"EHF1 frames allow at most {MAX_NODE_ID_BYTES}"
+            )
+        table.append(len(encoded))
+        table += encoded
+    return bytes(table)
+
+
+class EncodedFrame:
+    """
+    One tick's frame with its encodings, shared by every subscriber.
+
+    The full JSON text is built once when the frame is created. The float32
+    matrix, views (node and field subsets) and the binary keyframe / delta of
+    each view are built on first request and cached, so ticks without a
+    binary subscriber never pack the matrix and subscribers sharing a view
+    share the work.
+    """
+
+    def __init__(
+        self,
+        seq: int,
+        timestamp: float,
+        frame: Dict[str, dict],
+        text: str,
+        node_ids: List[str],
+        previous: Optional["EncodedFrame"],
+    ):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.frame = frame
+        self.text = text
+        self.node_ids = node_ids
+        # Deltas need the previous tick's values and the same node order. Only
+        # its frame dict is kept, not the EncodedFrame, so frames do not chain
+        self._previous_frame = (
+            previous.frame if previous is not None and previous.node_ids == node_ids else None
+        )
+        self._cache: Dict[tuple, object] = {}
+
+    @property
+    def values(self) -> np.ndarray:
+        """The frame as an (n_nodes, n_fields) float32 matrix."""
+        return self._cached(("values",), lambda: frame_matrix(self.frame, self.node_ids))
+
+    @property
+    def _previous_values(self) -> np.ndarray:
+        return self._cached(("previous",), lambda: frame_matrix(self._previous_frame, self.node_ids))
+
+    def _cached(self, key: tuple, build):
+        if key not in self._cache:
+            self._cache[key] = build()
+        return self._cache[key]
+
+    def _view_index(self, nodes: Optional[tuple], fields: Optional[tuple]):
+        """Row indexes, column indexes and field mask of a view (None = all)."""
+        if nodes is None:
+            rows = None
+            view_nodes = self.node_ids
+        else:
+            wanted = set(nodes)
+            rows = [i for i, node_id in enumerate(self.node_ids) if node_id in wanted]
+            view_nodes = [self.node_ids[i] for i in rows]
+        if fields is None:
+            cols, mask = None, _ALL_FIELDS_MASK
+        else:
+            cols = [j for j, field in enumerate(FRAME_FIELDS) if field in fields]
+            mask = sum(1 << j for j in cols)
+        return view_nodes, rows, cols, mask
+
+    @staticmethod
+    def _select(values: np.ndarray, rows, cols) -> np.ndarray:
+        if rows is not None:
+            values = values[rows]
+        if cols is not None:
+            values = values[:, cols]
+        return values
+
+    def _header(self, kind: int, shape: tuple, field_mask: int) -> bytes:
+        n_nodes, n_fields = shape
+        return _HEADER.pack(
+            MAGIC, VERSION, kind, n_nodes, n_fields, field_mask, self.seq & 0xFFFFFFFF, self.timestamp
+        )
+
+    def text_view(self, nodes: Optional[tuple] = None, fields: Optional[tuple] = None) -> str:
+        """JSON text restricted to the given node ids and telemetry keys."""
+        if nodes is None and fields is None:
+            return self.text
+
+        def build():
+            wanted = None if nodes is None else set(nodes)
+            selected = [n for n in self.node_ids if wanted is None or n in wanted]
+            return json.dumps({
+                node_id: (
+                    self.frame[node_id] if fields is None
+                    else {k: v for k, v in self.frame[node_id].items() if k in fields}
+                )
+                for node_id in selected
+            })
+
+        return self._cached(("text", nodes, fields), build)
+
+    def keyframe(self, nodes: Optional[tuple] = None, fields: Optional[tuple] = None) -> bytes:
+        def build():
+            view_nodes, rows, cols, mask = self._view_index(nodes, fields)
+            table = _node_table(view_nodes)
+            values = self._select(self.values, rows, cols)
+            return self._header(KEYFRAME, values.shape, mask) + table + np.ascontiguousarray(values).tobytes()
+
+        return self._cached(("key", nodes, fields), build)
+
+    def has_delta(self) -> bool:
+        return self._previous_frame is not None
+
+    def delta(self, nodes: Optional[tuple] = None, fields: Optional[tuple] = None) -> bytes:
+        """Delta against the previous tick; call only if has_delta()."""
+        def build():
+            _, rows, cols, mask = self._view_index(nodes, fields)
+            prev = self._select(self._previous_values, rows, cols)
+            curr = self._select(self.values, rows, cols)
+            # NaN -> NaN (e.g. no score yet) is not a change
+            changed = (prev != curr) & ~(np.isnan(prev) & np.isnan(curr))
+            flat = changed.ravel()
+            return (
+                self._header(DELTA, curr.shape, mask)
+                + np.packbits(flat).tobytes()
+                + np.ascontiguousarray(curr).ravel()[flat].tobytes()
+            )
+
+        return self._cached(("delta", nodes, fields), build)
+
+    def binary(self, use_delta: bool, nodes: Optional[tuple] = None, fields: Optional[tuple] = None) -> bytes:
+        """The delta if requested and available, otherwise the keyframe."""
+        if use_delta and self.has_delta():
+            return self.delta(nodes, fields)
+        return self.keyframe(nodes, fields)
+
+
+class FrameEncoder:
+    """Wraps consecutive frames into EncodedFrames, linking each to the last."""
+
+    def __init__(self):
+        self.seq = 0
+        self._last: Optional[EncodedFrame] = None
+
+    def encode(self, frame: Dict[str, dict], text: Optional[str] = None) -> EncodedFrame:
+        """
+        Args:
+            frame: {node_id: telemetry} for one tick.
+            text: The frame's JSON text, if the caller already built it.
+        """
+        self.seq += 1
+        node_ids = list(frame)
+        timestamp = max((t.get("timestamp") or 0.0 for t in frame.values()), default=0.0)
+        encoded = EncodedFrame(
+            seq=self.seq,
+            timestamp=float(timestamp),
+            frame=frame,
+            text=text if text is not None else json.dumps(frame),
+            node_ids=node_ids,
+            previous=self._last,
+        )
+        self._last = encoded
+        return encoded
+
+
+class FrameDecoder:
+    """Reference client-side decoder; keeps the state deltas are applied to."""
+
+    def __init__(self):
+        self.node_ids: Optional[List[str]] = None
+        self.values: Optional[np.ndarray] = None
+        self.seq: Optional[int] = None
+
+    def decode(self, data: bytes) -> dict:
+        """
+        Returns {"seq", "timestamp", "nodes": {node_id: {field: value}}}, with
+        NaN decoded back to None and is_anomaly to a bool.
+        """
+        if data[:4] != MAGIC:
+            raise ValueError("Not an EHF1 frame")
+        if data[4] != VERSION:
+            raise ValueError(f"Unsupported EHF1 frame version {data[4]} (expected {VERSION})")
+        magic, version, kind, n_nodes, n_fields, field_mask, seq, timestamp = _HEADER.unpack_from(data)
+        offset = _HEADER.size
+
+        if kind == KEYFRAME:
+            node_ids = []
+            for _ in range(n_nodes):
+                length = data[offset]
+                node_ids.append(data[offset + 1:offset + 1 + length].decode("utf-8"))
+                offset += 1 + length
+            self.node_ids = node_ids
+            self.values = np.frombuffer(data, dtype=np.float32, count=n_nodes * n_fields,
+                                        offset=offset).reshape(n_nodes, n_fields).copy()
+        elif kind == DELTA:
+            if self.values is None or self.seq is None or seq != (self.seq + 1) & 0xFFFFFFFF:
+                raise ValueError("Delta frame does not follow the last decoded frame")
+            n_cells = n_nodes * n_fields
+            mask_len = (n_cells + 7) // 8
+            mask = np.unpackbits(np.frombuffer(data, dtype=np.uint8, count=mask_len, offset=offset),
+                                 count=n_cells).astype(bool)
+            changed = np.frombuffer(data, dtype=np.float32, count=int(mask.sum()), offset=offset + mask_len)
+            flat = self.values.ravel()
+            flat[mask] = changed
+        else:
+            raise ValueError(f"Unknown frame kind {kind}")
+
+        self.seq = seq
+        fields = [f for j, f in enumerate(FRAME_FIELDS) if field_mask & (1 << j)]
+        nodes = {}
+        for node_id, row in zip(self.node_ids, self.values):
+            telemetry = {}
+            for field, v in zip(fields, row.tolist()):
+                telemetry[field] = None if v != v else v
+            if "is_anomaly" in telemetry:
+                telemetry["is_anomaly"] = bool(telemetry["is_anomaly"])
+            nodes[node_id] = telemetry
+        return {"seq": seq, "timestamp": timestamp, "nodes": nodes}
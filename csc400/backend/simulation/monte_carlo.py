@@ -0,0 +1,276 @@
+"""
+Monte Carlo detection-latency experiments.
+
+Runs many independent single-node trials, each defined by a
+(seed, scenario, injection step) combination, across a process pool, and
+aggregates edge detection latency and false-positive statistics per scenario.
+
+A trial steps one VirtualNode on a SimulatedClock (one simulated second per
+step) for injection_step steps of clean traffic, injects the scenario with the
+same VirtualNode.inject_* call and parameters as the API, then keeps stepping
+for up to `horizon` steps. Detection is the first step after the
+injection whose persistent is_anomaly flag is set, as in the API's edge
+transition logic. Flags raised before the injection are false positives.
+The "none" scenario injects nothing and only measures false positives.
+
+Run with:
+    PYTHONPATH=. python -m backend.simulation.monte_carlo --seeds 1000 --out results.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from ..ml.model_registry import get_model
+from .airflow import AirflowModel
+from .clock import SimulatedClock
+from .humidity import HumidityModel
+from .node import VirtualNode
+from .thermal_model import ThermalModel
+
+# Same scenario parameters as /simulation/inject
+SCENARIOS = {
+    "hvac_failure": lambda node: node.inject_hvac_failure(duration_seconds=40),
+    "thermal_spike": lambda node: node.inject_thermal_spike(duration_seconds=30),
+    "coolant_leak": lambda node: node.inject_coolant_leak(),
+    "none": lambda node: None,
+}
+
+RESULT_FIELDS = (
+    "seed", "scenario", "injection_step", "horizon", "detected", "latency_ms",
+    "anomalous_at_injection", "false_alarms", "false_positive_steps", "scored_steps",
+)
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+
+
+def make_trial_node(seed: int, model, clock: SimulatedClock) -> VirtualNode:
+    """Builds a node the way the API does, with every component seeded from seed."""
+    thermal = ThermalModel(50.0, 1005.0, 500.0, 300.0, 21.0, 20.0)
+    airflow = AirflowModel(nominal_flow=2.5, random_seed=seed + 1000)
+    humidity = HumidityModel(45.0, 0.01, 0.2, seed + 2000, reference_temp=21.0)
+    return VirtualNode(
+        f"mc-{seed}", thermal, airflow, humidity,
+        random_seed=seed + 3000, anomaly_model=model, clock=clock,
+    )
+
+
+def build_trials(
+    seeds: Iterable[int],
+    scenarios: Sequence[str],
+    injection_steps: Sequence[int],
+    horizon: int,
+) -> Iterator[tuple]:
+    """Yields (seed, scenario, injection_step, horizon) for every combination."""
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    for seed, scenario, injection_step in itertools.product(seeds, scenarios, injection_steps):
+        yield seed, scenario, injection_step, horizon
+
+
+def run_trial(trial: tuple, model=None) -> Dict[str, Any]:
+    """
+    Runs one trial and returns its result row (see RESULT_FIELDS).
+
+    Args:
+        trial: (seed, scenario, injection_step, horizon).
+        model: ModelLoader to score with; defaults to the worker's model.
+    """
+    seed, scenario, injection_step, horizon = trial
+    model = model if model is not None else _worker_model
+    clock = SimulatedClock(start=0.0, speed=None)
+    node = make_trial_node(seed, model, clock)
+
+    false_alarms = false_positive_steps = scored_steps = 0
+    prev = False
+    for _ in range(injection_step):
+        clock.advance(1.0)
+        telemetry = node.step()
+        flag = bool(telemetry["is_anomaly"])
+        if telemetry["anomaly_score"] is not None:
+            scored_steps += 1
+        false_positive_steps += flag
+        false_alarms += flag and not prev
+        prev = flag
+
+    SCENARIOS[scenario](node)
+    injection_ts = clock.now()
+    detection_ts = None
+    if scenario != "none":
+        for _ in range(horizon):
+            clock.advance(1.0)
+            if node.step()["is_anomaly"]:
+                detection_ts = clock.now()
+                break
+
+    return {
+        "seed": seed,
+        "scenario": scenario,
+        "injection_step": injection_step,
+        "horizon": horizon,
+        "detected": detection_ts is not None,
+        "latency_ms": None if detection_ts is None else round((detection_ts - injection_ts) * 1000, 3),
+        "anomalous_at_injection": prev,
+        "false_alarms": false_alarms,
+        "false_positive_steps": false_positive_steps,
+        "scored_steps": scored_steps,
+    }
+
+
+def _init_worker(model_path: Optional[str], scaler_path: Optional[str]):
+    global _worker_model
+    _worker_model = get_model(model_path, scaler_path)
+
+
+def _run_chunk(trials: List[tuple]) -> List[Dict[str, Any]]:
+    return [run_trial(trial) for trial in trials]
+
+
+def _chunks(items: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    it = iter(items)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_experiment(
+    trials: Iterable[tuple],
+    workers: Optional[int] = None,
+    chunk_size: int = 16,
+    model_path: Optional[str] = None,
+    scaler_path: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Runs trials across a process pool and yields result rows in trial order.
+
+    Each worker loads the model once. workers=0 runs in-process (no pool),
+    which is easier to debug and profile.
+    """
+    if workers == 0:
+        _init_worker(model_path, scaler_path)
+        for trial in trials:
+            yield run_trial(trial)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_path, scaler_path),
+    ) as executor:
+        for rows in executor.map(_run_chunk, _chunks(trials, chunk_size)):
+            yield from rows
+
+
+def summarize(results: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregates result rows per scenario: detection rate, latency distribution
+    (ms, detected trials only) and false positives before the injection.
+
+    Trials already persistently anomalous at the injection are counted under
+    anomalous_at_injection but left out of the detection rate and latencies:
+    their "detection" is a carried-over false positive, not a response to
+    the injection.
+    """
+    by_scenario: Dict[str, List[Dict[str, Any]]] = {}
+    for row in results:
+        by_scenario.setdefault(row["scenario"], []).append(row)
+
+    summary = {}
+    for scenario, rows in sorted(by_scenario.items()):
+        clean_at_injection = [r for r in rows if not r["anomalous_at_injection"]]
+        latencies = np.array(
+            [r["latency_ms"] for r in clean_at_injection if r["latency_ms"] is not None], dtype=float
+        )
+        false_alarms = np.array([r["false_alarms"] for r in rows], dtype=float)
+        fp_steps = sum(r["false_positive_steps"] for r in rows)
+        scored = sum(r["scored_steps"] for r in rows)
+        clean_seconds = sum(r["injection_step"] for r in rows)
+
+        entry = {
+            "trials": len(rows),
+            "false_alarm_trials": int((false_alarms > 0).sum()),
+            "false_alarms_per_hour": float(false_alarms.sum() * 3600 / clean_seconds) if clean_seconds else None,
+            "false_positive_step_rate": fp_steps / scored if scored else None,
+            "anomalous_at_injection": sum(bool(r["anomalous_at_injection"]) for r in rows),
+        }
+        if scenario != "none":
+            entry["detection_rate"] = len(latencies) / len(clean_at_injection) if clean_at_injection else None
+            entry["latency_ms"] = None if not len(latencies) else {
+                "mean": float(latencies.mean()),
+                "min": float(latencies.min()),
+                "p50": float(np.percentile(latencies, 50)),
+                "p90": float(np.percentile(latencies, 90)),
+                "p99": float(np.percentile(latencies, 99)),
+                "max": float(latencies.max()),
+            }
+        summary[scenario] = entry
+    return summary
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo detection-latency experiments.")
+    parser.add_argument("--seeds", type=int, default=100, help="Number of seeds per combination.")
+    parser.add_argument("--seed-start", type=int, default=0)
+    parser.add_argument("--scenarios", default="hvac_failure,thermal_spike,coolant_leak,none")
+    parser.add_argument("--injection-steps", default="60,300",
+                        help="Comma-separated clean steps before the injection.")
+    parser.add_argument("--horizon", type=int, default=120, help="Steps allowed for detection.")
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (0 = in-process).")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Trials per pool task.")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--scaler", default=None)
+    parser.add_argument("--out", default=None, help="CSV file for per-trial results.")
+    parser.add_argument("--summary", default=None, help="JSON file for the summary (default stdout).")
+    args = parser.parse_args()
+
+    trials = build_trials(
+        range(args.seed_start, args.seed_start + args.seeds),
+        [s.strip() for s in args.scenarios.split(",") if s.strip()],
+        _int_list(args.injection_steps),
+        args.horizon,
+    )
+
+    results = []
+    out = open(args.out, "w", newline="") if args.out else None
+    try:
+        writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS) if out else None
+        if writer:
+            writer.writeheader()
+        for i, row in enumerate(run_experiment(
+            trials, args.workers, args.chunk_size, args.model, args.scaler
+        ), start=1):
+            results.append(row)
+            if writer:
+                writer.writerow(row)
+            if i % 1000 == 0:
+                print(f"Progress: {i} trials completed.", file=sys.stderr)
+    finally:
+        if out:
+            out.close()
+
+    summary = summarize(results)
+    if args.summary:
+        if os.path.dirname(args.summary):
+            os.makedirs(os.path.dirname(args.summary), exist_ok=True)
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+    else:
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,16 @@ to simulate a single compute node.
 """
 import random
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from .thermal_model import ThermalModel
 from .airflow import AirflowModel
 from .humidity import HumidityModel
 from ..ml.feature_extraction import SlidingWindowFeatureExtractor
 from ..ml.model_loader import ModelLoader
+from ..ml.model_registry import get_model
+from .clock import WallClock
+from .persistence import DEFAULT_POLICY, PersistenceTracker
 
 
 class VirtualNode:
@@ -26,6 +29,9 @@ class VirtualNode:
         airflow_model: AirflowModel,
         humidity_model: HumidityModel,
         random_seed: Optional[int] = None,
+        anomaly_model: Optional[ModelLoader] = None,
+        clock=None,
+        persistence: Tuple[int, int] = DEFAULT_POLICY,
     ):
         """
         Initializes the VirtualNode.
@@ -37,11 +43,20 @@ class VirtualNode:
             humidity_model (HumidityModel): The humidity model instance.
             random_seed (Optional[int]): An optional seed for the random number
                                          generator to ensure deterministic runs.
+            anomaly_model (Optional[ModelLoader]): Model used for edge inference.
+                                                   Defaults to the process-wide
+                                                   shared model from the registry.
+            clock: Source of telemetry timestamps (WallClock or SimulatedClock).
+                   Defaults to the wall clock.
+            persistence (Tuple[int, int]): (k, n) anomaly persistence policy: is_anomaly
+                                           is set while k of the last n raw model flags
+                                           are. Defaults to 1-of-20.
         """
         self.node_id = node_id
         self.thermal_model = thermal_model
         self.airflow_model = airflow_model
         self.humidity_model = humidity_model
+        self.clock = clock if clock is not None else WallClock()
         if random_seed is not None:
             self.rng = random.Random(random_seed)
         else:
@@ -59,27 +74,26 @@ class VirtualNode:
         self.coolant_leak_base_humidity = 0.0
         
         # Anomaly Persistence State
-        self.recent_anomaly_flags = []
-        self.anomaly_persistence_steps = 20
+        self.anomaly_persistence = PersistenceTracker.from_policy(persistence)
         
         # AR(1) CPU Load State
         self.cpu_load_state = 0.5
 
         # ML Inference State
-        self.feature_extractor = SlidingWindowFeatureExtractor(window_size=10)
-        try:
-            self.anomaly_model = ModelLoader()
-        except FileNotFoundError:
-            self.anomaly_model = None
-            print(f'[{self.node_id}] Warning: No model found, anomaly detection disabled')
-        except Exception as e:
-            self.anomaly_model = None
-            print(f'[{self.node_id}] Warning: Failed to load model ({e}), anomaly detection disabled')
+        self.feature_extractor = SlidingWindowFeatureExtractor(window_size=10, incremental=True)
+        if anomaly_model is None:
+            try:
+                anomaly_model = get_model()
+            except FileNotFoundError:
+                print(f'[{self.node_id}] Warning: No model found, anomaly detection disabled')
+            except Exception as e:
+                print(f'[{self.node_id}] Warning: Failed to load model ({e}), anomaly detection disabled')
+        self.anomaly_model = anomaly_model
 
     def reset_anomaly_state(self):
         """Resets the ML feature window and anomaly persistence flags."""
-        self.recent_anomaly_flags = []
-        self.feature_extractor = SlidingWindowFeatureExtractor(window_size=10)
+        self.anomaly_persistence.reset()
+        self.feature_extractor = SlidingWindowFeatureExtractor(window_size=10, incremental=True)
 
     def inject_thermal_spike(self, duration_seconds: int = 120, lag_seconds: int = 40):
         """
@@ -145,12 +159,28 @@ class VirtualNode:
         """
         Advances the node's simulation by one step and returns its telemetry.
 
+        Equivalent to advance() followed by apply_prediction() with a single-row
+        model call. Use step_nodes() to score many nodes in one batched call.
+        """
+        telemetry, features = self.advance()
+        ml_result = self.anomaly_model.predict(features) if features is not None else None
+        return self.apply_prediction(telemetry, ml_result)
+
+    def advance(self) -> Tuple[dict, Optional[List[float]]]:
+        """
+        Advances the node's physics by one step and feeds the ML window, without
+        running inference.
+
         Correct physical feedback loop:
         1. Generate CPU load
         2. HVAC responds to PREVIOUS step temperature (self.thermal_model.temperature)
         3. New airflow affects current step cooling
         4. Temperature changes based on new cooling
         5. Humidity responds to the NEW temperature
+
+        Returns:
+            (telemetry, features): the raw telemetry dict and the window's feature
+            vector if it is ready for scoring (None otherwise, or without a model).
         """
         # 1. Generate CPU load
         cpu_load = self._generate_cpu_load()
@@ -210,26 +240,38 @@ class VirtualNode:
                 
         telemetry = {
             "node_id": self.node_id,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": datetime.fromtimestamp(self.clock.now(), timezone.utc).isoformat(),
             "temperature": temperature,
             "humidity": current_humidity,
             "airflow": current_airflow,
             "cpu_load": cpu_load
         }
 
-        # 6. ML Inference
+        # 6. Feed the ML window
         self.feature_extractor.add_point(telemetry)
+        features = None
         if self.anomaly_model and self.feature_extractor.is_window_ready():
             features = self.feature_extractor.extract_features()
-            ml_result = self.anomaly_model.predict(features)
-            
+
+        return telemetry, features
+
+    def apply_prediction(self, telemetry: dict, ml_result: Optional[Dict[str, Any]]) -> dict:
+        """
+        Applies a model result for this step's window to the telemetry, updating
+        the anomaly persistence state.
+
+        Args:
+            telemetry (dict): Telemetry returned by advance().
+            ml_result (Optional[dict]): {"anomaly_score", "is_anomaly"} for the
+                                        window, or None if no window was scored.
+
+        Returns:
+            dict: The telemetry with anomaly_score and is_anomaly set.
+        """
+        if ml_result is not None:
             raw_anomaly = ml_result['is_anomaly']
-            self.recent_anomaly_flags.append(raw_anomaly)
-            self.recent_anomaly_flags = (
-                self.recent_anomaly_flags[-self.anomaly_persistence_steps:]
-            )
-            persistent_anomaly = any(self.recent_anomaly_flags)
-            
+            persistent_anomaly = self.anomaly_persistence.update(raw_anomaly)
+
             telemetry['anomaly_score'] = ml_result['anomaly_score']
             telemetry['is_anomaly'] = persistent_anomaly
         else:
@@ -237,3 +279,36 @@ class VirtualNode:
             telemetry['is_anomaly'] = False
 
         return telemetry
+
+
+def step_nodes(nodes: Iterable[VirtualNode]) -> List[dict]:
+    """
+    Advances every node by one step, scoring all ready windows with one
+    predict_batch() call per distinct model instead of one call per node.
+
+    Args:
+        nodes (Iterable[VirtualNode]): The nodes to step.
+
+    Returns:
+        List[dict]: Telemetry for each node, in iteration order (identical to
+                    calling node.step() on each node).
+    """
+    nodes = list(nodes)
+    stepped = [node.advance() for node in nodes]
+
+    # Group ready windows by model instance (nodes may share one)
+    pending: Dict[int, Tuple[Any, List[int]]] = {}
+    for i, (node, (_, features)) in enumerate(zip(nodes, stepped)):
+        if features is not None:
+            pending.setdefault(id(node.anomaly_model), (node.anomaly_model, []))[1].append(i)
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(nodes)
+    for model, indices in pending.values():
+        batch = model.predict_batch([stepped[i][1] for i in indices])
+        for i, score, flag in zip(indices, batch["anomaly_scores"], batch["is_anomaly"]):
+            results[i] = {"anomaly_score": float(score), "is_anomaly": bool(flag)}
+
+    return [
+        node.apply_prediction(telemetry, result)
+        for node, (telemetry, _), result in zip(nodes, stepped, results)
+    ]
@@ -0,0 +1,87 @@
+"""
+Anomaly persistence: turns the per-step raw model flag into the persistent
+is_anomaly signal.
+
+A k-of-n policy reports an anomaly while at least k of the last n raw flags
+are set. The deployed rule, any flag in the last 20 steps, is 1-of-20;
+"2 consecutive windows" is 2-of-2. The same PersistenceTracker is used at the
+edge (VirtualNode) and centrally (CentralServer), so both apply the same
+policy, including the k-of-n policies evaluated offline by the threshold
+analysis.
+
+The last n flags live in the low n bits of an int (bit 0 is the newest) next
+to a running count of set bits, so update() and the query are O(1) and
+allocate nothing per step, unlike appending to a list and slicing it.
+"""
+from typing import Optional, Tuple
+
+# Deployed policy: (k, n) = anomaly while any of the last 20 raw flags is set
+PERSISTENCE_STEPS = 20
+DEFAULT_POLICY = (1, PERSISTENCE_STEPS)
+
+
+def parse_policy(value: Optional[str]) -> Tuple[int, int]:
+    """
+    Parses a policy string such as "1/20", "2-of-3" or "2_of_3" into (k, n).
+    None or an empty string gives DEFAULT_POLICY.
+    """
+    if value is None or not value.strip():
+        return DEFAULT_POLICY
+    text = value.strip().lower().replace("-of-", "/").replace("_of_", "/")
+    try:
+        k, n = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid persistence policy {value!r}; expected 'k/n', e.g. '1/20'")
+    if not 1 <= k <= n:
+        raise ValueError(f"Persistence policy needs 1 <= k <= n, got {k}/{n}")
+    return k, n
+
+
+class PersistenceTracker:
+    """k-of-n persistence over a stream of raw anomaly flags."""
+
+    __slots__ = ("k", "n", "_mask", "_oldest", "_bits", "_count")
+
+    def __init__(self, k: int = 1, n: int = PERSISTENCE_STEPS):
+        """
+        Args:
+            k: Flags among the last n needed to report an anomaly.
+            n: Number of most recent flags considered.
+        """
+        if not 1 <= k <= n:
+            raise ValueError(f"PersistenceTracker needs 1 <= k <= n, got k={k}, n={n}")
+        self.k = k
+        self.n = n
+        self._mask = (1 << n) - 1
+        self._oldest = n - 1
+        self._bits = 0
+        self._count = 0
+
+    @classmethod
+    def from_policy(cls, policy: Tuple[int, int]) -> "PersistenceTracker":
+        k, n = policy
+        return cls(k, n)
+
+    def update(self, flag: bool) -> bool:
+        """Adds the newest raw flag and returns the persistent state."""
+        flag = 1 if flag else 0
+        # The flag n steps ago drops out of the window
+        self._count += flag - ((self._bits >> self._oldest) & 1)
+        self._bits = ((self._bits << 1) | flag) & self._mask
+        return self._count >= self.k
+
+    @property
+    def count(self) -> int:
+        """Number of set flags among the last n."""
+        return self._count
+
+    def flags(self) -> list:
+        """The last n flags, oldest first (steps before the first update count as False)."""
+        return [bool((self._bits >> i) & 1) for i in range(self._oldest, -1, -1)]
+
+    def reset(self) -> None:
+        self._bits = 0
+        self._count = 0
+
+    def __repr__(self) -> str:
+        return f"PersistenceTracker(k={self.k}, n={self.n}, count={self._count})"
@@ -3,98 +3,247 @@ This module provides a command-line interface to run the thermal simulation.
 """
 import argparse
 import csv
+import gzip
 import sys
 import os
-import random
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from .thermal_model import ThermalModel
 from .airflow import AirflowModel
 from .humidity import HumidityModel
-from .node import VirtualNode
+from .node import VirtualNode, step_nodes
+from .clock import SimulatedClock, parse_speed
 
+# Fixed column order so every chunk (and every format) has the same schema
+TELEMETRY_FIELDS = (
+    "node_id", "timestamp", "temperature", "humidity", "airflow",
+    "cpu_load", "anomaly_score", "is_anomaly",
+)
 
-def run_simulation(duration: int, seed: int = None, output_file: str = None, fast_mode: bool = False):
+# Offset between the seeds of consecutive nodes; node-1 keeps the base seed
+NODE_SEED_STRIDE = 10_000
+
+
+class TelemetrySink:
+    """
+    Writes telemetry rows to a file in chunks of chunk_rows, so memory stays
+    flat however long the run is.
+
+    Formats:
+        csv      plain CSV, or gzip-compressed CSV with compression="gzip"
+                 (the default for paths ending in .gz)
+        parquet  one row group per chunk (requires pyarrow); compression is
+                 passed to pyarrow (e.g. "snappy", "zstd", "gzip")
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fmt: Optional[str] = None,
+        compression: Optional[str] = None,
+        chunk_rows: int = 10_000,
+    ):
+        if fmt is None:
+            fmt = "parquet" if path.endswith(".parquet") else "csv"
+        if fmt not in ("csv", "parquet"):
+            raise ValueError(f"Unknown output format: {fmt}")
+        if fmt == "csv" and compression is None and path.endswith(".gz"):
+            compression = "gzip"
+        if fmt == "csv" and compression not in (None, "none", "gzip"):
+            raise ValueError(f"Unsupported CSV compression: {compression}")
+
+        self.path = path
+        self.fmt = fmt
+        self.compression = None if compression == "none" else compression
+        self.chunk_rows = chunk_rows
+        self.rows_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._file = None
+        self._csv = None
+        self._parquet = None
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        if fmt == "parquet":
+            try:
+                import pyarrow
+                import pyarrow.parquet
+            except ImportError as e:
+                raise ImportError(
+                    "Parquet output requires pyarrow (pip install pyarrow); use CSV otherwise."
+                ) from e
+            self._pa = pyarrow
+            self._schema = pyarrow.schema([
+                ("node_id", pyarrow.string()),
+                ("timestamp", pyarrow.string()),
+                *((name, pyarrow.float64()) for name in TELEMETRY_FIELDS[2:7]),
+                ("is_anomaly", pyarrow.bool_()),
+            ])
+            self._parquet = pyarrow.parquet.ParquetWriter(
+                path, self._schema, compression=self.compression or "snappy"
+            )
+        else:
+            if self.compression == "gzip":
+                self._file = gzip.open(path, "wt", newline="")
+            else:
+                self._file = open(path, "w", newline="")
+            self._csv = csv.DictWriter(self._file, fieldnames=TELEMETRY_FIELDS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.chunk_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._buffer:
+            return
+        if self._parquet is not None:
+            columns = {name: [row.get(name) for row in self._buffer] for name in TELEMETRY_FIELDS}
+            self._parquet.write_table(self._pa.table(columns, schema=self._schema))
+        else:
+            self._csv.writerows(self._buffer)
+        self.rows_written += len(self._buffer)
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.flush()
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def make_nodes(n_nodes: int, seed: Optional[int], clock) -> List[VirtualNode]:
+    """
+    Builds n_nodes nodes. With a base seed, node i (0-based) uses
+    seed + i * NODE_SEED_STRIDE, offset per component to avoid identical
+    noise sequences, so node-1 matches a single-node run with the same seed.
     """
-    Runs the thermal simulation for a single node.
+    nodes = []
+    for i in range(n_nodes):
+        if seed is not None:
+            base = seed + i * NODE_SEED_STRIDE
+            thermal_seed = base
+            airflow_seed = base + 1000
+            humidity_seed = base + 2000
+            node_seed = base + 3000
+        else:
+            thermal_seed = airflow_seed = humidity_seed = node_seed = None
+
+        # Instantiate Models with reasonable defaults
+        thermal_model = ThermalModel(
+            air_mass=50.0,
+            heat_capacity=1005.0,
+            heat_coefficient=500.0,
+            cooling_coefficient=300.0,
+            initial_temperature=21.0,
+            ambient_temperature=20.0,
+        )
+
+        airflow_model = AirflowModel(
+            nominal_flow=2.5,
+            random_seed=airflow_seed
+        )
+
+        humidity_model = HumidityModel(
+            initial_humidity=45.0,
+            drift=0.01,
+            noise_amplitude=0.2,
+            random_seed=humidity_seed,
+            reference_temp=21.0
+        )
+
+        nodes.append(VirtualNode(
+            node_id=f"node-{i + 1}",
+            thermal_model=thermal_model,
+            airflow_model=airflow_model,
+            humidity_model=humidity_model,
+            random_seed=node_seed,
+            clock=clock,
+        ))
+    return nodes
+
+
+def run_simulation(
+    duration: int,
+    seed: int = None,
+    output_file: str = None,
+    fast_mode: bool = False,
+    speed: Optional[float] = None,
+    start: Optional[float] = None,
+    n_nodes: int = 1,
+    fmt: Optional[str] = None,
+    compression: Optional[str] = None,
+    chunk_rows: int = 10_000,
+) -> int:
+    """
+    Runs the thermal simulation for one or more nodes.
+
+    Each step is one second of simulated time on a SimulatedClock, so the
+    telemetry timestamps are the same however fast the run goes. Rows are
+    streamed to the output in chunks rather than kept in memory.
 
     Args:
         duration (int): The number of seconds (steps) to run the simulation.
         seed (int, optional): A random seed for deterministic runs.
-        output_file (str, optional): Path to a CSV file to save the results.
-        fast_mode (bool): If True, skips time.sleep(1).
+        output_file (str, optional): Path to save the results to. Without one,
+                                     rows are printed as they are produced.
+        fast_mode (bool): If True, never sleeps, whatever the speed.
+        speed (float, optional): Simulated seconds per real second (1.0 is
+                                 real time). None runs as fast as possible.
+        start (float, optional): Epoch seconds of the first step. Defaults to
+                                 the current time.
+        n_nodes (int): Number of nodes, stepped together with batched inference.
+        fmt (str, optional): "csv" or "parquet"; inferred from output_file.
+        compression (str, optional): "gzip" for CSV, or a Parquet codec.
+        chunk_rows (int): Rows buffered between writes.
+
+    Returns:
+        int: The number of rows produced.
     """
-    # Use different seeds for different components if a base seed is provided
-    # to avoid identical noise sequences
-    if seed is not None:
-        thermal_seed = seed
-        airflow_seed = seed + 1000
-        humidity_seed = seed + 2000
-        node_seed = seed + 3000
-    else:
-        thermal_seed = airflow_seed = humidity_seed = node_seed = None
-
-    # Instantiate Models with reasonable defaults
-    thermal_model = ThermalModel(
-        air_mass=50.0,
-        heat_capacity=1005.0,
-        heat_coefficient=500.0,
-        cooling_coefficient=300.0,
-        initial_temperature=21.0,
-        ambient_temperature=20.0,
-    )
-    
-    airflow_model = AirflowModel(
-        nominal_flow=2.5,
-        random_seed=airflow_seed
-    )
-    
-    humidity_model = HumidityModel(
-        initial_humidity=45.0,
-        drift=0.01,
-        noise_amplitude=0.2,
-        random_seed=humidity_seed,
-        reference_temp=21.0
-    )
+    clock = SimulatedClock(start=start, speed=None if fast_mode else speed)
+    nodes = make_nodes(n_nodes, seed, clock)
 
-    # Create a single VirtualNode
-    node = VirtualNode(
-        node_id="node-1",
-        thermal_model=thermal_model,
-        airflow_model=airflow_model,
-        humidity_model=humidity_model,
-        random_seed=node_seed
-    )
+    sink = None
+    if output_file:
+        try:
+            sink = TelemetrySink(output_file, fmt=fmt, compression=compression, chunk_rows=chunk_rows)
+        except (OSError, ValueError, ImportError) as e:
+            print(f"Error opening output file {output_file}: {e}", file=sys.stderr)
+            return 0
 
-    telemetry_data: List[Dict[str, Any]] = []
+    rows = 0
+    print(f"Running simulation for {duration} steps on {n_nodes} node(s)...")
+    try:
+        for i in range(duration):
+            for telemetry in step_nodes(nodes):
+                if sink is not None:
+                    sink.write(telemetry)
+                else:
+                    print(telemetry)
+                rows += 1
+            clock.sleep(1.0)
 
-    # Run simulation for the specified duration
-    print(f"Running simulation for {duration} steps...")
-    for i in range(duration):
-        telemetry = node.step()
-        telemetry_data.append(telemetry)
-        
-        if (i + 1) % 10000 == 0:
-            print(f"Progress: {i + 1}/{duration} steps completed.")
+            if (i + 1) % 10000 == 0:
+                print(f"Progress: {i + 1}/{duration} steps completed.", file=sys.stderr)
+    finally:
+        if sink is not None:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Error writing to file {output_file}: {e}", file=sys.stderr)
 
-    # Output results
-    if output_file:
-        try:
-            # Ensure directory exists
-            if os.path.dirname(output_file):
-                os.makedirs(os.path.dirname(output_file), exist_ok=True)
-            with open(output_file, "w", newline="") as f:
-                if not telemetry_data:
-                    return
-                writer = csv.DictWriter(f, fieldnames=telemetry_data[0].keys())
-                writer.writeheader()
-                writer.writerows(telemetry_data)
-            print(f"Successfully wrote {len(telemetry_data)} rows to {output_file}")
-        except Exception as e:
-            print(f"Error writing to file {output_file}: {e}", file=sys.stderr)
-    else:
-        for row in telemetry_data:
-            print(row)
+    if sink is not None:
+        print(f"Successfully wrote {sink.rows_written} rows to {output_file}")
+    return rows
 
 
 def main():
@@ -116,11 +265,54 @@ def main():
     parser.add_argument(
         "--output",
         type=str,
-        help="Optional path to a CSV file to save the telemetry data.",
+        help="Optional path to save the telemetry data (.csv, .csv.gz or .parquet).",
+    )
+    parser.add_argument(
+        "--nodes",
+        type=int,
+        default=1,
+        help="Number of simulated nodes.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("csv", "parquet"),
+        help="Output format (inferred from --output by default).",
+    )
+    parser.add_argument(
+        "--compression",
+        type=str,
+        help='"gzip" for CSV, or a Parquet codec such as "snappy" or "zstd".',
+    )
+    parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=10_000,
+        help="Rows buffered in memory between writes.",
+    )
+    parser.add_argument(
+        "--speed",
+        type=str,
+        default="max",
+        help='Simulated seconds per real second (1 = real time), or "max" to run as fast as possible.',
+    )
+    parser.add_argument(
+        "--start",
+        type=float,
+        help="Epoch seconds of the first step (defaults to now).",
     )
     args = parser.parse_args()
 
-    run_simulation(duration=args.duration, seed=args.seed, output_file=args.output)
+    run_simulation(
+        duration=args.duration,
+        seed=args.seed,
+        output_file=args.output,
+        speed=parse_speed(args.speed),
+        start=args.start,
+        n_nodes=args.nodes,
+        fmt=args.format,
+        compression=args.compression,
+        chunk_rows=args.chunk_rows,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,111 @@
+"""
+Per-viewer subscription filters for the /ws/simulation websocket.
+
+A filter selects which nodes and telemetry fields a viewer receives and how
+often. It is set from the websocket query string and can be replaced at any
+time by a JSON control message with the same keys:
+
+    nodes      node ids to include (comma-separated in the query string)
+    fields     telemetry keys to include (comma-separated in the query string)
+    every      send every Nth tick only
+    on_change  send a frame only when a selected node's is_anomaly flag changes
+
+Views of the same nodes/fields are cached on the shared EncodedFrame, so
+viewers with identical filters share the encoding work.
+"""
+from typing import Any, Mapping, Optional, Tuple
+
+from .frame_codec import FRAME_FIELDS, EncodedFrame
+
+FILTER_FIELDS = ("node_id", "timestamp") + FRAME_FIELDS
+
+
+def _as_tuple(value: Any) -> Optional[Tuple[str, ...]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        items = [item.strip() for item in value.split(",")]
+    elif isinstance(value, (list, tuple)):
+        items = [str(item) for item in value]
+    else:
+        raise ValueError("Expected a list or comma-separated string")
+    items = [item for item in items if item]
+    return tuple(sorted(set(items))) if items else None
+
+
+def _as_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+class SubscriptionFilter:
+    """What one viewer wants to receive, plus the state needed to decide it."""
+
+    def __init__(
+        self,
+        nodes: Optional[Tuple[str, ...]] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+        every: int = 1,
+        on_change: bool = False,
+    ):
+        self.nodes: Optional[Tuple[str, ...]] = None
+        self.fields: Optional[Tuple[str, ...]] = None
+        self.every = 1
+        self.on_change = False
+        # Bumped on every update so callers can tell a view changed (no deltas across it)
+        self.version = 0
+        self._last_flags: Optional[tuple] = None
+        self.update({"nodes": nodes, "fields": fields, "every": every, "on_change": on_change})
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, str]) -> "SubscriptionFilter":
+        """Builds a filter from websocket query parameters; raises ValueError."""
+        return cls(
+            nodes=_as_tuple(params.get("nodes")),
+            fields=_as_tuple(params.get("fields")),
+            every=int(params.get("every", 1)),
+            on_change=_as_bool(params.get("on_change", False)),
+        )
+
+    def update(self, message: Mapping[str, Any]) -> None:
+        """
+        Applies the keys present in a control message. Validates everything
+        before changing any state; raises ValueError on bad input.
+        """
+        nodes = _as_tuple(message["nodes"]) if "nodes" in message else self.nodes
+        fields = _as_tuple(message["fields"]) if "fields" in message else self.fields
+        every = int(message.get("every", self.every))
+        on_change = _as_bool(message.get("on_change", self.on_change))
+
+        if every < 1:
+            raise ValueError("every must be >= 1")
+        if fields is not None:
+            unknown = set(fields) - set(FILTER_FIELDS)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        self.nodes, self.fields, self.every, self.on_change = nodes, fields, every, on_change
+        self._last_flags = None
+        self.version += 1
+
+    def wants(self, encoded: EncodedFrame) -> bool:
+        """Whether this frame should be sent; records the anomaly state sent."""
+        if encoded.seq % self.every != 0:
+            return False
+        if not self.on_change:
+            return True
+
+        frame = encoded.frame
+        node_ids = encoded.node_ids if self.nodes is None else self.nodes
+        flags = tuple(bool(frame[n].get("is_anomaly")) for n in node_ids if n in frame)
+        if flags == self._last_flags:
+            return False
+        self._last_flags = flags
+        return True
+
+    def text(self, encoded: EncodedFrame) -> str:
+        return encoded.text_view(self.nodes, self.fields)
+
+    def binary(self, encoded: EncodedFrame, use_delta: bool) -> bytes:
+        return encoded.binary(use_delta, self.nodes, self.fields)
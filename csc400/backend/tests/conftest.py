@@ -0,0 +1,37 @@
+"""
+Shared fixtures for the backend tests.
+"""
+import pytest
+
+from backend.simulation import database
+from backend.simulation.broadcast import BroadcastHub
+
+
+@pytest.fixture
+def empty_db_path(tmp_path, monkeypatch):
+    """A database path under tmp_path that the database module writes to, not yet initialised."""
+    monkeypatch.setattr(database, "DB_DIR", tmp_path)
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    return tmp_path / "test.db"
+
+
+@pytest.fixture
+def db_path(empty_db_path):
+    """An initialised database under tmp_path that the database module writes to."""
+    database.init_db()
+    return empty_db_path
+
+
+@pytest.fixture
+def api(db_path, monkeypatch):
+    """The backend.api module on a fresh database, hub and runtime state, ticking every 10 ms."""
+    from backend import api as api_module
+
+    writer = database.TelemetryWriter(db_path)
+    monkeypatch.setattr(api_module, "telemetry_writer", writer)
+    monkeypatch.setattr(api_module, "TICK_SECONDS", 0.01)
+    monkeypatch.setattr(api_module, "hub", BroadcastHub(queue_size=64))
+    monkeypatch.setattr(api_module, "active_profile_id", None)
+    api_module.reset_runtime_state()
+    yield api_module
+    writer.close()
@@ -0,0 +1,121 @@
+"""
+Tests for the simulation clocks and latency measured in simulated time.
+"""
+import json
+import time
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.simulation.airflow import AirflowModel
+from backend.simulation.broadcast import BroadcastHub
+from backend.simulation.central_server import CentralServer
+from backend.simulation.clock import SimulatedClock, WallClock, make_clock, parse_speed
+from backend.simulation.humidity import HumidityModel
+from backend.simulation.node import VirtualNode
+from backend.simulation.thermal_model import ThermalModel
+
+
+class FlagModel:
+    """Stands in for ModelLoader; flags every window once `anomalous` is set."""
+
+    def __init__(self):
+        self.anomalous = False
+
+    def predict_batch(self, features):
+        n = len(features)
+        return {"anomaly_scores": [0.0 if self.anomalous else 0.5] * n, "is_anomaly": [self.anomalous] * n}
+
+
+def test_simulated_clock_advances_without_waiting():
+    clock = SimulatedClock(start=1000.0, speed=None)
+    started = time.monotonic()
+    for _ in range(86_400):
+        clock.sleep(1.0)
+    assert time.monotonic() - started < 1.0
+    assert clock.now() == 1000.0 + 86_400
+
+    assert SimulatedClock(start=0.0, speed=60.0).wall_seconds(1.0) == pytest.approx(1 / 60)
+    with pytest.raises(ValueError):
+        SimulatedClock(speed=0)
+
+
+def test_make_clock():
+    assert isinstance(make_clock(None), WallClock)
+    assert isinstance(make_clock("realtime"), WallClock)
+    assert make_clock("max").speed is None
+    assert make_clock("120", start=5.0).now() == 5.0
+    assert parse_speed("fast") is None and parse_speed("2.5") == 2.5
+
+
+def test_node_timestamps_follow_clock():
+    clock = SimulatedClock(start=0.0)
+    thermal = ThermalModel(50.0, 1005.0, 500.0, 300.0, 21.0, 20.0)
+    node = VirtualNode(
+        "node-1", thermal, AirflowModel(2.5, random_seed=1), HumidityModel(45.0, 0.01, 0.2, 2),
+        random_seed=3, anomaly_model=FlagModel(), clock=clock,
+    )
+    clock.advance(3600.0)
+    stamp = datetime.fromisoformat(node.step()["timestamp"])
+    assert stamp.timestamp() == 3600.0
+
+
+def test_central_latency_in_simulated_time():
+    clock = SimulatedClock(start=10_000.0, speed=None)
+    model = FlagModel()
+    server = CentralServer(model, clock)
+    raw = {"temperature": 21.0, "humidity": 45.0, "airflow": 2.5, "cpu_load": 0.5}
+
+    for seq in range(1, 15):
+        clock.advance(1.0)
+        server.receive_telemetry("node-1", raw, seq, None)
+    server.record_injection("node-1", clock.now())
+
+    # Edge detects after 3 steps, central after 7
+    for seq in range(15, 22):
+        clock.advance(1.0)
+        model.anomalous = seq == 21
+        edge_ts = clock.now() if seq == 17 else None
+        server.receive_telemetry("node-1", raw, seq, edge_ts)
+
+    status = server.get_status()["node-1"]
+    assert status["edge_latency_ms"] == 3000.0
+    assert status["central_latency_ms"] == 7000.0
+    assert status["latency_delta_ms"] == 4000.0
+
+
+@pytest.fixture
+def api(api, monkeypatch):
+    """The shared api fixture on an unthrottled simulated clock with 1 s ticks."""
+    monkeypatch.setattr(api, "TICK_SECONDS", 1.0)
+    monkeypatch.setattr(api, "clock", SimulatedClock(start=1_700_000_000.0, speed=None))
+    monkeypatch.setattr(api, "hub", BroadcastHub(queue_size=1024))
+    # Rebuild the nodes and central server on the new clock
+    api.reset_runtime_state()
+    return api
+
+
+def test_accelerated_api_run_measures_simulated_latency(api):
+    if api.central_server is None:
+        pytest.skip("Model or Scaler files not found.")
+
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation") as ws:
+            stamps = [json.loads(ws.receive_text())["node-1"]["timestamp"] for _ in range(60)]
+            injected = client.post("/simulation/inject", params={"node_id": "node-1", "scenario": "hvac_failure"})
+            assert injected.json()["status"] == "injected"
+
+            status = {}
+            for _ in range(600):
+                json.loads(ws.receive_text())
+                status = client.get("/central/status").json()["nodes"]
+                if status.get("node-1", {}).get("central_latency_ms") is not None:
+                    break
+            assert client.get("/simulation/status").json()["clock"]["mode"] == "simulated"
+
+    # One simulated second per tick, whatever the real pacing was
+    assert all(b - a == 1.0 for a, b in zip(stamps, stamps[1:]))
+    latency = status["node-1"]["central_latency_ms"]
+    assert latency is not None and latency > 0
+    assert latency % 1000 == 0
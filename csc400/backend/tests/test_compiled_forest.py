@@ -0,0 +1,84 @@
+"""
+Unit tests for the flat-array CompiledForest scorer.
+"""
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+from backend.ml.compiled_forest import CompiledForest
+from backend.ml.model_loader import ModelLoader
+
+
+@pytest.fixture(scope="module")
+def loader():
+    try:
+        return ModelLoader(compiled=False)
+    except FileNotFoundError:
+        pytest.skip("Model or Scaler files not found.")
+
+
+def sample_rows(scaler, n=2000, seed=0):
+    """Rows spread around the training distribution, including far outliers."""
+    rng = np.random.default_rng(seed)
+    return scaler.inverse_transform(rng.normal(scale=3.0, size=(n, 12)))
+
+
+def test_matches_decision_function(loader):
+    X = sample_rows(loader.scaler)
+    forest = CompiledForest.from_sklearn(loader.model, loader.scaler)
+    expected = loader.model.decision_function(loader.scaler.transform(X))
+    np.testing.assert_array_equal(forest.decision_function(X, chunk_size=333), expected)
+
+
+def test_save_load_round_trip(loader, tmp_path):
+    X = sample_rows(loader.scaler, n=200, seed=1)
+    forest = CompiledForest.from_sklearn(loader.model, loader.scaler)
+    path = tmp_path / "forest.npz"
+    forest.save(path)
+
+    compiled_loader = ModelLoader(model_path=str(path))
+    assert compiled_loader.model is None
+    np.testing.assert_array_equal(
+        compiled_loader.predict_batch(X)["anomaly_scores"], forest.decision_function(X)
+    )
+
+
+def test_subsampled_features_and_nan():
+    rng = np.random.default_rng(2)
+    train = rng.normal(size=(500, 6))
+    model = IsolationForest(n_estimators=25, max_features=3, random_state=0).fit(train)
+    X = rng.normal(scale=2.0, size=(300, 6))
+    X[::7, 2] = np.nan
+
+    forest = CompiledForest.from_sklearn(model)
+    np.testing.assert_array_equal(forest.score_samples(X), model.score_samples(X))
+
+
+@pytest.mark.parametrize("scaler", [
+    RobustScaler(),
+    RobustScaler(with_centering=False),
+    RobustScaler(with_scaling=False),
+    StandardScaler(),
+    StandardScaler(with_mean=False),
+    StandardScaler(with_std=False),
+])
+def test_matches_sklearn_with_scaler(scaler):
+    # Runs without the model files, so a scikit-learn upgrade that changes
+    # the IsolationForest internals fails here
+    rng = np.random.default_rng(3)
+    train = rng.normal(loc=5.0, scale=[1.0, 10.0, 0.1, 3.0], size=(400, 4))
+    scaler.fit(train)
+    model = IsolationForest(n_estimators=30, random_state=0).fit(scaler.transform(train))
+    X = rng.normal(loc=5.0, scale=[2.0, 20.0, 0.2, 6.0], size=(500, 4))
+
+    forest = CompiledForest.from_sklearn(model, scaler)
+    np.testing.assert_array_equal(forest.decision_function(X), model.decision_function(scaler.transform(X)))
+
+
+def test_unsupported_scaler_rejected():
+    train = np.random.default_rng(4).normal(size=(100, 3))
+    scaler = MinMaxScaler().fit(train)
+    model = IsolationForest(n_estimators=5, random_state=0).fit(scaler.transform(train))
+    with pytest.raises(ValueError):
+        CompiledForest.from_sklearn(model, scaler)
@@ -0,0 +1,136 @@
+"""
+Unit tests for the telemetry rollup tables and history downsampling.
+"""
+import random
+import sqlite3
+
+import pytest
+
+from backend.simulation import database
+
+
+def make_records(n=2000, start=1_700_000_000.0):
+    rng = random.Random(0)
+    records = []
+    for i in range(n):
+        for profile_id in (None, 1):
+            records.append({
+                "seq_id": i,
+                "node_id": "node-1",
+                "timestamp": start + i + (0.5 if profile_id else 0.0),
+                "temperature": 21.0 + rng.random(),
+                "humidity": 45.0 + rng.random(),
+                "airflow": 2.5 - rng.random(),
+                "cpu_load": rng.random(),
+                "is_anomaly": 1 if i % 97 == 0 else 0,
+                "anomaly_score": None if i < 9 else rng.random(),
+                "profile_id": profile_id,
+            })
+    return records
+
+
+def write_all(db_path, records):
+    writer = database.TelemetryWriter(db_path, batch_size=333)
+    for record in records:
+        writer.submit_telemetry(record)
+    writer.close()
+
+
+def dump_rollup(db_path):
+    conn = sqlite3.connect(str(db_path))
+    rows = conn.execute("SELECT * FROM telemetry_rollup ORDER BY resolution, node_id, profile_key, bucket").fetchall()
+    conn.close()
+    return rows
+
+
+def test_rollup_matches_raw_aggregates(db_path):
+    records = make_records()
+    write_all(db_path, records)
+
+    start, end = records[0]["timestamp"], records[-1]["timestamp"]
+    rows = database.get_telemetry_rollup("node-1", start, end, 60, profile_id=1)
+    raw = [r for r in records if r["profile_id"] == 1]
+
+    for row in rows:
+        in_bucket = [r for r in raw if row["timestamp"] <= r["timestamp"] < row["timestamp"] + 60]
+        temps = [r["temperature"] for r in in_bucket]
+        scores = [r["anomaly_score"] for r in in_bucket if r["anomaly_score"] is not None]
+        assert row["sample_count"] == len(in_bucket)
+        assert row["anomaly_count"] == sum(r["is_anomaly"] for r in in_bucket)
+        assert row["temperature_min"] == min(temps)
+        assert row["temperature_max"] == max(temps)
+        assert row["temperature"] == pytest.approx(sum(temps) / len(temps))
+        assert row["temperature_last"] == temps[-1]
+        assert row["anomaly_score"] == (pytest.approx(sum(scores) / len(scores)) if scores else None)
+    assert sum(row["sample_count"] for row in rows) == len(raw)
+
+
+def test_rebuild_matches_incremental(db_path):
+    write_all(db_path, make_records(500))
+    incremental = dump_rollup(db_path)
+    assert database.rebuild_rollups() == 1000
+    assert dump_rollup(db_path) == incremental
+
+
+def test_profiles_merged_when_unfiltered(db_path):
+    records = make_records(300)
+    write_all(db_path, records)
+    rows = database.get_telemetry_rollup("node-1", records[0]["timestamp"], records[-1]["timestamp"], 10)
+    assert sum(row["sample_count"] for row in rows) == len(records)
+    assert all(row["profile_id"] is None for row in rows)
+
+
+def test_history_picks_resolution_for_budget(db_path):
+    records = make_records(3600)
+    write_all(db_path, records)
+    start, end = records[0]["timestamp"], records[-1]["timestamp"]
+
+    resolution, rows = database.get_telemetry_history("node-1", start, end, profile_id=1)
+    assert resolution == 0 and len(rows) == 3600
+
+    resolution, rows = database.get_telemetry_history("node-1", start, end, profile_id=1, max_points=100)
+    assert resolution == 60
+    assert len(rows) <= 100
+
+    assert database.choose_resolution(0, 7 * 86400, 500) == 3600
+    assert database.choose_resolution(0, 600, 500) == 10
+
+
+def test_history_counts_partial_buckets_against_budget(db_path):
+    records = make_records(1200, start=0.0)
+    write_all(db_path, records)
+
+    # 0.5..1000.5 touches 101 ten-second buckets, one more than span / 10
+    resolution, rows = database.get_telemetry_history("node-1", 0.5, 1000.5, max_points=100)
+    assert resolution == 60
+    assert len(rows) <= 100
+    for start in (0.0, 0.5, 9.9, 59.5):
+        for max_points in (2, 17, 100, 101):
+            res = database.choose_resolution(start, start + 1000, max_points)
+            assert (start + 1000 - start // res * res) // res + 1 <= max_points
+
+
+def test_history_downsamples_past_coarsest_rollup(db_path):
+    # Sparse rows over 60 days: even hourly buckets exceed the budget
+    rng = random.Random(1)
+    records = [{
+        "seq_id": i, "node_id": "node-1", "timestamp": 1_700_000_123.0 + i * 1800,
+        "temperature": 20.0 + rng.random(), "humidity": 45.0, "airflow": 2.5, "cpu_load": 0.5,
+        "is_anomaly": 0, "anomaly_score": 0.3, "profile_id": 1,
+    } for i in range(2880)]
+    write_all(db_path, records)
+    start, end = records[0]["timestamp"], records[-1]["timestamp"]
+
+    resolution, rows = database.get_telemetry_history("node-1", start, end, profile_id=1, max_points=50)
+    assert resolution > 3600 and resolution % 3600 == 0
+    assert len(rows) <= 50
+    assert sum(row["sample_count"] for row in rows) == len(records)
+    for row in rows:
+        temps = [r["temperature"] for r in records if row["timestamp"] <= r["timestamp"] < row["timestamp"] + resolution]
+        assert row["resolution"] == resolution
+        assert row["temperature_max"] == max(temps)
+        assert row["temperature"] == pytest.approx(sum(temps) / len(temps))
+
+    for max_points in (1, 7, 1000):
+        res = database.choose_resolution(0, 365 * 86400, max_points)
+        assert 365 * 86400 // res + 1 <= max_points
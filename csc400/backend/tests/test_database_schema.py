@@ -0,0 +1,76 @@
+"""
+Schema migration and query-plan regression tests for the SQLite layer.
+"""
+import sqlite3
+
+import pytest
+
+from backend.simulation import database
+
+
+def index_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def query_plan(conn, query, params):
+    return " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params))
+
+
+def test_fresh_database_is_at_latest_version(db_path):
+    conn = sqlite3.connect(str(db_path))
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+    indexes = index_names(conn, "telemetry")
+    assert {"idx_telemetry_node_profile_ts", "idx_telemetry_node_ts"} <= indexes
+    assert "idx_telemetry_node_id" not in indexes
+    conn.close()
+
+
+def test_legacy_database_is_migrated(empty_db_path):
+    conn = sqlite3.connect(str(empty_db_path))
+    conn.execute(
+        "CREATE TABLE telemetry (id INTEGER PRIMARY KEY AUTOINCREMENT, seq_id INTEGER NOT NULL, "
+        "node_id TEXT NOT NULL, timestamp REAL NOT NULL, temperature REAL, humidity REAL, "
+        "airflow REAL, cpu_load REAL, is_anomaly INTEGER, anomaly_score REAL)"
+    )
+    conn.execute("CREATE INDEX idx_telemetry_node_id ON telemetry(node_id)")
+    conn.execute(
+        "INSERT INTO telemetry (seq_id, node_id, timestamp, temperature) VALUES (1, 'node-1', 100.0, 21.0)"
+    )
+    conn.commit()
+    conn.close()
+
+    database.init_db()
+    database.init_db()  # idempotent
+
+    conn = sqlite3.connect(str(empty_db_path))
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == database.SCHEMA_VERSION
+    assert "idx_telemetry_node_id" not in index_names(conn, "telemetry")
+    assert conn.execute("SELECT COUNT(*) FROM telemetry WHERE profile_id IS NULL").fetchone()[0] == 1
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "profile_id, index",
+    [(3, "idx_telemetry_node_profile_ts"), (None, "idx_telemetry_node_ts")],
+)
+def test_range_query_uses_composite_index(db_path, profile_id, index):
+    query, params = database.telemetry_range_query("node-1", 0.0, 100.0, profile_id)
+    conn = sqlite3.connect(str(db_path))
+    plan = query_plan(conn, query, params)
+    conn.close()
+
+    assert f"USING INDEX {index}" in plan
+    assert "SCAN" not in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_keyset_page_query_uses_index_order(db_path):
+    query, params = database.telemetry_range_query(
+        "node-1", 0.0, 100.0, 3, after=(50.0, 1234), limit=100
+    )
+    conn = sqlite3.connect(str(db_path))
+    plan = query_plan(conn, query, params)
+    conn.close()
+
+    assert "USING INDEX idx_telemetry_node_profile_ts" in plan
+    assert "TEMP B-TREE" not in plan
@@ -0,0 +1,126 @@
+"""
+Unit tests for the write-behind TelemetryWriter.
+"""
+import sqlite3
+
+from backend.simulation.database import TelemetryWriter
+
+
+def telemetry_record(seq_id, node_id="node-1"):
+    return {
+        "seq_id": seq_id,
+        "node_id": node_id,
+        "timestamp": 1000.0 + seq_id,
+        "temperature": 21.0,
+        "humidity": 45.0,
+        "airflow": 2.5,
+        "cpu_load": 0.5,
+        "is_anomaly": 0,
+        "anomaly_score": 0.3,
+    }
+
+
+def count_rows(db_path, table):
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_rows_written_in_batches(db_path):
+    writer = TelemetryWriter(db_path, batch_size=100, flush_interval=10.0)
+    for i in range(250):
+        assert writer.submit_telemetry(telemetry_record(i))
+    writer.submit_anomaly_event({"seq_id": 1, "node_id": "node-1", "detection_source": "central"})
+
+    assert writer.flush(timeout=5)
+    assert count_rows(db_path, "telemetry") == 250
+    assert count_rows(db_path, "anomaly_events") == 1
+
+    stats = writer.metrics()
+    assert stats["written"] == 251
+    assert stats["batches"] >= 3
+    assert stats["dropped"] == 0
+    writer.close()
+    assert not writer.metrics()["running"]
+
+
+def test_missing_keys_stored_as_null(db_path):
+    writer = TelemetryWriter(db_path)
+    writer.submit_telemetry(telemetry_record(1))
+    writer.close()
+
+    conn = sqlite3.connect(str(db_path))
+    profile_id = conn.execute("SELECT profile_id FROM telemetry").fetchone()[0]
+    conn.close()
+    assert profile_id is None
+
+
+def test_close_flushes_and_restarts_on_submit(db_path):
+    writer = TelemetryWriter(db_path, flush_interval=60.0)
+    writer.submit_telemetry(telemetry_record(1))
+    writer.close()
+    assert count_rows(db_path, "telemetry") == 1
+
+    writer.submit_telemetry(telemetry_record(2))
+    writer.close()
+    assert count_rows(db_path, "telemetry") == 2
+
+
+def test_full_queue_drops_and_counts(db_path):
+    writer = TelemetryWriter(db_path, batch_size=1, max_queue=5, put_timeout=0.0)
+    # Hold the writer thread on a database lock so the queue cannot drain
+    blocker = sqlite3.connect(str(db_path), timeout=0)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        results = [writer.submit_telemetry(telemetry_record(i)) for i in range(50)]
+    finally:
+        blocker.rollback()
+        blocker.close()
+    writer.close()
+
+    stats = writer.metrics()
+    assert results.count(False) == stats["dropped"] > 0
+    assert stats["blocked"] >= stats["dropped"]
+
+
+def test_failed_row_does_not_drop_its_batch(db_path):
+    writer = TelemetryWriter(db_path, flush_interval=10.0)
+    for i in range(10):
+        writer.submit_telemetry(telemetry_record(i))
+    # seq_id is NOT NULL, so only this row can fail
+    writer.submit_anomaly_event({"node_id": "node-1", "detection_source": "central"})
+    assert writer.flush(timeout=5)
+    writer.close()
+
+    assert count_rows(db_path, "telemetry") == 10
+    assert count_rows(db_path, "anomaly_events") == 0
+    stats = writer.metrics()
+    assert (stats["written"], stats["dropped"], stats["errors"]) == (10, 1, 1)
+
+
+def test_flush_returns_when_writer_thread_died(tmp_path):
+    writer = TelemetryWriter(tmp_path / "missing" / "telemetry.db")
+    writer.submit_telemetry(telemetry_record(1))
+    writer._thread.join(5)
+    assert not writer.flush()
+    assert writer.metrics()["errors"] == 1
+    writer.close()
+    assert not writer.metrics()["running"]
+
+
+def test_close_timeout_keeps_running_writer(db_path):
+    writer = TelemetryWriter(db_path, flush_interval=60.0)
+    blocker = sqlite3.connect(str(db_path), timeout=0)
+    blocker.execute("BEGIN EXCLUSIVE")
+    try:
+        writer.submit_telemetry(telemetry_record(1))
+        writer.close(timeout=0.2)
+        assert writer.metrics()["running"]
+    finally:
+        blocker.rollback()
+        blocker.close()
+    writer.close()
+    assert not writer.metrics()["running"]
+    assert count_rows(db_path, "telemetry") == 1
@@ -0,0 +1,146 @@
+"""
+Tests for the columnar telemetry export and reader.
+"""
+import importlib.util
+
+import numpy as np
+import pytest
+
+from backend.simulation import database, export
+from backend.simulation.export import export_profile, read_anomaly_events, read_telemetry
+
+
+DAY = 86400.0
+T0 = 1_700_000_000.0
+
+
+def write_rows(db_path, n, offset=0, profile_id=2):
+    writer = database.TelemetryWriter(db_path)
+    for i in range(offset, offset + n):
+        writer.submit_telemetry({
+            "seq_id": i,
+            "node_id": f"node-{i % 3 + 1}",
+            # Spread over several UTC days
+            "timestamp": T0 + i * 3600.0,
+            "temperature": 20.0 + i * 0.01,
+            "humidity": 45.0,
+            "airflow": 2.5,
+            "cpu_load": 0.5,
+            "is_anomaly": i % 10 == 0,
+            "anomaly_score": None if i < 9 else 0.3,
+            "profile_id": profile_id,
+        })
+    writer.submit_anomaly_event({
+        "seq_id": offset, "node_id": "node-1", "injection_timestamp": T0 + offset,
+        "detection_source": "central", "central_latency_ms": 1500.0, "profile_id": profile_id,
+    })
+    writer.close()
+
+
+def test_round_trip(db_path, tmp_path):
+    write_rows(db_path, 100)
+    write_rows(db_path, 5, offset=1000, profile_id=None)
+    out = tmp_path / "export"
+
+    summary = export_profile(out, profile_id=2, part_rows=7)
+    assert summary["telemetry"]["rows"] == 100
+    assert summary["anomaly_events"]["rows"] == 1
+
+    cols = read_telemetry(out, profile_id=2)
+    expected = database.get_telemetry_range("node-1", 0, 2 * T0, profile_id=2)
+    node1 = cols["node_id"] == "node-1"
+    np.testing.assert_array_equal(cols["id"][node1], [r["id"] for r in expected])
+    np.testing.assert_array_equal(cols["temperature"][node1], [r["temperature"] for r in expected])
+    assert np.isnan(cols["anomaly_score"][:9]).all()
+    assert (out / "telemetry" / "profile=2" / "node=node-2").is_dir()
+
+    events = read_anomaly_events(out, profile_id=2)
+    assert events["detection_source"].tolist() == ["central"]
+    assert events["central_latency_ms"].tolist() == [1500.0]
+
+    assert len(read_telemetry(out, profile_id=None)["id"]) == 0
+
+
+def test_incremental_export_only_appends_new_rows(db_path, tmp_path):
+    out = tmp_path / "export"
+    write_rows(db_path, 30)
+    export_profile(out, profile_id=2)
+    assert export_profile(out, profile_id=2)["telemetry"]["rows"] == 0
+
+    write_rows(db_path, 20, offset=30)
+    assert export_profile(out, profile_id=2)["telemetry"]["rows"] == 20
+
+    cols = read_telemetry(out, profile_id=2)
+    assert len(cols["id"]) == 50
+    assert (np.diff(cols["id"]) > 0).all()
+
+
+def test_filters_and_column_selection(db_path, tmp_path):
+    out = tmp_path / "export"
+    write_rows(db_path, 100)
+    export_profile(out, profile_id=2)
+
+    start, end = T0 + 10 * 3600.0, T0 + 2 * DAY
+    cols = read_telemetry(out, profile_id=2, node_ids=["node-2"], start=start, end=end,
+                          columns=["temperature"])
+    assert set(cols) == {"id", "timestamp", "temperature"}
+    assert ((cols["timestamp"] >= start) & (cols["timestamp"] <= end)).all()
+    expected = [T0 + i * 3600.0 for i in range(100) if i % 3 == 1 and start <= T0 + i * 3600.0 <= end]
+    np.testing.assert_array_equal(cols["timestamp"], expected)
+
+
+def test_anomaly_events_filtered_by_node(db_path, tmp_path):
+    out = tmp_path / "export"
+    write_rows(db_path, 10)
+    write_rows(db_path, 10, offset=10)
+    writer = database.TelemetryWriter(db_path)
+    writer.submit_anomaly_event({"seq_id": 99, "node_id": "node-2", "injection_timestamp": T0, "profile_id": 2})
+    writer.close()
+    export_profile(out, profile_id=2)
+
+    assert len(read_anomaly_events(out, profile_id=2)["id"]) == 3
+    events = read_anomaly_events(out, profile_id=2, node_ids=["node-1"])
+    assert events["node_id"].tolist() == ["node-1", "node-1"]
+    events = read_anomaly_events(out, profile_id=2, node_ids=["node-2"], columns=["seq_id"])
+    assert set(events) == {"id", "injection_timestamp", "seq_id"}
+    assert events["seq_id"].tolist() == [99]
+
+
+def test_buffered_rows_are_capped(db_path, tmp_path, monkeypatch):
+    write_rows(db_path, 100)
+    peak = []
+    add = export._PartitionBuffer.add
+
+    def tracked_add(self, partition, row):
+        add(self, partition, row)
+        peak.append(self._buffered)
+
+    monkeypatch.setattr(export._PartitionBuffer, "add", tracked_add)
+    out = tmp_path / "export"
+    summary = export_profile(out, profile_id=2, buffer_rows=10)
+    assert max(peak) < 10
+    assert summary["telemetry"]["rows"] == 100
+    np.testing.assert_array_equal(read_telemetry(out, profile_id=2)["id"], np.arange(1, 101))
+
+
+def test_parquet_round_trip(db_path, tmp_path):
+    pytest.importorskip("pyarrow")
+    write_rows(db_path, 100)
+    npz, parquet = tmp_path / "npz", tmp_path / "parquet"
+    export_profile(npz, profile_id=2, part_rows=7)
+    summary = export_profile(parquet, profile_id=2, fmt="parquet", part_rows=7)
+    assert summary["telemetry"]["rows"] == 100
+    assert all(p["path"].endswith(".parquet") for p in export._load_manifest(parquet)["parts"])
+
+    expected, actual = read_telemetry(npz, profile_id=2), read_telemetry(parquet, profile_id=2)
+    assert set(actual) == set(expected)
+    for name, values in expected.items():
+        np.testing.assert_array_equal(np.asarray(actual[name], dtype=values.dtype), values)
+    events = read_anomaly_events(parquet, profile_id=2)
+    assert list(events["detection_source"]) == ["central"]
+
+
+@pytest.mark.skipif(importlib.util.find_spec("pyarrow") is not None, reason="pyarrow installed")
+def test_parquet_requires_pyarrow(db_path, tmp_path):
+    with pytest.raises(ImportError):
+        export_profile(tmp_path / "export", profile_id=2, fmt="parquet")
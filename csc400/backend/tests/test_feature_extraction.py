@@ -4,7 +4,12 @@ import numpy as np
 from collections import deque
 
 # Adjust the import path to match your project structure
-from backend.ml.feature_extraction import SlidingWindowFeatureExtractor
+from backend.ml.feature_extraction import (
+    FEATURE_VARIABLES,
+    SlidingWindowFeatureExtractor,
+    extract_features_batch,
+    extract_features_grouped,
+)
 
 class TestSlidingWindowFeatureExtractor(unittest.TestCase):
 
@@ -121,5 +126,96 @@ class TestSlidingWindowFeatureExtractor(unittest.TestCase):
         self.assertAlmostEqual(features[1], np.var(new_temps))
         self.assertAlmostEqual(features[2], 25 - 21)
 
+
+class TestIncrementalFeatureExtractor(unittest.TestCase):
+
+    def make_stream(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        drift = np.arange(n) * 1e-3
+        return [
+            {
+                "temperature": 21.0 + drift[i] + rng.normal(0, 0.01),
+                "airflow": 2.5 + rng.normal(0, 0.08),
+                "humidity": 45.0 + rng.uniform(-0.2, 0.2),
+                "cpu_load": 0.5 + rng.normal(0, 0.02),
+            }
+            for i in range(n)
+        ]
+
+    def test_matches_default_mode(self):
+        """Incremental features match the recompute-from-scratch features on a long stream."""
+        reference = SlidingWindowFeatureExtractor(window_size=10)
+        incremental = SlidingWindowFeatureExtractor(window_size=10, incremental=True)
+        for point in self.make_stream(2000):
+            reference.add_point(point)
+            incremental.add_point(point)
+            self.assertEqual(len(reference), len(incremental))
+            if reference.is_window_ready():
+                np.testing.assert_allclose(
+                    incremental.extract_features(), reference.extract_features(),
+                    rtol=1e-9, atol=1e-12,
+                )
+
+    def test_window_readiness_and_not_ready_error(self):
+        """Readiness and the not-ready error behave as in default mode."""
+        extractor = SlidingWindowFeatureExtractor(window_size=5, incremental=True)
+        with self.assertRaises(ValueError):
+            extractor.extract_features()
+        for i, point in enumerate(self.make_stream(5)):
+            self.assertFalse(extractor.is_window_ready())
+            extractor.add_point(point)
+        self.assertTrue(extractor.is_window_ready())
+        self.assertEqual(len(extractor), 5)
+
+    def test_reanchoring_keeps_large_offsets_accurate(self):
+        """Large absolute values with tiny variance do not lose precision."""
+        extractor = SlidingWindowFeatureExtractor(window_size=10, incremental=True, reanchor_interval=3)
+        values = 1e6 + np.arange(50) * 1e-3
+        for v in values:
+            extractor.add_point({"temperature": v, "airflow": v, "humidity": v, "cpu_load": v})
+        features = extractor.extract_features()
+        self.assertAlmostEqual(features[0], np.mean(values[-10:]), places=6)
+        self.assertAlmostEqual(features[1], np.var(values[-10:]), places=9)
+        self.assertAlmostEqual(features[2], values[-1] - values[-10], places=9)
+
+
+class TestBatchFeatureExtraction(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.values = np.cumsum(rng.normal(size=(500, 4)), axis=0) + [21.0, 2.5, 45.0, 0.5]
+
+    def streamed(self, values, window_size=10):
+        extractor = SlidingWindowFeatureExtractor(window_size=window_size)
+        rows = []
+        for row in values:
+            extractor.add_point(dict(zip(FEATURE_VARIABLES, row)))
+            if extractor.is_window_ready():
+                rows.append(extractor.extract_features())
+        return np.array(rows).reshape(-1, 12)
+
+    def test_batch_is_identical_to_streaming(self):
+        """The batch matrix equals the point-by-point extractor output exactly."""
+        batch = extract_features_batch(self.values, window_size=10, chunk_size=64)
+        np.testing.assert_array_equal(batch, self.streamed(self.values))
+
+    def test_batch_short_input(self):
+        """Fewer points than the window yields an empty (0, 12) matrix."""
+        self.assertEqual(extract_features_batch(self.values[:9]).shape, (0, 12))
+        self.assertEqual(extract_features_batch(self.values[:10]).shape, (1, 12))
+
+    def test_grouped_matches_groupby_loop(self):
+        """Grouped extraction matches a fresh extractor per group in sorted key order."""
+        groups = np.array(["node-2", "node-1", "node-3"] * 166 + ["node-1", "node-1"])
+        features, end_index = extract_features_grouped(self.values, groups)
+
+        expected, expected_end = [], []
+        for key in sorted(set(groups)):
+            idx = np.flatnonzero(groups == key)
+            expected.append(self.streamed(self.values[idx]))
+            expected_end.append(idx[9:])
+        np.testing.assert_array_equal(features, np.vstack(expected))
+        np.testing.assert_array_equal(end_index, np.concatenate(expected_end))
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests for on-disk feature matrices and chunked scaling / scoring.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import RobustScaler
+
+from backend.ml.feature_matrix import (
+    FeatureMatrixWriter, csv_to_npy, load_feature_csv, scale_chunked, score_chunked,
+)
+from backend.ml.feature_store import FeatureStore
+
+
+def test_writer_grows_header_in_place(tmp_path):
+    path = str(tmp_path / "features.npy")
+    rng = np.random.default_rng(0)
+    blocks = [rng.normal(size=(n, 12)) for n in (7, 0, 1000, 3)]
+    with FeatureMatrixWriter(path, 12) as writer:
+        for block in blocks:
+            writer.append(block)
+
+    matrix = np.load(path, mmap_mode="r")
+    assert isinstance(matrix, np.memmap)
+    np.testing.assert_array_equal(matrix, np.vstack(blocks))
+
+    with pytest.raises(ValueError):
+        FeatureMatrixWriter(str(tmp_path / "bad.npy"), 12).append(np.zeros((2, 11)))
+
+
+def test_csv_to_npy_in_chunks(tmp_path):
+    features = np.random.default_rng(1).normal(size=(250, 12))
+    csv = tmp_path / "features.csv"
+    np.savetxt(csv, features, delimiter=",", fmt="%.17g")
+
+    matrix = csv_to_npy(str(csv), str(tmp_path / "features.npy"), chunk_rows=64)
+    # Same values as the single pd.read_csv(header=None) it replaces
+    np.testing.assert_array_equal(matrix, pd.read_csv(csv, header=None).to_numpy())
+
+
+def test_load_feature_csv_is_cached(tmp_path):
+    csv = tmp_path / "features.csv"
+    np.savetxt(csv, np.arange(24.0).reshape(2, 12), delimiter=",")
+    store = FeatureStore(root=str(tmp_path / "cache"))
+
+    first = load_feature_csv(str(csv), store)
+    second = load_feature_csv(str(csv), store)
+    assert first.filename == second.filename
+    np.testing.assert_array_equal(second, np.arange(24.0).reshape(2, 12))
+
+    # Disabled store: a temporary file, mapped and already unlinked
+    uncached = load_feature_csv(str(csv), FeatureStore(enabled=False))
+    np.testing.assert_array_equal(uncached, second)
+
+
+def test_chunked_scaling_and_scoring_match_one_pass(tmp_path):
+    X = np.random.default_rng(2).normal(size=(1000, 12))
+    scaler = RobustScaler().fit(X)
+    model = IsolationForest(n_estimators=20, random_state=0).fit(scaler.transform(X))
+
+    out = np.lib.format.open_memmap(str(tmp_path / "scaled.npy"), mode="w+", dtype=np.float64, shape=X.shape)
+    scaled = scale_chunked(scaler, X, chunk_rows=128, out=out)
+    assert scaled is out
+    np.testing.assert_allclose(scaled, scaler.transform(X))
+
+    np.testing.assert_allclose(
+        score_chunked(model, scaler, X, chunk_rows=128),
+        model.decision_function(scaler.transform(X)),
+    )
+    assert len(score_chunked(model, scaler, X[:0])) == 0
@@ -0,0 +1,75 @@
+"""
+Tests for the content-addressed feature cache.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from backend.ml.feature_store import FeatureStore
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "telemetry.csv"
+    path.write_text("temperature\n1\n2\n3\n")
+    return path
+
+
+def test_caches_until_source_or_params_change(tmp_path, source):
+    store = FeatureStore(root=str(tmp_path / "cache"))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"features": np.arange(12.0).reshape(1, 12), "rows": np.array(3)}
+
+    first = store.get("windows", [source], {"window_size": 10}, compute)
+    again = store.get("windows", [source], {"window_size": 10}, compute)
+    assert len(calls) == 1
+    assert isinstance(again["features"], np.memmap)
+    np.testing.assert_array_equal(first["features"], again["features"])
+    assert int(again["rows"]) == 3
+
+    store.get("windows", [source], {"window_size": 5}, compute)
+    assert len(calls) == 2
+
+    source.write_text("temperature\n1\n2\n4\n")
+    store.get("windows", [source], {"window_size": 10}, compute)
+    assert len(calls) == 3
+
+    # A fresh store (new process) reuses the entry on disk
+    FeatureStore(root=str(tmp_path / "cache")).get("windows", [source], {"window_size": 10}, compute)
+    assert len(calls) == 3
+
+
+def test_digest_memo_skips_rehashing_unchanged_files(tmp_path, source, monkeypatch):
+    store = FeatureStore(root=str(tmp_path / "cache"))
+    digest = store.file_digest(str(source))
+
+    reopened = FeatureStore(root=str(tmp_path / "cache"))
+    monkeypatch.setattr("builtins.open", _fail_on(str(source), open))
+    assert reopened.file_digest(str(source)) == digest
+
+
+def _fail_on(path, real_open):
+    def guarded(file, *args, **kwargs):
+        if os.path.abspath(str(file)) == os.path.abspath(path):
+            raise AssertionError("source was re-read")
+        return real_open(file, *args, **kwargs)
+    return guarded
+
+
+def test_incomplete_entries_and_disabled_store(tmp_path, source):
+    store = FeatureStore(root=str(tmp_path / "cache"))
+    store.get_features("windows", [source], {}, lambda: np.ones((2, 12)))
+    key = store.key("windows", [source], {})
+    os.remove(os.path.join(store._entry_dir("windows", key), "meta.json"))
+    assert store.load("windows", key) is None
+
+    disabled = FeatureStore(root=str(tmp_path / "off"), enabled=False)
+    assert disabled.get_features("windows", [source], {}, lambda: np.zeros((1, 12))).shape == (1, 12)
+    assert not (tmp_path / "off").exists()
+
+    with pytest.raises(TypeError):
+        store.get("bad", [source], {}, lambda: {"labels": np.array(["a", None], dtype=object)})
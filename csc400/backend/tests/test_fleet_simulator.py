@@ -0,0 +1,94 @@
+"""
+Unit tests for the vectorized FleetSimulator.
+
+The fleet draws noise from a numpy Generator, so equivalence with VirtualNode is
+checked with all noise sources silenced on both sides.
+"""
+import numpy as np
+import pytest
+
+from backend.simulation.airflow import AirflowModel
+from backend.simulation.fleet import FleetSimulator
+from backend.simulation.humidity import HumidityModel
+from backend.simulation.node import VirtualNode
+from backend.simulation.thermal_model import ThermalModel
+
+
+def make_silent_node(node_id: str, initial_temp: float) -> VirtualNode:
+    """VirtualNode matching api.make_node() with every noise source set to zero."""
+    thermal = ThermalModel(50.0, 1005.0, 500.0, 300.0, initial_temp, 20.0)
+    airflow = AirflowModel(nominal_flow=2.5, random_seed=1)
+    humidity = HumidityModel(45.0, 0.01, 0.0, 2, reference_temp=21.0)
+    node = VirtualNode(node_id, thermal, airflow, humidity, random_seed=3)
+    node.anomaly_model = None
+    node.rng.gauss = lambda mu, sigma: 0.0
+    airflow.rng.gauss = lambda mu, sigma: 0.0
+    return node
+
+
+def make_silent_pair():
+    nodes = [make_silent_node("node-1", 21.0), make_silent_node("node-2", 22.0),
+             make_silent_node("node-3", 21.5)]
+    fleet = FleetSimulator.from_nodes(nodes, cpu_noise_std=0.0, airflow_noise_std=0.0, seed=0)
+    return nodes, fleet
+
+
+def assert_matches(nodes, fleet, steps):
+    for _ in range(steps):
+        frame = fleet.step()
+        for i, node in enumerate(nodes):
+            t = node.step()
+            for key in ("temperature", "humidity", "airflow", "cpu_load"):
+                assert frame[key][i] == pytest.approx(t[key], abs=1e-12), key
+
+
+def test_matches_virtual_node_physics():
+    nodes, fleet = make_silent_pair()
+    assert_matches(nodes, fleet, 50)
+
+
+def test_matches_virtual_node_with_injections():
+    nodes, fleet = make_silent_pair()
+    assert_matches(nodes, fleet, 5)
+
+    nodes[0].inject_hvac_failure(duration_seconds=40)
+    fleet.inject_hvac_failure(0, duration_seconds=40)
+    nodes[1].inject_thermal_spike(duration_seconds=30, lag_seconds=10)
+    fleet.inject_thermal_spike(1, duration_seconds=30, lag_seconds=10)
+    nodes[2].inject_coolant_leak()
+    fleet.inject_coolant_leak(2)
+
+    assert_matches(nodes, fleet, 60)
+    assert not fleet.coolant_leak_active.any()
+    assert fleet.obstruction_ratio[0] == 0.0
+
+
+def test_seeded_runs_are_reproducible():
+    a = FleetSimulator(100, seed=7)
+    b = FleetSimulator(100, seed=7)
+    for _ in range(20):
+        fa, fb = a.step(), b.step()
+        for key in fa:
+            np.testing.assert_array_equal(fa[key], fb[key])
+
+
+def test_per_node_parameters_and_bounds():
+    fleet = FleetSimulator(4, initial_temperature=[20.0, 21.0, 22.0, 23.0], seed=1)
+    for _ in range(100):
+        frame = fleet.step()
+    assert frame["temperature"].shape == (4,)
+    assert np.all((frame["cpu_load"] >= 0.1) & (frame["cpu_load"] <= 0.9))
+    assert np.all((frame["humidity"] >= 0.0) & (frame["humidity"] <= 100.0))
+    assert np.all(frame["airflow"] >= 0.0)
+    assert fleet.telemetry(frame, 2)["node_id"] == "node-3"
+
+    with pytest.raises(ValueError):
+        FleetSimulator(3, initial_temperature=[20.0, 21.0])
+
+
+def test_full_obstruction_stops_airflow():
+    fleet = FleetSimulator(2, seed=3)
+    fleet.set_obstruction(fleet.index_of("node-2"), 1.0)
+    frame = fleet.step()
+    assert frame["airflow"][1] == 0.0
+    assert frame["airflow"][0] > 0.0
@@ -0,0 +1,129 @@
+"""
+Unit tests for the binary websocket frame encoding.
+"""
+import json
+import random
+import struct
+
+import pytest
+
+from backend.simulation import frame_codec
+from backend.simulation.frame_codec import FRAME_FIELDS, FrameDecoder, FrameEncoder
+
+
+def make_frame(rng, node_ids, t, changed=None):
+    frame = {}
+    for i, node_id in enumerate(node_ids):
+        frame[node_id] = {
+            "node_id": node_id,
+            "timestamp": t,
+            "temperature": 21.0 + rng.random(),
+            "humidity": 45.0 + rng.random(),
+            "airflow": 2.5,
+            "cpu_load": 0.5 if changed is not None and i not in changed else rng.random(),
+            "anomaly_score": None if t < 5 else rng.random(),
+            "is_anomaly": i % 2 == 0,
+            "obstruction_ratio": 0.0,
+        }
+    return frame
+
+
+def assert_decoded_matches(decoded, frame):
+    assert list(decoded["nodes"]) == list(frame)
+    for node_id, telemetry in frame.items():
+        for field in FRAME_FIELDS:
+            expected = telemetry[field]
+            got = decoded["nodes"][node_id][field]
+            if expected is None:
+                assert got is None
+            else:
+                assert got == pytest.approx(float(expected), rel=1e-6), field
+
+
+def test_keyframe_and_delta_round_trip():
+    rng = random.Random(0)
+    node_ids = [f"node-{i}" for i in range(50)]
+    encoder, decoder = FrameEncoder(), FrameDecoder()
+
+    for t in range(20):
+        frame = make_frame(rng, node_ids, float(t))
+        encoded = encoder.encode(frame)
+        assert json.loads(encoded.text) == frame
+        data = encoded.binary(use_delta=t > 0)
+        decoded = decoder.decode(data)
+        assert decoded["seq"] == encoded.seq
+        assert decoded["timestamp"] == float(t)
+        assert_decoded_matches(decoded, frame)
+
+
+def test_delta_only_carries_changed_cells():
+    rng = random.Random(1)
+    node_ids = [f"node-{i}" for i in range(200)]
+    encoder = FrameEncoder()
+    encoder.encode(make_frame(rng, node_ids, 10.0))
+    frame = make_frame(random.Random(1), node_ids, 10.0)
+    frame["node-7"]["temperature"] = 99.0
+    encoded = encoder.encode(frame)
+
+    delta, keyframe = encoded.delta(), encoded.keyframe()
+    assert len(delta) < len(keyframe) / 10
+    assert len(keyframe) < len(encoded.text) / 2
+
+
+def test_node_set_change_forces_keyframe():
+    rng = random.Random(2)
+    encoder = FrameEncoder()
+    encoder.encode(make_frame(rng, ["a", "b"], 1.0))
+    encoded = encoder.encode(make_frame(rng, ["a", "b", "c"], 2.0))
+    assert not encoded.has_delta()
+    assert encoded.binary(use_delta=True) == encoded.keyframe()
+
+
+def test_delta_out_of_order_is_rejected():
+    rng = random.Random(3)
+    encoder, decoder = FrameEncoder(), FrameDecoder()
+    decoder.decode(encoder.encode(make_frame(rng, ["a"], 1.0)).keyframe())
+    encoder.encode(make_frame(rng, ["a"], 2.0))
+    skipped = encoder.encode(make_frame(rng, ["a"], 3.0))
+    with pytest.raises(ValueError):
+        decoder.decode(skipped.delta())
+
+
+def test_node_id_length_is_limited():
+    rng = random.Random(4)
+    longest = "\u00e9" * 127 + "a"  # 255 bytes in UTF-8
+    encoded = FrameEncoder().encode(make_frame(rng, [longest], 1.0))
+    assert list(FrameDecoder().decode(encoded.keyframe())["nodes"]) == [longest]
+
+    encoded = FrameEncoder().encode(make_frame(rng, [longest + "b"], 1.0))
+    assert json.loads(encoded.text)
+    with pytest.raises(ValueError, match="256 bytes"):
+        encoded.keyframe()
+
+
+def test_version_1_frame_is_rejected():
+    # Version 1 header: no field_mask, then a 1 x 7 keyframe
+    v1 = struct.pack("<4sBBHHId", b"EHF1", 1, 0, 1, len(FRAME_FIELDS), 1, 1.0)
+    v1 += bytes([1]) + b"a" + bytes(4 * len(FRAME_FIELDS))
+    with pytest.raises(ValueError, match="version 1"):
+        FrameDecoder().decode(v1)
+    with pytest.raises(ValueError, match="Not an EHF1"):
+        FrameDecoder().decode(b"XXXX" + v1[4:])
+
+
+def test_matrix_is_packed_only_for_binary_views(monkeypatch):
+    packed = []
+    frame_matrix = frame_codec.frame_matrix
+    monkeypatch.setattr(frame_codec, "frame_matrix", lambda *args: packed.append(1) or frame_matrix(*args))
+
+    rng = random.Random(4)
+    encoder = FrameEncoder()
+    for t in range(5):
+        encoded = encoder.encode(make_frame(rng, ["a", "b"], float(t)))
+        encoded.text_view(nodes=("a",))
+    assert packed == []
+
+    # A delta packs this frame and the previous one, each once
+    encoded.delta()
+    encoded.keyframe(fields=("temperature",))
+    assert len(packed) == 2
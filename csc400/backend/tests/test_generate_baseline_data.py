@@ -0,0 +1,40 @@
+"""
+Tests for the vectorized baseline feature generator.
+"""
+import json
+
+import numpy as np
+
+from backend.ml.feature_extraction import FEATURE_VARIABLES, SlidingWindowFeatureExtractor
+from backend.ml.generate_baseline_data import generate_baseline, manifest_path
+from backend.simulation.fleet import FleetSimulator
+
+
+def test_chunked_output_matches_per_node_extractor(tmp_path):
+    out = tmp_path / "baseline.npy"
+    # A chunk size that does not divide the duration exercises the carried-over windows
+    features = generate_baseline(duration_steps=120, output_path=str(out), n_nodes=3,
+                                 seeds=[5, 6], chunk_steps=37)
+    assert features.shape == (2 * 3 * 111, 12)
+
+    expected = []
+    for seed in (5, 6):
+        fleet = FleetSimulator(3, seed=seed)
+        extractors = [SlidingWindowFeatureExtractor(window_size=10) for _ in range(3)]
+        rows = [[] for _ in range(3)]
+        for _ in range(120):
+            frame = fleet.step()
+            for node, extractor in enumerate(extractors):
+                extractor.add_point({var: frame[var][node] for var in FEATURE_VARIABLES})
+                if extractor.is_window_ready():
+                    rows[node].append(extractor.extract_features())
+        for node_rows in rows:
+            expected.extend(node_rows)
+
+    np.testing.assert_allclose(np.load(out, mmap_mode="r"), np.array(expected), rtol=1e-12, atol=1e-12)
+
+    with open(manifest_path(str(out))) as f:
+        manifest = json.load(f)
+    assert manifest["shape"] == [666, 12]
+    assert manifest["seeds"] == [5, 6]
+    assert manifest["rows_per_node"] == 111
@@ -0,0 +1,62 @@
+"""
+Tests for the per-mote MIT feature generation in generate_real_features.py.
+"""
+import functools
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+import generate_real_features
+from backend.ml.datasets import read_mit
+from backend.ml.feature_store import FeatureStore
+
+HEADER = "Date,Timestamp,Epoch,Moteid,Temp (C),Humidity,Light,Voltage\n"
+
+
+def mit_rows(motes, n=40):
+    start = datetime(2004, 2, 28, 0, 59, 16)
+    rows = []
+    for i in range(n):
+        for mote in motes:
+            # Unique timestamps, so sorting each mote by time has no ties
+            t = start + timedelta(seconds=31 * i + mote)
+            # A mote's readings are the same whichever other motes are present
+            rng = random.Random(mote * 1000 + i)
+            temp = 60.0 if i == 17 else 19.0 + rng.random()
+            rows.append(f"{t.month}/{t.day}/{t.year},{t.strftime('%I:%M:%S %p')},{i},{mote},"
+                        f"{temp:.4f},{37.0 + rng.random():.4f},45.08,2.69")
+    return rows
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    """Runs the MIT step on the given CSV rows and returns the written feature matrix."""
+    (tmp_path / "data" / "real").mkdir(parents=True)
+    monkeypatch.chdir(tmp_path)
+
+    def run_rows(rows, workers):
+        csv = tmp_path / "mit.csv"
+        csv.write_text(HEADER + "\n".join(rows) + "\n")
+        monkeypatch.setattr(generate_real_features, "read_mit",
+                            functools.partial(read_mit, str(csv), store=FeatureStore(enabled=False)))
+        generate_real_features.generate_mit_features_and_validation(workers=workers)
+        return np.loadtxt(tmp_path / "data" / "real" / "mit_features.csv", delimiter=",", ndmin=2)
+
+    return run_rows
+
+
+def test_pool_matches_serial_in_any_row_order(run):
+    rows = mit_rows([1, 2, 3])
+    serial = run(rows, workers=0)
+    assert serial.shape[1] == 12 and len(serial) > 0
+
+    random.Random(1).shuffle(rows)
+    np.testing.assert_array_equal(run(rows, workers=2), serial)
+
+
+def test_mote_output_does_not_depend_on_other_motes(run):
+    full = run(mit_rows([1, 2, 3]), workers=0)
+    alone = [run(mit_rows([mote]), workers=0) for mote in (1, 2, 3)]
+    np.testing.assert_array_equal(full, np.vstack(alone))
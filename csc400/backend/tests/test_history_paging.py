@@ -0,0 +1,83 @@
+"""
+Tests for keyset-paginated and NDJSON-streamed history endpoints.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.simulation import database
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    from backend import api
+
+    monkeypatch.setattr(database, "DB_DIR", tmp_path)
+    monkeypatch.setattr(database, "DB_PATH", tmp_path / "test.db")
+    database.init_db()
+
+    writer = database.TelemetryWriter(tmp_path / "test.db")
+    for i in range(50):
+        # Pairs of rows share a timestamp so paging must break ties on id
+        writer.submit_telemetry({
+            "seq_id": i, "node_id": "node-1", "timestamp": 100.0 + i // 2,
+            "temperature": 20.0 + i, "profile_id": 1,
+        })
+    for i in range(12):
+        writer.submit_anomaly_event({
+            "seq_id": i, "node_id": "node-2", "detection_source": "central",
+            "injection_timestamp": None if i % 4 == 0 else 500.0 + i // 3,
+        })
+    writer.close()
+    return TestClient(api.app)
+
+
+def fetch_all_pages(client, url, key, limit, **query):
+    rows, cursor, pages = [], None, 0
+    while True:
+        params = {**query, "limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        body = client.get(url, params=params).json()
+        rows.extend(body[key])
+        pages += 1
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return rows, pages
+
+
+def test_telemetry_pages_cover_range_once(client):
+    query = {"node_id": "node-1", "start": 0, "end": 1000, "profile_id": 1}
+    full = client.get("/db/history/telemetry", params=query).json()["rows"]
+    paged, pages = fetch_all_pages(client, "/db/history/telemetry", "rows", limit=7, **query)
+
+    assert [r["id"] for r in paged] == [r["id"] for r in full]
+    assert len(paged) == 50
+    assert pages == 8
+
+
+def test_event_pages_follow_injection_order(client):
+    full = client.get("/db/history/events").json()["events"]
+    paged, _ = fetch_all_pages(client, "/db/history/events", "events", limit=5)
+
+    assert [e["id"] for e in paged] == [e["id"] for e in full]
+    keys = [database.anomaly_event_key(e) for e in paged]
+    assert keys == sorted(keys, reverse=True)
+    assert all(e["injection_timestamp"] is None for e in paged[-3:])
+
+
+def test_ndjson_stream(client):
+    response = client.get(
+        "/db/history/telemetry",
+        params={"node_id": "node-1", "start": 0, "end": 1000, "format": "ndjson"},
+    )
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 50
+    assert [r["seq_id"] for r in rows] == list(range(50))
+
+
+def test_invalid_cursor(client):
+    response = client.get("/db/history/events", params={"cursor": "nope"})
+    assert response.status_code == 400
@@ -72,5 +72,31 @@ class TestModelLoader(unittest.TestCase):
         self.assertIsInstance(res_normal["is_anomaly"], bool)
         self.assertIsInstance(res_anomaly["is_anomaly"], bool)
 
+    def test_predict_batch_matches_predict(self):
+        """
+        predict_batch() returns the same scores and flags as row-by-row predict().
+        """
+        vectors = [
+            [21.0, 0.1, 0.0, 2.5, 0.01, 0.0, 45.0, 0.5, 0.0, 0.5, 0.01, 0.0],
+            [50.0, 10.0, 5.0, 0.1, 1.0, -1.0, 90.0, 20.0, 5.0, 0.9, 0.1, 0.1],
+            [22.0, 0.02, 0.1, 2.4, 0.02, -0.1, 44.0, 0.1, 0.2, 0.6, 0.02, 0.05],
+        ]
+        batch = self.model.predict_batch(vectors)
+
+        self.assertEqual(batch["anomaly_scores"].shape, (3,))
+        self.assertEqual(batch["is_anomaly"].dtype, bool)
+        for i, vector in enumerate(vectors):
+            single = self.model.predict(vector)
+            self.assertEqual(single["anomaly_score"], float(batch["anomaly_scores"][i]))
+            self.assertEqual(single["is_anomaly"], bool(batch["is_anomaly"][i]))
+
+    def test_predict_batch_empty(self):
+        """
+        An empty batch returns empty arrays without calling the model.
+        """
+        batch = self.model.predict_batch(np.empty((0, 12)))
+        self.assertEqual(len(batch["anomaly_scores"]), 0)
+        self.assertEqual(len(batch["is_anomaly"]), 0)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,56 @@
+"""
+Unit tests for the process-wide ModelRegistry.
+"""
+import pytest
+
+from backend.ml.model_loader import ModelLoader
+from backend.ml.model_registry import ModelRegistry, registry as shared_registry
+from backend.simulation.airflow import AirflowModel
+from backend.simulation.humidity import HumidityModel
+from backend.simulation.node import VirtualNode
+from backend.simulation.thermal_model import ThermalModel
+
+
+@pytest.fixture
+def registry():
+    reg = ModelRegistry()
+    try:
+        reg.get()
+    except FileNotFoundError:
+        pytest.skip("Model or Scaler files not found.")
+    return reg
+
+
+def make_node(node_id, model=None):
+    thermal = ThermalModel(50.0, 1005.0, 500.0, 300.0, 21.0, 20.0)
+    airflow = AirflowModel(nominal_flow=2.5, random_seed=1)
+    humidity = HumidityModel(45.0, 0.01, 0.2, 2, reference_temp=21.0)
+    return VirtualNode(node_id, thermal, airflow, humidity, random_seed=3, anomaly_model=model)
+
+
+def test_get_returns_shared_instance(registry):
+    first = registry.get()
+    assert registry.get() is first
+    assert registry.get(ModelLoader.DEFAULT_MODEL_PATH, ModelLoader.DEFAULT_SCALER_PATH) is first
+
+
+def test_nodes_share_one_model(registry):
+    # Nodes built without anomaly_model fetch the process-wide shared instance
+    nodes = [make_node(f"node-{i}") for i in range(5)]
+    model = shared_registry.get()
+    assert all(node.anomaly_model is model for node in nodes)
+
+
+def test_reload_swaps_instance(registry):
+    old = registry.get()
+    new = registry.reload()
+    assert new is not old
+    assert registry.get() is new
+
+
+def test_failed_load_is_not_cached(registry):
+    with pytest.raises(FileNotFoundError):
+        registry.get(model_path="models/does_not_exist.pkl")
+    with pytest.raises(FileNotFoundError):
+        registry.reload(model_path="models/does_not_exist.pkl")
+    assert isinstance(registry.get(), ModelLoader)
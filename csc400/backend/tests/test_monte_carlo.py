@@ -0,0 +1,64 @@
+"""
+Tests for the Monte Carlo detection-latency runner.
+"""
+import pytest
+
+from backend.ml.model_loader import ModelLoader
+from backend.simulation import monte_carlo
+
+
+@pytest.fixture(scope="module")
+def model():
+    try:
+        return ModelLoader()
+    except FileNotFoundError:
+        pytest.skip("Model or Scaler files not found.")
+
+
+def test_build_trials_rejects_unknown_scenarios():
+    trials = list(monte_carlo.build_trials(range(2), ["hvac_failure", "none"], [30, 60], 50))
+    assert len(trials) == 8
+    assert trials[0] == (0, "hvac_failure", 30, 50)
+    with pytest.raises(ValueError):
+        list(monte_carlo.build_trials(range(2), ["meteor_strike"], [30], 50))
+
+
+def test_trials_are_deterministic_and_detect_injections(model):
+    trial = (7, "hvac_failure", 40, 120)
+    first = monte_carlo.run_trial(trial, model)
+    assert monte_carlo.run_trial(trial, model) == first
+
+    assert first["detected"]
+    # Latency is counted in whole simulated steps
+    assert first["latency_ms"] > 0 and first["latency_ms"] % 1000 == 0
+
+    control = monte_carlo.run_trial((7, "none", 40, 120), model)
+    assert control["latency_ms"] is None and not control["detected"]
+
+
+def test_pool_matches_in_process(model):
+    trials = list(monte_carlo.build_trials(range(3), ["thermal_spike", "none"], [30], 60))
+    pooled = list(monte_carlo.run_experiment(trials, workers=2, chunk_size=2))
+    local = [monte_carlo.run_trial(trial, model) for trial in trials]
+    assert pooled == local
+
+    summary = monte_carlo.summarize(pooled)
+    assert summary["thermal_spike"]["trials"] == 3
+    assert summary["thermal_spike"]["detection_rate"] == 1.0
+    assert "latency_ms" not in summary["none"]
+
+
+def test_summary_excludes_trials_anomalous_at_injection():
+    def row(seed, latency_ms, anomalous_at_injection):
+        return {
+            "seed": seed, "scenario": "hvac_failure", "injection_step": 60, "horizon": 120,
+            "detected": latency_ms is not None, "latency_ms": latency_ms,
+            "anomalous_at_injection": anomalous_at_injection,
+            "false_alarms": int(anomalous_at_injection), "false_positive_steps": 0, "scored_steps": 50,
+        }
+
+    rows = [row(0, 9000.0, False), row(1, 11000.0, False), row(2, None, False), row(3, 1000.0, True)]
+    entry = monte_carlo.summarize(rows)["hvac_failure"]
+    assert entry["anomalous_at_injection"] == 1
+    assert entry["detection_rate"] == pytest.approx(2 / 3)
+    assert entry["latency_ms"]["mean"] == 10000.0 and entry["latency_ms"]["min"] == 9000.0
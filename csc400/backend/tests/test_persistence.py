@@ -0,0 +1,62 @@
+"""
+Tests for the k-of-n anomaly persistence tracker shared by edge and central.
+"""
+import numpy as np
+import pytest
+
+from backend.ml.threshold_sweep import all_k_of_n, k_of_n
+from backend.simulation.central_server import CentralServer
+from backend.simulation.persistence import DEFAULT_POLICY, PersistenceTracker, parse_policy
+
+
+def test_default_matches_list_slicing():
+    flags = np.random.default_rng(0).random(500) < 0.05
+    tracker = PersistenceTracker()
+    recent = []
+    for flag in flags:
+        # The rule VirtualNode and CentralServer used to apply
+        recent = (recent + [bool(flag)])[-20:]
+        assert tracker.update(flag) == any(recent)
+        assert tracker.count == sum(recent)
+    assert tracker.flags()[-len(recent):] == recent
+
+
+def test_k_of_n_matches_offline_policy():
+    flags = np.random.default_rng(1).random(300) < 0.4
+    for k, n in all_k_of_n(6) + [DEFAULT_POLICY]:
+        tracker = PersistenceTracker(k, n)
+        online = [tracker.update(flag) for flag in flags]
+        np.testing.assert_array_equal(online, k_of_n(flags, k, n))
+
+
+def test_reset_and_validation():
+    tracker = PersistenceTracker(2, 3)
+    assert not tracker.update(True)
+    assert tracker.update(True)
+    tracker.reset()
+    assert tracker.count == 0 and tracker.flags() == [False] * 3
+    assert not tracker.update(True)
+
+    with pytest.raises(ValueError):
+        PersistenceTracker(3, 2)
+
+
+def test_parse_policy():
+    assert parse_policy(None) == DEFAULT_POLICY
+    assert parse_policy("2/3") == parse_policy("2-of-3") == parse_policy("2_of_3") == (2, 3)
+    for bad in ("3/2", "0/5", "any"):
+        with pytest.raises(ValueError):
+            parse_policy(bad)
+
+
+def test_central_server_uses_policy():
+    central = CentralServer(model_loader=None, persistence=(2, 2))
+    central._ensure_node("node-1")
+    central._update_persistence("node-1", True)
+    assert not central._prev_persistent["node-1"]
+    central._update_persistence("node-1", True)
+    assert central._prev_persistent["node-1"]
+    assert central._records["node-1"]["central_detection_ts"] is not None
+
+    central.record_injection("node-1", 0.0)
+    assert central._anomaly_flags["node-1"].count == 0
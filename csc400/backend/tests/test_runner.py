@@ -0,0 +1,64 @@
+"""
+Tests for the streaming simulation CLI runner.
+"""
+import csv
+import gzip
+
+import pytest
+
+from backend.ml.model_loader import ModelLoader
+from backend.simulation import runner
+
+
+@pytest.fixture(scope="module", autouse=True)
+def model():
+    try:
+        return ModelLoader()
+    except FileNotFoundError:
+        pytest.skip("Model or Scaler files not found.")
+
+
+def read_csv(path, opener=open):
+    with opener(path, "rt", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_streams_multi_node_gzip_csv_in_chunks(tmp_path, monkeypatch):
+    flushes = []
+    real_flush = runner.TelemetrySink.flush
+
+    def counting_flush(self):
+        flushes.append(len(self._buffer))
+        real_flush(self)
+
+    monkeypatch.setattr(runner.TelemetrySink, "flush", counting_flush)
+
+    out = tmp_path / "fleet.csv.gz"
+    rows = runner.run_simulation(30, seed=5, output_file=str(out), start=0.0, n_nodes=3, chunk_rows=7)
+    assert rows == 90
+    # Never more than one chunk held in memory
+    assert max(flushes) <= 7
+
+    data = read_csv(out, gzip.open)
+    assert len(data) == 90
+    assert list(data[0]) == list(runner.TELEMETRY_FIELDS)
+    assert {row["node_id"] for row in data} == {"node-1", "node-2", "node-3"}
+
+    # node-1 of a fleet run is the single-node run with the same seed
+    single = tmp_path / "single.csv"
+    runner.run_simulation(30, seed=5, output_file=str(single), start=0.0)
+    assert read_csv(single) == [row for row in data if row["node_id"] == "node-1"]
+
+
+def test_parquet_output(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    out = tmp_path / "run.parquet"
+    runner.run_simulation(12, seed=1, output_file=str(out), start=0.0, n_nodes=2, chunk_rows=5)
+    table = pq.read_table(str(out))
+    assert table.num_rows == 24
+    assert table.column_names == list(runner.TELEMETRY_FIELDS)
+
+
+def test_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        runner.TelemetrySink(str(tmp_path / "x.csv"), fmt="xlsx")
@@ -0,0 +1,113 @@
+"""
+Tests for the broadcast hub and the shared simulation task behind /ws/simulation.
+"""
+import asyncio
+import json
+import time
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from backend.simulation.broadcast import BroadcastHub
+
+
+def test_hub_fans_out_and_drops_oldest():
+    async def scenario():
+        hub = BroadcastHub(queue_size=2)
+        fast, slow = hub.subscribe(), hub.subscribe()
+
+        hub.publish("a")
+        assert await fast.get() == "a"
+        hub.publish("b")
+        hub.publish("c")
+
+        assert [await slow.get(), await slow.get()] == ["b", "c"]
+        assert slow.dropped == 1
+        assert fast.dropped == 0
+
+        hub.unsubscribe(slow)
+        hub.publish("d")
+        assert slow.qsize() == 0
+        assert hub.stats()["subscribers"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_viewers_share_one_simulation(api):
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation?profile_id=7") as first:
+            with client.websocket_connect("/ws/simulation") as second:
+                frames_b = [json.loads(second.receive_text()) for _ in range(3)]
+                stamps_b = [f["node-1"]["timestamp"] for f in frames_b]
+
+                # The first viewer sees the same frames, after the ones it had
+                # already queued before the second viewer joined
+                stamps_a = []
+                while stamps_b[0] not in stamps_a:
+                    stamps_a.append(json.loads(first.receive_text())["node-1"]["timestamp"])
+                stamps_a += [json.loads(first.receive_text())["node-1"]["timestamp"] for _ in range(2)]
+                assert stamps_a[-3:] == stamps_b
+
+                status = client.get("/simulation/status").json()
+                assert status["subscribers"] == 2
+                assert status["running"]
+                assert status["profile_id"] == 7
+
+    # One step per tick, however many viewers were connected
+    assert api._step_seq["node-1"] == api.hub.published
+
+
+def test_slow_tick_does_not_block_rest_requests(api, monkeypatch):
+    real_run_tick = api.run_tick
+
+    def slow_run_tick(profile_id):
+        time.sleep(0.5)
+        return real_run_tick(profile_id)
+
+    monkeypatch.setattr(api, "run_tick", slow_run_tick)
+
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation") as ws:
+            time.sleep(0.1)  # let the first tick start
+            started = time.monotonic()
+            assert client.get("/health").json()["ok"]
+            assert time.monotonic() - started < 0.3
+            json.loads(ws.receive_text())
+
+
+def test_failed_tick_closes_viewers(api, monkeypatch):
+    def failing_run_tick(profile_id):
+        raise RuntimeError("tick failed")
+
+    monkeypatch.setattr(api, "run_tick", failing_run_tick)
+
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation") as ws:
+            with pytest.raises(WebSocketDisconnect) as exc:
+                ws.receive_text()
+            assert exc.value.code == 1011
+        assert not client.get("/simulation/status").json()["running"]
+
+
+def test_binary_delta_stream_matches_json(api):
+    from backend.simulation.frame_codec import FrameDecoder
+
+    decoder = FrameDecoder()
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation") as text_ws:
+            with client.websocket_connect("/ws/simulation?encoding=binary&delta=1") as binary_ws:
+                decoded = [decoder.decode(binary_ws.receive_bytes()) for _ in range(15)]
+
+                by_timestamp = {}
+                while decoded[-1]["timestamp"] not in by_timestamp:
+                    frame = json.loads(text_ws.receive_text())
+                    by_timestamp[max(t["timestamp"] for t in frame.values())] = frame
+
+    for d in decoded:
+        frame = by_timestamp.get(d["timestamp"])
+        if frame is None:
+            continue
+        for node_id, telemetry in frame.items():
+            assert d["nodes"][node_id]["temperature"] == pytest.approx(telemetry["temperature"], rel=1e-6)
+            assert d["nodes"][node_id]["is_anomaly"] == telemetry["is_anomaly"]
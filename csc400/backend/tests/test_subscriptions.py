@@ -0,0 +1,104 @@
+"""
+Tests for per-viewer subscription filters on the simulation websocket.
+"""
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.simulation.frame_codec import FrameDecoder, FrameEncoder
+from backend.simulation.subscriptions import SubscriptionFilter
+
+
+def make_frame(t, anomalies=()):
+    return {
+        node_id: {
+            "node_id": node_id, "timestamp": float(t), "temperature": 20.0 + t,
+            "humidity": 45.0, "airflow": 2.5, "cpu_load": 0.5, "anomaly_score": 0.3,
+            "is_anomaly": node_id in anomalies, "obstruction_ratio": 0.0,
+        }
+        for node_id in ("node-1", "node-2", "node-3")
+    }
+
+
+def test_from_params_and_validation():
+    view = SubscriptionFilter.from_params(
+        {"nodes": "node-2,node-1", "fields": "is_anomaly", "every": "5", "on_change": "true"}
+    )
+    assert view.nodes == ("node-1", "node-2")
+    assert view.fields == ("is_anomaly",)
+    assert view.every == 5 and view.on_change
+
+    with pytest.raises(ValueError):
+        SubscriptionFilter.from_params({"fields": "bogus"})
+    with pytest.raises(ValueError):
+        view.update({"every": 0})
+    assert view.every == 5  # failed update leaves the filter unchanged
+
+
+def test_views_share_one_frame():
+    encoder = FrameEncoder()
+    encoded = encoder.encode(make_frame(1))
+    view = SubscriptionFilter(nodes=("node-2",), fields=("temperature", "is_anomaly"))
+    assert json.loads(view.text(encoded)) == {"node-2": {"temperature": 21.0, "is_anomaly": False}}
+    assert view.text(encoded) is SubscriptionFilter(nodes=("node-2",), fields=("is_anomaly", "temperature")).text(encoded)
+
+    decoded = FrameDecoder().decode(view.binary(encoded, use_delta=False))
+    assert decoded["nodes"] == {"node-2": {"temperature": 21.0, "is_anomaly": False}}
+
+
+def test_every_and_on_change():
+    encoder = FrameEncoder()
+    every = SubscriptionFilter(every=3)
+    changes = SubscriptionFilter(nodes=("node-1",), on_change=True)
+
+    anomalies = {4: ("node-1",), 5: ("node-1",), 6: ("node-1", "node-2"), 7: ("node-2",)}
+    sent_every, sent_changes = [], []
+    for t in range(1, 10):
+        encoded = encoder.encode(make_frame(t, anomalies.get(t, ())))
+        if every.wants(encoded):
+            sent_every.append(encoded.seq)
+        if changes.wants(encoded):
+            sent_changes.append(encoded.seq)
+
+    assert sent_every == [3, 6, 9]
+    # First frame, node-1 turning anomalous at 4 and clearing at 7
+    assert sent_changes == [1, 4, 7]
+
+
+def test_websocket_filters_and_control_message(api):
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation?nodes=node-2&fields=is_anomaly,temperature") as ws:
+            frame = json.loads(ws.receive_text())
+            assert list(frame) == ["node-2"]
+            assert set(frame["node-2"]) == {"is_anomaly", "temperature"}
+
+            ws.send_text(json.dumps({"nodes": ["node-1", "node-3"], "fields": ["cpu_load"]}))
+            for _ in range(50):
+                frame = json.loads(ws.receive_text())
+                if list(frame) == ["node-1", "node-3"]:
+                    break
+            assert set(frame["node-1"]) == {"cpu_load"}
+
+        with client.websocket_connect("/ws/simulation?fields=bogus") as ws:
+            with pytest.raises(Exception):
+                ws.receive_text()
+
+        # A viewer that never gets frames (no anomaly changes) still disconnects cleanly
+        with client.websocket_connect("/ws/simulation?on_change=1&every=1000000") as ws:
+            pass
+    assert api.hub.subscriber_count == 0
+
+
+def test_binary_control_message_is_ignored(api):
+    with TestClient(api.app) as client:
+        with client.websocket_connect("/ws/simulation?nodes=node-2") as ws:
+            ws.send_bytes(b"\x00\x01")
+            # The control reader survives and still applies text messages
+            ws.send_text(json.dumps({"nodes": ["node-3"]}))
+            for _ in range(50):
+                frame = json.loads(ws.receive_text())
+                if list(frame) == ["node-3"]:
+                    break
+            assert list(frame) == ["node-3"]
+    assert api.hub.subscriber_count == 0
@@ -0,0 +1,77 @@
+"""
+Tests for the vectorized threshold / k-of-n policy sweep.
+"""
+from collections import deque
+
+import numpy as np
+import pytest
+
+from backend.ml.threshold_sweep import (
+    all_k_of_n, effective_scores, k_of_n, sweep_policies, sweep_thresholds, threshold_grid,
+)
+
+
+def rolling_count(flags, window, needed):
+    """Reference k-of-n: the deque loop the analysis script used to run."""
+    out = np.zeros(len(flags), dtype=bool)
+    q, s = deque(), 0
+    for i, flag in enumerate(flags):
+        q.append(int(flag))
+        s += int(flag)
+        if len(q) > window:
+            s -= q.popleft()
+        out[i] = s >= needed
+    return out
+
+
+def onsets(alerts):
+    return int(np.sum(alerts & ~np.r_[False, alerts[:-1]]))
+
+
+@pytest.fixture
+def scores():
+    rng = np.random.default_rng(0)
+    return rng.normal(0.25, 0.05, 2000), rng.normal(0.1, 0.1, 300)
+
+
+def test_k_of_n_matches_rolling_count():
+    flags = np.random.default_rng(1).random(500) < 0.3
+    for k, n in all_k_of_n(6) + [(1, 20)]:
+        np.testing.assert_array_equal(k_of_n(flags, k, n), rolling_count(flags, n, k))
+        for t in (0.0, 0.3, 0.5):
+            values = np.random.default_rng(k * 100 + n).random(50)
+            np.testing.assert_array_equal(effective_scores(values, k, n) < t, k_of_n(values < t, k, n))
+
+    with pytest.raises(ValueError):
+        effective_scores(np.zeros(3), 3, 2)
+
+
+def test_window_sweep_matches_direct_counts(scores):
+    normal, anomaly = scores
+    thresholds = threshold_grid(normal, anomaly, n_points=51, include=[0.15])
+    assert 0.15 in thresholds and np.all(np.diff(thresholds) > 0)
+
+    sweep = sweep_thresholds(normal, anomaly, thresholds)
+    i = int(np.searchsorted(thresholds, 0.15))
+    assert sweep["TP"][i] == np.sum(anomaly < 0.15)
+    assert sweep["FP"][i] == np.sum(normal < 0.15)
+    assert sweep["recall"][-1] == 1.0 and sweep["false_positive_rate"][-1] == 1.0
+
+
+def test_policy_sweep_matches_brute_force(scores):
+    normal, anomaly = scores
+    thresholds = threshold_grid(normal, anomaly, n_points=21)
+    policies = [(1, 1), (2, 2), (2, 3), (3, 5), (1, 20)]
+    sweep = sweep_policies(normal, anomaly, thresholds, policies)
+    assert sweep["TP"].shape == (len(policies), len(thresholds))
+
+    for p, (k, n) in enumerate(policies):
+        for t, threshold in enumerate(thresholds):
+            a_alert = rolling_count(anomaly < threshold, n, k)
+            n_alert = rolling_count(normal < threshold, n, k)
+            assert sweep["TP"][p, t] == a_alert.sum()
+            assert sweep["FP"][p, t] == n_alert.sum()
+            assert sweep["anomaly_alert_count"][p, t] == onsets(a_alert)
+            assert sweep["normal_alert_count"][p, t] == onsets(n_alert)
+            expected_first = int(np.argmax(a_alert)) if a_alert.any() else -1
+            assert sweep["first_detection_index"][p, t] == expected_first
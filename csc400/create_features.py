@@ -6,7 +6,7 @@ import sys
 # Add project root to path
 sys.path.append(os.getcwd())
 
-from backend.ml.feature_extraction import SlidingWindowFeatureExtractor
+from backend.ml.feature_extraction import FEATURE_VARIABLES, extract_features_batch
 
 def process_cold_source():
     print("Processing Cold Source dataset...")
@@ -40,21 +40,16 @@ def process_cold_source():
         'cpu_load': cpu
     })
     
-    extractor = SlidingWindowFeatureExtractor(window_size=10)
-    features_list = []
-    for _, row in telemetry.iterrows():
-        extractor.add_point(row.to_dict())
-        if extractor.is_window_ready():
-            features_list.append(extractor.extract_features())
+    features = extract_features_batch(telemetry[FEATURE_VARIABLES].to_numpy(dtype=float), window_size=10)
             
     output_file = 'data/real/cold_source_features.csv'
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    pd.DataFrame(features_list).to_csv(output_file, index=False, header=False)
+    pd.DataFrame(features).to_csv(output_file, index=False, header=False)
     
     # Verify column 3 (airflow_mean)
     # The extractor order is [temp_mean, temp_var, temp_roc, airflow_mean, ...]
     # So airflow_mean is index 3.
-    feat_df = pd.DataFrame(features_list)
+    feat_df = pd.DataFrame(features)
     airflow_mean_stats = feat_df[3]
     print(f"Cold source column 3 (airflow_mean) stats:")
     print(f"  min={airflow_mean_stats.min():.4f}, max={airflow_mean_stats.max():.4f}, mean={airflow_mean_stats.mean():.4f}")
@@ -92,17 +87,12 @@ def process_mit():
         'cpu_load': cpu
     })
     
-    extractor = SlidingWindowFeatureExtractor(window_size=10)
-    features_list = []
-    for _, row in telemetry.iterrows():
-        extractor.add_point(row.to_dict())
-        if extractor.is_window_ready():
-            features_list.append(extractor.extract_features())
+    features = extract_features_batch(telemetry[FEATURE_VARIABLES].to_numpy(dtype=float), window_size=10)
             
     output_file = 'data/real/mit_features.csv'
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    pd.DataFrame(features_list).to_csv(output_file, index=False, header=False)
-    print(f"Saved {len(features_list)} feature vectors to {output_file}")
+    pd.DataFrame(features).to_csv(output_file, index=False, header=False)
+    print(f"Saved {len(features)} feature vectors to {output_file}")
 
 if __name__ == "__main__":
     process_cold_source()
@@ -3,20 +3,22 @@ import pandas as pd
 import numpy as np
 import os
 
+from backend.ml.datasets import read_mit
+
 def recreate_mit_anomalies():
     print("Reading MIT_dataset.csv...")
-    # Read the full dataset
-    df = pd.read_csv('datasets/MIT_dataset.csv')
+    # Read the full dataset (typed, with a parsed Datetime column). Temperature
+    # stays float64: in float32, steps within rounding of 5°C (e.g. 19.9884 ->
+    # 24.9884) land on the other side of the threshold
+    df = read_mit(dtypes={'Temp (C)': 'float64'})
     
-    # Correctly parse datetime for proper sorting
-    print("Parsing datetimes and sorting...")
-    df['Datetime'] = pd.to_datetime(df['Date'] + ' ' + df['Timestamp'])
+    print("Sorting by mote and time...")
     df = df.sort_values(['Moteid', 'Datetime'])
     
     # Identify anomalies per mote
     print("Calculating temperature deltas per mote...")
     # Group by Moteid and calculate the absolute difference from the previous reading
-    df['temp_diff'] = df.groupby('Moteid')['Temp (C)'].diff().abs()
+    df['temp_diff'] = df.groupby('Moteid', observed=True)['Temp (C)'].diff().abs()
     
     # Flag anomalies: temperature change > 5°C
     anomalies = df[df['temp_diff'] > 5.0].copy()
@@ -41,7 +43,7 @@ def recreate_mit_anomalies():
             # Since we sorted by Moteid and Datetime, we can just use positional index
             pos = df.index.get_loc(idx)
             prev_row = df.iloc[pos-1]
-            print(f"Mote {curr_row['Moteid']} | {prev_row['Timestamp']} ({prev_row['Temp (C)']}C) -> {curr_row['Timestamp']} ({curr_row['Temp (C)']}C) | Delta: {curr_row['temp_diff']:.2f}C")
+            print(f"Mote {curr_row['Moteid']} | {prev_row['Timestamp']} ({prev_row['Temp (C)']:.4f}C) -> {curr_row['Timestamp']} ({curr_row['Temp (C)']:.4f}C) | Delta: {curr_row['temp_diff']:.2f}C")
 
 if __name__ == "__main__":
     recreate_mit_anomalies()